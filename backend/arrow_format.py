@@ -0,0 +1,112 @@
+from typing import AsyncIterator, List
+import pyarrow as pa
+from instrumentation import phase
+
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Rows per record batch written to the response
+ARROW_BATCH_SIZE = 10_000
+
+# Columnar unit snapshot: packed coordinates, dictionary-encoded strings
+UNIT_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("lon", pa.float64()),
+    ("lat", pa.float64()),
+    ("sidc", pa.dictionary(pa.int32(), pa.string())),
+    ("designation", pa.dictionary(pa.int32(), pa.string())),
+    ("affiliation", pa.dictionary(pa.int32(), pa.string())),
+    ("revision", pa.int64()),
+])
+
+# Fields read from Mongo to fill UNIT_SCHEMA
+ARROW_PROJECTION = {
+    "geometry.coordinates": 1,
+    "properties.sidc": 1,
+    "properties.uniqueDesignation": 1,
+    "symbol.affiliation": 1,
+    "revision": 1,
+}
+
+
+class _ChunkSink:
+    """ Write-only file object collecting what the IPC writer emits between reads """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def record_batch(documents: List[dict]) -> pa.RecordBatch:
+    """
+    Convert unit documents to one record batch of UNIT_SCHEMA.
+    """
+    ids, lons, lats, sidcs, designations, affiliations, revisions = [], [], [], [], [], [], []
+    for document in documents:
+        lon, lat = document["geometry"]["coordinates"][:2]
+        properties = document.get("properties") or {}
+        ids.append(str(document["_id"]))
+        lons.append(lon)
+        lats.append(lat)
+        sidcs.append(properties.get("sidc"))
+        designations.append(properties.get("uniqueDesignation"))
+        affiliations.append((document.get("symbol") or {}).get("affiliation"))
+        revisions.append(document.get("revision"))
+
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(ids, type=pa.string()),
+            pa.array(lons, type=pa.float64()),
+            pa.array(lats, type=pa.float64()),
+            pa.array(sidcs, type=pa.string()).dictionary_encode(),
+            pa.array(designations, type=pa.string()).dictionary_encode(),
+            pa.array(affiliations, type=pa.string()).dictionary_encode(),
+            pa.array(revisions, type=pa.int64()),
+        ],
+        schema=UNIT_SCHEMA,
+    )
+
+
+async def stream_arrow(cursor, batch_size: int = ARROW_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """
+    Write the cursor's documents as an Arrow IPC stream, one record batch at a time.
+    """
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), UNIT_SCHEMA)
+    yield sink.take()  # schema message
+
+    documents = []
+    async for document in cursor:
+        documents.append(document)
+        if len(documents) >= batch_size:
+            with phase("serialization"):
+                writer.write_batch(record_batch(documents))
+            documents = []
+            yield sink.take()
+
+    if documents:
+        with phase("serialization"):
+            writer.write_batch(record_batch(documents))
+    writer.close()
+    yield sink.take()
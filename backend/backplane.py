@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+from change_feed import UnitChange, change_from_event
+
+
+# Pauses between attempts to (re)open the change stream, doubling up to the longest
+FIRST_RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 30.0
+
+Deliver = Callable[[UnitChange], None]
+Resync = Callable[[], Awaitable[None]]
+
+
+class ChangeStreamBackplane:
+    """
+    Delivers unit changes from the collection's change stream (the default).
+
+    Every worker tails the stream, so writes made through any worker, node or
+    directly in Mongo reach all of them. A local write is also delivered right
+    away, without waiting for the stream to echo it. Needs a replica set.
+
+    When the stream fails it is reopened from the current time rather than
+    from its resume token, which the oplog may no longer hold; changes made
+    meanwhile are then recovered by `resync`, once the new stream is open.
+    """
+
+    def __init__(self, collection: AsyncIOMotorCollection):
+        self.collection = collection
+        self._deliver: Optional[Deliver] = None
+        self._resync: Optional[Resync] = None
+        self._task: Optional[asyncio.Task] = None
+        # Whether the change stream is currently open and delivering events
+        self.watching = False
+
+    async def start(self, deliver: Deliver, resync: Optional[Resync] = None):
+        self._deliver = deliver
+        self._resync = resync
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def publish(self, change: UnitChange):
+        if self._deliver is not None:
+            self._deliver(change)
+
+    async def _watch(self):
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete", "invalidate"]}}}]
+        resume_token = None
+        # Whether changes may have been missed since the last stream closed
+        missed = False
+        delay = FIRST_RETRY_DELAY
+
+        while True:
+            try:
+                async with self.collection.watch(
+                    pipeline,
+                    full_document="updateLookup",
+                    resume_after=resume_token,
+                ) as stream:
+                    logging.info("Watching %s for unit changes", self.collection.name)
+                    self.watching = True
+                    delay = FIRST_RETRY_DELAY
+                    if missed and self._resync is not None:
+                        # The new stream covers everything from here on
+                        await self._resync()
+                    missed = False
+                    async for event in stream:
+                        if event.get("operationType") == "invalidate":
+                            resume_token = None
+                            missed = True
+                            break
+                        resume_token = stream.resume_token
+                        if (change := change_from_event(event)) is not None:
+                            self._deliver(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.watching = False
+                # Resumable errors are retried by the driver already, and the token
+                # may have fallen off the oplog (ChangeStreamHistoryLost): start over
+                resume_token = None
+                missed = True
+                # e.g. a standalone server, which has no change streams
+                logging.warning("Unit change stream unavailable (%s), retrying in %.0fs", e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+
+
+class InMemoryBackplane:
+    """
+    Delivers published changes to every feed attached to the same hub, in-process.
+
+    A stand-in for tests and single-process runs against a standalone Mongo:
+    several apps (one per simulated worker) sharing a hub see each other's
+    writes. Writes made outside the API are not seen.
+    """
+
+    # Hub used when none is given: all in-memory backplanes of the process
+    default_hub: List["InMemoryBackplane"] = []
+
+    # Only published changes are delivered, so writers must publish everything
+    watching = False
+
+    def __init__(self, hub: Optional[List["InMemoryBackplane"]] = None):
+        self.hub = hub if hub is not None else self.default_hub
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver, resync: Optional[Resync] = None):
+        # Every change is delivered as it is published, nothing to catch up on
+        self._deliver = deliver
+        if self not in self.hub:
+            self.hub.append(self)
+
+    async def stop(self):
+        if self in self.hub:
+            self.hub.remove(self)
+
+    def publish(self, change: UnitChange):
+        for backplane in list(self.hub):
+            backplane._deliver(change)
+
+
+def create_backplane(kind: str, collection: AsyncIOMotorCollection):
+    """
+    Build the backplane named by the BACKPLANE setting.
+    """
+    if kind == "change_stream":
+        return ChangeStreamBackplane(collection)
+    if kind == "memory":
+        return InMemoryBackplane()
+    raise ValueError(f"Unknown backplane {kind!r}, expected 'change_stream' or 'memory'")
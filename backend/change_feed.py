@@ -0,0 +1,196 @@
+import asyncio
+import inspect
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from geo import BBox, bbox_contains
+from encoding import feature_json
+
+
+# Revision recorded for deleted units: ids are never reused, so nothing is newer
+DELETED = float("inf")
+
+
+@dataclass(eq=False)
+class UnitChange:
+    """ A unit that was inserted/updated (`document` set) or deleted (`document` None) """
+    id: str
+    document: Optional[dict] = None
+
+    @property
+    def deleted(self) -> bool:
+        return self.document is None
+
+    @property
+    def revision(self) -> Optional[int]:
+        return self.document.get("revision") if self.document is not None else None
+
+    @cached_property
+    def coordinates(self) -> Optional[List[float]]:
+        if self.document is None:
+            return None
+        return (self.document.get("geometry") or {}).get("coordinates")
+
+    @cached_property
+    def feature_json(self) -> bytes:
+        """ Serialized once, however many subscribers receive the change """
+        return feature_json(self.document)
+
+
+def change_from_event(event: dict) -> Optional[UnitChange]:
+    """
+    Convert a Mongo change stream event into a UnitChange.
+    """
+    operation = event.get("operationType")
+    unit_id = str(event["documentKey"]["_id"]) if "documentKey" in event else None
+
+    if operation in ("insert", "update", "replace"):
+        document = event.get("fullDocument")
+        if document is None:  # deleted again before the update lookup ran
+            return UnitChange(id=unit_id)
+        return UnitChange(id=unit_id, document=document)
+    if operation == "delete":
+        return UnitChange(id=unit_id)
+    return None
+
+
+class UnitChangeFeed:
+    """
+    Fans unit changes out to this process's subscribers (caches, streams).
+
+    Changes reach the feed through a backplane (see `backplane.py`), which
+    carries writes made by any worker or node to every process, so each
+    process's subscribers stay coherent. Callbacks run on the event loop
+    and must not block.
+
+    Deliveries can repeat or arrive out of order (a local write is seen
+    before the backplane echoes it back); a change older than the last one
+    delivered for the same unit, by `revision`, is dropped. Those duplicates
+    trail the newer change by moments, so only the `max_tracked_units` most
+    recently changed units are remembered.
+
+    When the backplane may have missed changes, the hooks added with
+    `on_resync` rebuild what was derived from them.
+    """
+
+    def __init__(self, backplane, max_tracked_units: int = 100_000):
+        self.backplane = backplane
+        self.max_tracked_units = max_tracked_units
+        self._callbacks: List[Callable[[UnitChange], None]] = []
+        self._resync_hooks: List[Callable[[], Optional[Awaitable[None]]]] = []
+        # Last revision delivered per unit, least recently changed first; deleted units map to DELETED
+        self._revisions: "OrderedDict[str, float]" = OrderedDict()
+
+    @property
+    def watching(self) -> bool:
+        """ Whether writes reach the backplane without being published (change streams) """
+        return self.backplane.watching
+
+    def subscribe(self, callback: Callable[[UnitChange], None]):
+        self._callbacks.append(callback)
+
+    def unsubscribe(self, callback: Callable[[UnitChange], None]):
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    def on_resync(self, hook: Callable[[], Optional[Awaitable[None]]]):
+        self._resync_hooks.append(hook)
+
+    async def resync(self):
+        """
+        Run the resync hooks, e.g. after the change stream lost its place.
+        """
+        logging.warning("Unit changes may have been missed, resynchronizing")
+        for hook in list(self._resync_hooks):
+            if inspect.isawaitable(result := hook()):
+                await result
+
+    def publish(self, change: UnitChange):
+        """
+        Announce a write made by this process to every process sharing the backplane.
+        """
+        self.backplane.publish(change)
+
+    def dispatch(self, change: UnitChange):
+        """
+        Deliver a change to this process's subscribers, unless it is stale.
+        """
+        last = self._revisions.get(change.id)
+        if change.deleted:
+            self._revisions[change.id] = DELETED
+        elif last is not None and change.revision is not None and change.revision <= last:
+            return
+        elif change.revision is not None:
+            self._revisions[change.id] = change.revision
+        if change.id in self._revisions:
+            self._revisions.move_to_end(change.id)
+            while len(self._revisions) > self.max_tracked_units:
+                self._revisions.popitem(last=False)
+
+        for callback in list(self._callbacks):
+            try:
+                callback(change)
+            except Exception:
+                logging.exception("Unit change subscriber failed")
+
+    async def start(self):
+        await self.backplane.start(self.dispatch, self.resync)
+
+    async def stop(self):
+        await self.backplane.stop()
+
+
+@dataclass(eq=False)
+class UnitSubscription:
+    """
+    Per-client buffer of pending changes, coalesced to the latest state of each unit.
+
+    With a `bbox`, only units inside it are sent. Units that leave the box are
+    sent as deletes if the client is known to hold them (`visible`).
+    """
+    bbox: Optional[BBox] = None
+    pending: Dict[str, UnitChange] = field(default_factory=dict)
+    visible: Set[str] = field(default_factory=set)
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def __call__(self, change: UnitChange):
+        if self.bbox is not None:
+            coordinates = change.coordinates
+            inside = bool(coordinates) and bbox_contains(self.bbox, coordinates[0], coordinates[1])
+            if inside:
+                self.visible.add(change.id)
+            elif change.id in self.visible:
+                self.visible.discard(change.id)
+                change = UnitChange(id=change.id)
+            else:
+                return
+
+        self.pending[change.id] = change
+        self.ready.set()
+
+    def set_bbox(self, bbox: Optional[BBox]):
+        self.bbox = bbox
+        self.visible.clear()
+
+    async def next_batch(self, coalesce_seconds: float) -> List[UnitChange]:
+        """
+        Wait for changes, then keep collecting for `coalesce_seconds` so that
+        repeated updates of a unit are sent once.
+        """
+        await self.ready.wait()
+        await asyncio.sleep(coalesce_seconds)
+        batch = list(self.pending.values())
+        self.pending = {}
+        self.ready.clear()
+        return batch
+
+
+def encode_delta(changes: List[UnitChange]) -> str:
+    """
+    Serialize a batch as `{"type": "delta", "upserts": [features], "deletes": [ids]}`.
+    """
+    upserts = b",".join(change.feature_json for change in changes if not change.deleted)
+    deletes = ",".join(f'"{change.id}"' for change in changes if change.deleted)
+    return f'{{"type":"delta","upserts":[{upserts.decode()}],"deletes":[{deletes}]}}'
@@ -0,0 +1,22 @@
+from typing import Iterable
+from starlette.middleware.gzip import GZipMiddleware
+
+
+class SelectiveGZipMiddleware:
+    """
+    Starlette's GZipMiddleware, except for requests under `excluded_paths`.
+
+    Event streams such as /units/stream must reach the client one event at a
+    time, which gzip would hold back until its buffer fills.
+    """
+
+    def __init__(self, app, minimum_size: int = 1000, excluded_paths: Iterable[str] = ()):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+        self.excluded_paths = tuple(excluded_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not scope["path"].startswith(self.excluded_paths):
+            await self.gzip(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
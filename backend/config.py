@@ -1,7 +1,83 @@
-from typing import Optional
+import os
+import tempfile
+from typing import List, Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+
+UNITS_COLLECTION = "milsym_units_01"
+TRACKS_COLLECTION = "milsym_unit_tracks_01"
+COUNTERS_COLLECTION = "milsym_counters_01"
+TOMBSTONES_COLLECTION = "milsym_unit_tombstones_01"
+
+
 class BaseConfig(BaseSettings):
     DB_URL: Optional[str]
     DB_NAME: Optional[str]
+    # Client connection pool, per server (see pymongo's MongoClient options)
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None
+    # How long a request may wait for a free pooled connection before failing
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None
+    MONGO_CONNECT_TIMEOUT_MS: int = 10_000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 10_000
+    MONGO_SOCKET_TIMEOUT_MS: Optional[int] = None
+    # Wire compression, in order of preference (zstd needs zstandard, snappy python-snappy)
+    MONGO_COMPRESSORS: List[str] = ["zstd"]
+    # e.g. secondaryPreferred to serve reads from replicas; read-after-write uses the primary
+    MONGO_READ_PREFERENCE: str = "primary"
+    MONGO_MAX_STALENESS_SECONDS: Optional[int] = None
+    # Write concern: a number of nodes or "majority"; unset uses the server default
+    MONGO_WRITE_CONCERN: Optional[str] = None
+    MONGO_WRITE_TIMEOUT_MS: Optional[int] = None
+    MONGO_JOURNAL: Optional[bool] = None
+    # Startup pings before giving up, and the back-off step between them
+    MONGO_STARTUP_ATTEMPTS: int = 5
+    MONGO_STARTUP_RETRY_SECONDS: float = 2.0
+    # Documents sent to Mongo per insert_many/bulk_write call
+    BULK_BATCH_SIZE: int = 1000
+    # Window over which /units/stream coalesces repeated updates of a unit
+    STREAM_COALESCE_SECONDS: float = 0.25
+    # Idle interval after which the SSE stream sends a keepalive comment
+    STREAM_KEEPALIVE_SECONDS: float = 15.0
+    # How unit changes reach every worker: "change_stream" (needs a replica set)
+    # or "memory" (in-process only; tests and single-worker runs)
+    BACKPLANE: Literal["change_stream", "memory"] = "change_stream"
+    # Keep the unit set in memory to serve full reads and lookups by id
+    UNIT_CACHE_ENABLED: bool = False
+    # Re-validate stored documents through the Pydantic models on every read
+    STRICT_SERIALIZATION: bool = False
+    # Grid cells across each map tile for /units/clusters (4 => 64px clusters)
+    CLUSTER_CELLS_PER_TILE: int = 4
+    # Vector tiles kept in memory, and how long clients may cache them
+    TILE_CACHE_SIZE: int = 10_000
+    TILE_MAX_AGE_SECONDS: int = 5
+    # Fraction of a tile around it whose units are also drawn in it
+    TILE_BUFFER: float = 0.0625
+    # Rendered symbols and sprites kept in memory, and the directory caching them
+    # on disk across restarts and workers (empty keeps them in memory only)
+    SYMBOL_CACHE_SIZE: int = 4096
+    SYMBOL_CACHE_DIR: str = os.path.join(tempfile.gettempdir(), "milsym_symbols")
+    # Size the symbol cache directory is kept under, least recently used files going first
+    SYMBOL_CACHE_DIR_MAX_BYTES: int = 256 * 1024 * 1024
+    # How long clients may use a symbol before revalidating it
+    SYMBOL_MAX_AGE_SECONDS: int = 7 * 24 * 3600
+    # Browser origins allowed to call the API (vector tiles, symbols)
+    CORS_ORIGINS: List[str] = ["http://localhost:8501"]
+    # Record every position written into the track history time-series collection
+    TRACK_HISTORY_ENABLED: bool = True
+    TRACK_BATCH_SIZE: int = 5000
+    TRACK_FLUSH_SECONDS: float = 1.0
+    # Track points older than this are expired by Mongo (0 keeps them forever)
+    TRACK_RETENTION_DAYS: int = 30
+    # How long deletions stay visible to GET /units?since= clients
+    TOMBSTONE_RETENTION_DAYS: int = 7
+    # Responses of at least this many bytes are gzipped for clients accepting it (0 disables);
+    # streams are sent as they are
+    GZIP_MINIMUM_SIZE: int = 1000
+    GZIP_EXCLUDED_PATHS: List[str] = ["/units/stream"]
+    # Requests slower than this are logged with a per-phase breakdown (0 disables)
+    SLOW_REQUEST_SECONDS: float = 1.0
+    # Allow the sampling profiler to be switched on at runtime under /debug/profiler
+    PROFILER_ENABLED: bool = False
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
\ No newline at end of file
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import threading
+from typing import Dict
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ReadPreference
+from pymongo.errors import PyMongoError
+from pymongo.monitoring import ConnectionPoolListener
+from config import BaseConfig
+
+
+class PoolMetrics(ConnectionPoolListener):
+    """
+    Connection pool utilization per server, from pymongo's CMAP events.
+
+    Events arrive on pymongo's threads, so the counters are guarded by a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers: Dict[str, dict] = {}
+
+    def _server(self, address) -> dict:
+        key = "%s:%s" % address
+        if key not in self._servers:
+            self._servers[key] = {
+                "open": 0,
+                "checked_out": 0,
+                "checkouts": 0,
+                "checkout_failures": 0,
+                "checkout_wait_max_ms": 0.0,
+                "cleared": 0,
+            }
+        return self._servers[key]
+
+    def _update(self, address, **increments):
+        with self._lock:
+            server = self._server(address)
+            for field, increment in increments.items():
+                server[field] += increment
+
+    def pool_created(self, event):
+        with self._lock:
+            self._server(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._update(event.address, cleared=1)
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._servers.pop("%s:%s" % event.address, None)
+
+    def connection_created(self, event):
+        self._update(event.address, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event.address, open=-1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._update(event.address, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            server = self._server(event.address)
+            server["checked_out"] += 1
+            server["checkouts"] += 1
+            # `duration` (seconds spent waiting) is reported by pymongo >= 4.7
+            if (duration := getattr(event, "duration", None)) is not None:
+                server["checkout_wait_max_ms"] = max(server["checkout_wait_max_ms"], duration * 1000)
+
+    def connection_checked_in(self, event):
+        self._update(event.address, checked_out=-1)
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {address: dict(server) for address, server in self._servers.items()}
+
+
+def client_options(settings: BaseConfig) -> dict:
+    """
+    Map the MONGO_* settings to AsyncIOMotorClient keyword arguments.
+
+    Unset optional settings are left out so the driver defaults (or the
+    options in DB_URL) apply.
+    """
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS,
+        "readPreference": settings.MONGO_READ_PREFERENCE,
+        "maxStalenessSeconds": settings.MONGO_MAX_STALENESS_SECONDS,
+        "w": settings.MONGO_WRITE_CONCERN,
+        "wTimeoutMS": settings.MONGO_WRITE_TIMEOUT_MS,
+        "journal": settings.MONGO_JOURNAL,
+    }
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = ",".join(settings.MONGO_COMPRESSORS)
+    if isinstance(options["w"], str) and options["w"].isdigit():
+        options["w"] = int(options["w"])
+    return {name: value for name, value in options.items() if value is not None}
+
+
+def create_client(settings: BaseConfig, *event_listeners) -> AsyncIOMotorClient:
+    return AsyncIOMotorClient(settings.DB_URL, event_listeners=list(event_listeners), **client_options(settings))
+
+
+async def wait_for_connection(client: AsyncIOMotorClient, attempts: int, delay: float):
+    """
+    Ping the deployment until it answers, waiting `delay` seconds more after each failure.
+
+    Raises the last error once `attempts` pings have failed.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            await client.admin.command("ping")
+            logging.info("Connected to MongoDB")
+            return
+        except PyMongoError as e:
+            if attempt == attempts:
+                raise
+            logging.warning("MongoDB ping %d/%d failed, retrying: %s", attempt, attempts, e)
+            await asyncio.sleep(delay * attempt)
+
+
+def primary(db: AsyncIOMotorDatabase, name: str) -> AsyncIOMotorCollection:
+    """
+    The collection read from the primary, for reading back a write that was just made.
+    """
+    return db.get_collection(name, read_preference=ReadPreference.PRIMARY)
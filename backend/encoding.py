@@ -0,0 +1,89 @@
+from typing import Iterable, Optional
+from bson import ObjectId
+import orjson
+from models import UnitFeatureModel
+
+
+# When enabled, every document read is re-validated through UnitFeatureModel
+# before it is serialized. Useful when debugging malformed stored data.
+strict_mode = False
+
+
+def set_strict_mode(enabled: bool):
+    global strict_mode
+    strict_mode = enabled
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value) -> bytes:
+    """
+    orjson.dumps with ObjectId support.
+    """
+    return orjson.dumps(value, default=_default)
+
+
+def _without_null_bbox(geometry):
+    if isinstance(geometry, dict) and "bbox" in geometry and geometry["bbox"] is None:
+        return {k: v for k, v in geometry.items() if k != "bbox"}
+    return geometry
+
+
+def feature_json(document: dict) -> bytes:
+    """
+    Serialize a stored unit document as a GeoJSON Feature.
+
+    Documents were validated when they were written, so by default they are
+    encoded directly, with `_id` renamed to `id`, instead of being rebuilt
+    as UnitFeatureModel instances.
+    """
+    if strict_mode:
+        return UnitFeatureModel.model_validate(document).model_dump_json().encode()
+
+    feature = {
+        "type": document.get("type", "Feature"),
+        "geometry": _without_null_bbox(document.get("geometry")),
+        "properties": document.get("properties"),
+        "id": document.get("_id"),
+    }
+    if document.get("bbox") is not None:
+        feature["bbox"] = document["bbox"]
+    if document.get("symbol") is not None:
+        feature["symbol"] = document["symbol"]
+    if document.get("revision") is not None:
+        feature["revision"] = document["revision"]
+    return dumps(feature)
+
+
+def feature_collection_json(features: Iterable[bytes], next_cursor: Optional[str] = None) -> bytes:
+    """
+    Join serialized features into a FeatureCollection body.
+    """
+    return (
+        b'{"type":"FeatureCollection","features":['
+        + b",".join(features)
+        + b'],"next":'
+        + dumps(next_cursor)
+        + b"}"
+    )
+
+
+def feature_changes_json(features: Iterable[bytes], deleted: Iterable, revision: int, more: bool) -> bytes:
+    """
+    Join serialized features and deleted ids into a `?since=` delta body.
+    """
+    return (
+        b'{"type":"FeatureCollection","features":['
+        + b",".join(features)
+        + b'],"deleted":'
+        + dumps(list(deleted))
+        + b',"revision":'
+        + dumps(revision)
+        + b',"more":'
+        + dumps(more)
+        + b"}"
+    )
@@ -0,0 +1,130 @@
+import math
+from typing import List, Optional, Tuple
+
+
+# (min_lon, min_lat, max_lon, max_lat), the GeoJSON bbox order
+BBox = Tuple[float, float, float, float]
+
+# Widest longitude span of a single query polygon. Mongo rejects polygons
+# larger than a hemisphere, so wide boxes are split into narrower pieces.
+MAX_POLYGON_SPAN = 90.0
+# Polygon rings are kept just off the poles, where every longitude meets
+MAX_POLYGON_LAT = 89.9999
+# Longitude between the vertices of a bbox's north and south edges. Polygon
+# edges are great circles on a 2dsphere index, so a long edge between two
+# corners bulges toward the pole (by ~10 degrees across 90 at 45N); short
+# steps keep it within ~0.001 degrees of the parallel.
+PARALLEL_STEP = 1.0
+
+
+def parse_coordinates(value: str, count: int) -> List[float]:
+    """
+    Parse a comma separated list of `count` floats, e.g. "13.38,52.46".
+    """
+    parts = value.split(",")
+    if len(parts) != count:
+        raise ValueError(f"expected {count} comma separated numbers, got {value!r}")
+    try:
+        return [float(part) for part in parts]
+    except ValueError:
+        raise ValueError(f"expected {count} comma separated numbers, got {value!r}")
+
+
+def parse_bbox(value: str) -> BBox:
+    """
+    Parse a `minLon,minLat,maxLon,maxLat` bounding box.
+
+    `minLon` may be greater than `maxLon` for boxes crossing the antimeridian.
+    """
+    min_lon, min_lat, max_lon, max_lat = parse_coordinates(value, 4)
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise ValueError("bbox longitudes must be within [-180, 180]")
+    if not (-90 <= min_lat < max_lat <= 90):
+        raise ValueError("bbox latitudes must be within [-90, 90] and minLat < maxLat")
+    if min_lon == max_lon:
+        raise ValueError("bbox must have a non-zero width")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def parse_point(value: str) -> Tuple[float, float]:
+    """
+    Parse a `lon,lat` point.
+    """
+    lon, lat = parse_coordinates(value, 2)
+    if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+        raise ValueError("point must be a valid lon,lat pair")
+    return lon, lat
+
+
+def _longitude_spans(min_lon: float, max_lon: float) -> List[Tuple[float, float]]:
+    """
+    Split a longitude range into spans no wider than `MAX_POLYGON_SPAN`.
+    """
+    if min_lon > max_lon:  # crosses the antimeridian
+        return _longitude_spans(min_lon, 180.0) + _longitude_spans(-180.0, max_lon)
+
+    spans = []
+    start = min_lon
+    while max_lon - start > MAX_POLYGON_SPAN:
+        spans.append((start, start + MAX_POLYGON_SPAN))
+        start += MAX_POLYGON_SPAN
+    spans.append((start, max_lon))
+    return spans
+
+
+def _parallel(west: float, east: float, lat: float) -> List[List[float]]:
+    """
+    Points along the parallel at `lat` from `west` to `east`, `PARALLEL_STEP` apart.
+    """
+    steps = max(1, math.ceil((east - west) / PARALLEL_STEP))
+    return [[west + (east - west) * step / steps, lat] for step in range(steps + 1)]
+
+
+def bbox_geometry(bbox: BBox) -> dict:
+    """
+    GeoJSON MultiPolygon covering `bbox`, usable in a `$geoWithin` query.
+
+    The north and south edges follow the parallels (see `PARALLEL_STEP`), so
+    the polygon covers the same area as `bbox_contains`.
+    """
+    min_lon, min_lat, max_lon, max_lat = bbox
+    min_lat = max(min_lat, -MAX_POLYGON_LAT)
+    max_lat = min(max_lat, MAX_POLYGON_LAT)
+    polygons = [
+        [_parallel(west, east, min_lat) + _parallel(west, east, max_lat)[::-1] + [[west, min_lat]]]
+        for west, east in _longitude_spans(min_lon, max_lon)
+        if east > west
+    ]
+    return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+def bbox_contains(bbox: BBox, lon: float, lat: float) -> bool:
+    """
+    Whether the point lies in `bbox` (antimeridian aware).
+    """
+    min_lon, min_lat, max_lon, max_lat = bbox
+    if not min_lat <= lat <= max_lat:
+        return False
+    if min_lon <= max_lon:
+        return min_lon <= lon <= max_lon
+    return lon >= min_lon or lon <= max_lon
+
+
+def geo_filter(
+    bbox: Optional[BBox] = None,
+    near: Optional[Tuple[float, float]] = None,
+    radius: Optional[float] = None,
+) -> dict:
+    """
+    Mongo filter on the `geometry` field for a bbox or a near/radius query.
+    """
+    if bbox is not None:
+        return {"geometry": {"$geoWithin": {"$geometry": bbox_geometry(bbox)}}}
+
+    if near is not None:
+        near_sphere = {"$geometry": {"type": "Point", "coordinates": list(near)}}
+        if radius is not None:
+            near_sphere["$maxDistance"] = radius
+        return {"geometry": {"$nearSphere": near_sphere}}
+
+    return {}
@@ -0,0 +1,35 @@
+# Production server: gunicorn managing uvicorn workers
+#   gunicorn -c gunicorn.conf.py main:app
+#
+# Every worker is a full copy of the app with its own Mongo connection pool
+# (MONGO_MAX_POOL_SIZE each), caches and stream subscribers. Workers stay
+# coherent through the BACKPLANE, so plan the replica set's connection limit
+# for workers x pool size across all nodes.
+import multiprocessing
+import os
+
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# One worker per core; the app is async, so a worker is not tied up by slow I/O
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Seconds a worker may go silent before it is restarted, and to finish requests on shutdown
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+# Recycle workers now and then to bound memory growth (0 disables)
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "0"))
+
+accesslog = "-"
+errorlog = "-"
+
+
+def child_exit(server, worker):
+    # With PROMETHEUS_MULTIPROC_DIR set, /metrics aggregates all workers' samples
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,187 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import REGISTRY, multiprocess
+from pymongo.monitoring import CommandListener
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+COUNT_BUCKETS = (0, 1, 10, 100, 1000, 10_000, 100_000)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to send the full response",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+RESPONSE_BYTES = Histogram(
+    "http_response_bytes", "Response body size",
+    ["method", "route"], buckets=SIZE_BUCKETS,
+)
+PHASE_DURATION = Histogram(
+    "app_phase_duration_seconds", "Time spent in a request phase (validation, serialization)",
+    ["phase"], buckets=LATENCY_BUCKETS,
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command round trips, as seen by the driver",
+    ["command", "outcome"], buckets=LATENCY_BUCKETS,
+)
+MONGO_DOCUMENTS_RETURNED = Histogram(
+    "mongo_documents_returned", "Documents in each find/getMore/aggregate reply",
+    ["command"], buckets=COUNT_BUCKETS,
+)
+SLOW_REQUESTS = Counter("http_slow_requests_total", "Requests slower than SLOW_REQUEST_SECONDS", ["route"])
+
+# Commands whose replies carry a cursor batch
+CURSOR_COMMANDS = {"find", "getMore", "aggregate"}
+
+
+@dataclass
+class RequestTimings:
+    """
+    Time spent per phase while serving one request.
+
+    Mongo commands run on the driver's threads, so updates take a lock.
+    """
+    phases: Dict[str, float] = field(default_factory=dict)
+    mongo_commands: int = 0
+    documents: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, phase: str, seconds: float, commands: int = 0, documents: int = 0):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+            self.mongo_commands += commands
+            self.documents += documents
+
+
+# Timings of the request being served; Motor copies the context to its threads
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Time a block as one phase of the current request (e.g. "serialization").
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        PHASE_DURATION.labels(name).observe(elapsed)
+        if (timings := current_timings.get()) is not None:
+            timings.add(name, elapsed)
+
+
+def _documents_in_reply(reply) -> int:
+    cursor = reply.get("cursor") if isinstance(reply, dict) else None
+    if not isinstance(cursor, dict):
+        return 0
+    return len(cursor.get("firstBatch") or cursor.get("nextBatch") or ())
+
+
+class MongoCommandMetrics(CommandListener):
+    """
+    Records the duration of every command and the documents each cursor batch returned.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        seconds = event.duration_micros / 1_000_000
+        MONGO_COMMAND_DURATION.labels(event.command_name, "succeeded").observe(seconds)
+        documents = 0
+        if event.command_name in CURSOR_COMMANDS:
+            documents = _documents_in_reply(event.reply)
+            MONGO_DOCUMENTS_RETURNED.labels(event.command_name).observe(documents)
+        if (timings := current_timings.get()) is not None:
+            timings.add("mongo", seconds, commands=1, documents=documents)
+
+    def failed(self, event):
+        seconds = event.duration_micros / 1_000_000
+        MONGO_COMMAND_DURATION.labels(event.command_name, "failed").observe(seconds)
+        if (timings := current_timings.get()) is not None:
+            timings.add("mongo", seconds, commands=1)
+
+
+def _route_label(scope) -> str:
+    # Set by the router once matched: the path template keeps the label set bounded
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Per-route latency and response size, plus a log line for slow requests.
+
+    A plain ASGI middleware, so streamed responses pass through unbuffered;
+    their latency covers the whole body. WebSockets are not measured.
+    """
+
+    def __init__(self, app, slow_request_seconds: float = 0.0):
+        self.app = app
+        self.slow_request_seconds = slow_request_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        status = 500
+        size = 0
+
+        async def send_measured(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_measured)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_timings.reset(token)
+            route = _route_label(scope)
+            REQUEST_DURATION.labels(scope["method"], route, str(status)).observe(elapsed)
+            RESPONSE_BYTES.labels(scope["method"], route).observe(size)
+            if self.slow_request_seconds and elapsed >= self.slow_request_seconds:
+                SLOW_REQUESTS.labels(route).inc()
+                log_slow_request(scope, route, status, elapsed, size, timings)
+
+
+def log_slow_request(scope, route: str, status: int, elapsed: float, size: int, timings: RequestTimings):
+    phases = dict(timings.phases)
+    other = max(elapsed - sum(phases.values()), 0.0)
+    breakdown = " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in sorted(phases.items()))
+    logging.warning(
+        "Slow request %s %s (%s) %d in %.1fms, %d bytes: %s other=%.1fms, %d mongo commands, %d documents",
+        scope["method"], scope["path"], route, status, elapsed * 1000, size,
+        breakdown, other * 1000, timings.mongo_commands, timings.documents,
+    )
+
+
+def metrics_response_body() -> tuple:
+    """
+    The Prometheus exposition and its content type.
+
+    Under gunicorn with PROMETHEUS_MULTIPROC_DIR set, the samples of all
+    workers are aggregated; otherwise those of this process are returned.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
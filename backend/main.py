@@ -1,8 +1,30 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
-from motor import motor_asyncio
-from config import BaseConfig
+from functools import partial
+from fastapi import FastAPI, Response
+from fastapi.middleware.cors import CORSMiddleware
+from pymongo import ASCENDING, GEOSPHERE
+from pymongo.errors import OperationFailure
+from config import BaseConfig, UNITS_COLLECTION, TRACKS_COLLECTION
+from change_feed import UnitChangeFeed
+from backplane import create_backplane
+from database import PoolMetrics, create_client, wait_for_connection
+from compression import SelectiveGZipMiddleware
+from instrumentation import MetricsMiddleware, MongoCommandMetrics, metrics_response_body
+from profiler import SamplingProfiler
+from unit_cache import UnitCache
+from tile_cache import TileCache
+from symbols import SymbolCache
+from encoding import set_strict_mode
+from sidc import backfill_symbols
+from revisions import backfill_revisions, ensure_revision_indexes
+from track_history import TrackRecorder, ensure_track_collection
 from routers.milsymbol_units import router as milsymbol_units_router
+from routers.unit_stream import router as unit_stream_router
+from routers.unit_clusters import router as unit_clusters_router
+from routers.unit_tiles import router as unit_tiles_router
+from routers.unit_tracks import router as unit_tracks_router
+from routers.symbols import router as symbols_router
+from routers.diagnostics import router as diagnostics_router
 import logging
 
 # Set up logging
@@ -11,30 +33,172 @@ logging.basicConfig(level=logging.INFO)
 settings = BaseConfig()
 
 
+async def ensure_indexes(db) -> bool:
+    """
+    Create the indexes the unit queries rely on. Safe to run on every startup.
+
+    Returns whether unit designations are enforced to be unique.
+    """
+    units = db[UNITS_COLLECTION]
+    await units.create_index([("geometry", GEOSPHERE)])
+
+    # Position feeds create units by designation, which must be unique for that to be safe
+    designation_key = [("properties.uniqueDesignation", ASCENDING)]
+    unique = True
+    try:
+        await units.create_index(
+            designation_key,
+            unique=True,
+            partialFilterExpression={"properties.uniqueDesignation": {"$type": "string"}},
+        )
+    except OperationFailure as e:
+        logging.warning("Duplicate unit designations, falling back to a non-unique index: %s", e)
+        await units.create_index(designation_key)
+        unique = False
+
+    # SIDC prefixes searched by GET /units?q=
+    await units.create_index([("properties.sidc", ASCENDING)])
+
+    # Decoded SIDC fields filtered on by GET /units
+    for field in ("symbol.affiliation", "symbol.symbol_set", "symbol.echelon"):
+        await units.create_index([(field, ASCENDING)])
+
+    return unique
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logging.info("---------- TEST ----------")
     # Starting up
-    app.client = motor_asyncio.AsyncIOMotorClient(settings.DB_URL)
+    app.settings = settings
+    set_strict_mode(settings.STRICT_SERIALIZATION)
+    app.pool_metrics = PoolMetrics()
+    app.client = app.client_factory(settings, app.pool_metrics, MongoCommandMetrics())
     app.db = app.client[settings.DB_NAME]
+    app.profiler = SamplingProfiler()
+
+    await wait_for_connection(
+        app.client, settings.MONGO_STARTUP_ATTEMPTS, settings.MONGO_STARTUP_RETRY_SECONDS
+    )
 
+    # Until the unique index is known to exist, position reports never create units
+    app.unique_designations = False
     try:
-        app.client.admin.command("ping")
-        print("Pinged your deployment. You have successfully connected to MongoDB!")
-        # print(f"Mongo address: {settings.DB_URL}")
+        app.unique_designations = await ensure_indexes(app.db)
+        if backfilled := await backfill_symbols(app.db[UNITS_COLLECTION]):
+            logging.info("Decoded the SIDC of %d existing units", backfilled)
+        await ensure_revision_indexes(
+            app.db, app.db[UNITS_COLLECTION], settings.TOMBSTONE_RETENTION_DAYS * 24 * 3600
+        )
+        if backfilled := await backfill_revisions(app.db, app.db[UNITS_COLLECTION]):
+            logging.info("Assigned a revision to %d existing units", backfilled)
     except Exception as e:
-        print(e)
+        logging.error("Failed to prepare the unit collection: %s", e)
+
+    app.change_feed = UnitChangeFeed(create_backplane(settings.BACKPLANE, app.db[UNITS_COLLECTION]))
+    await app.change_feed.start()
+
+    app.unit_cache = None
+    if settings.UNIT_CACHE_ENABLED:
+        app.unit_cache = UnitCache()
+        app.change_feed.subscribe(app.unit_cache)
+        app.change_feed.on_resync(partial(app.unit_cache.load, app.db[UNITS_COLLECTION]))
+        try:
+            await app.unit_cache.load(app.db[UNITS_COLLECTION])
+        except Exception as e:
+            logging.error("Failed to load the unit cache, reads will use the database: %s", e)
+
+    app.tile_cache = TileCache(max_tiles=settings.TILE_CACHE_SIZE, buffer=settings.TILE_BUFFER)
+    app.change_feed.subscribe(app.tile_cache)
+    app.change_feed.on_resync(app.tile_cache.clear)
+
+    app.symbol_cache = SymbolCache(
+        max_entries=settings.SYMBOL_CACHE_SIZE,
+        directory=settings.SYMBOL_CACHE_DIR or None,
+        max_disk_bytes=settings.SYMBOL_CACHE_DIR_MAX_BYTES,
+    )
+
+    app.track_recorder = None
+    if settings.TRACK_HISTORY_ENABLED:
+        try:
+            await ensure_track_collection(
+                app.db, TRACKS_COLLECTION, settings.TRACK_RETENTION_DAYS * 24 * 3600
+            )
+            app.track_recorder = TrackRecorder(
+                app.db[TRACKS_COLLECTION],
+                batch_size=settings.TRACK_BATCH_SIZE,
+                flush_seconds=settings.TRACK_FLUSH_SECONDS,
+            )
+            app.track_recorder.start()
+        except Exception as e:
+            logging.error("Failed to set up track history, positions will not be recorded: %s", e)
 
     yield
     # Shutting down
+    if app.track_recorder is not None:
+        await app.track_recorder.stop()
+    await app.change_feed.stop()
+    app.profiler.stop()
     app.client.close()
 
 
 app = FastAPI(lifespan=lifespan)
+# Creates the Mongo client at startup from the settings and command listeners;
+# replaced to run the app on another client, e.g. mongomock in the benchmarks
+app.client_factory = create_client
+
+# Added first so it runs innermost: the metrics see the compressed sizes
+if settings.GZIP_MINIMUM_SIZE:
+    app.add_middleware(
+        SelectiveGZipMiddleware,
+        minimum_size=settings.GZIP_MINIMUM_SIZE,
+        excluded_paths=settings.GZIP_EXCLUDED_PATHS,
+    )
 
+app.add_middleware(MetricsMiddleware, slow_request_seconds=settings.SLOW_REQUEST_SECONDS)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=settings.CORS_ORIGINS,
+    allow_methods=["GET"],
+    allow_headers=["*"],
+)
+
+# Registered first so /units/stream and /units/clusters are not captured by /units/{id}
+app.include_router(unit_stream_router, prefix="/units", tags=["units"])
+app.include_router(unit_clusters_router, prefix="/units", tags=["units"])
+app.include_router(unit_tiles_router, prefix="/units", tags=["units"])
+app.include_router(unit_tracks_router, prefix="/units", tags=["units"])
 app.include_router(milsymbol_units_router, prefix="/units", tags=["units"])
+app.include_router(symbols_router, prefix="/symbols", tags=["symbols"])
+app.include_router(diagnostics_router, prefix="/debug", tags=["debug"])
 
 
 @app.get("/")
 async def get_root():
     return {"Message": "Root working"}
+
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    units = {"enabled": False}
+    if app.unit_cache is not None:
+        units = {"enabled": True, **app.unit_cache.stats()}
+    return {"units": units, "tiles": app.tile_cache.stats(), "symbols": app.symbol_cache.stats()}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    body, content_type = metrics_response_body()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/db/pool")
+async def get_pool_stats():
+    """
+    Connection pool utilization per MongoDB server.
+    """
+    return {
+        "max_pool_size": settings.MONGO_MAX_POOL_SIZE,
+        "servers": app.pool_metrics.stats(),
+    }
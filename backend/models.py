@@ -1,7 +1,8 @@
 from pydantic_extra_types.coordinate import Latitude, Longitude
 import sqlmodel
+from datetime import datetime, timezone
 from typing import Literal, Optional, Annotated, Dict, List
-from pydantic import BaseModel, Field, ConfigDict, BeforeValidator
+from pydantic import BaseModel, Field, ConfigDict, BeforeValidator, field_validator
 from geojson_pydantic import Feature, Point
 
 
@@ -29,8 +30,22 @@ class UnitUpdate(sqlmodel.SQLModel):
 # ------------------------------------------------------------------------------
 PyObjectId = Annotated[str, BeforeValidator(str)]
 
+class SymbolCodeModel(BaseModel):
+    """ SIDC fields decoded by the backend when a unit is written """
+    standard_identity: Optional[str] = None
+    affiliation: Optional[str] = None
+    symbol_set: Optional[str] = None
+    entity: Optional[str] = None
+    echelon: Optional[str] = None
+    status: Optional[str] = None
+
+
 class UnitFeatureModel(Feature[Point, Dict]):
     id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    # Set from properties.sidc on write; any value sent by the client is replaced
+    symbol: Optional[SymbolCodeModel] = None
+    # Stamped on every write from a global counter; read-only for clients
+    revision: Optional[int] = None
 
     model_config = ConfigDict(
         populate_by_name=True,
@@ -74,3 +89,64 @@ class UpdateUnitFeatureModel(Feature[Point, Dict]):
 class UnitFeatureCollection(BaseModel):
     type: str = Field(default="FeatureCollection")
     features: List[UnitFeatureModel]
+    # Keyset cursor for the next page: pass it back as `?after=` (None on the last page)
+    next: Optional[str] = None
+    # Only with `?since=`: ids deleted after that revision, the revision to pass
+    # as `since` next, and whether more changes are waiting past it
+    deleted: Optional[List[str]] = None
+    revision: Optional[int] = None
+    more: Optional[bool] = None
+
+
+class TrackPointModel(BaseModel):
+    timestamp: datetime
+    coordinates: List[float]
+
+
+class UnitTrackModel(BaseModel):
+    id: str
+    designation: Optional[str] = None
+    start: Optional[datetime] = Field(default=None, serialization_alias="from")
+    end: Optional[datetime] = Field(default=None, serialization_alias="to")
+    points: List[TrackPointModel]
+
+
+class BulkItemStatus(BaseModel):
+    index: int
+    status: Literal["inserted", "invalid", "failed"]
+    id: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class BulkInsertResult(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    items: List[BulkItemStatus] = []
+
+
+class PositionUpdateModel(BaseModel):
+    designation: str
+    lon: Longitude
+    lat: Latitude
+    timestamp: datetime
+    # Only needed to create a unit that does not exist yet
+    sidc: Optional[str] = None
+
+    @field_validator("timestamp")
+    @classmethod
+    def timestamp_as_utc(cls, timestamp: datetime) -> datetime:
+        """ Timestamps without an offset are taken as UTC, so reports always compare """
+        if timestamp.tzinfo is None:
+            return timestamp.replace(tzinfo=timezone.utc)
+        return timestamp.astimezone(timezone.utc)
+
+
+class PositionUpdateResult(BaseModel):
+    received: int
+    applied: int
+    matched: int
+    modified: int
+    upserted: int
+    stale: int = 0
+    not_found: int = 0
+    errors: List[str] = []
@@ -0,0 +1,138 @@
+"""
+Minimal Mapbox Vector Tile (v2.1) encoder for point layers.
+
+Only what the unit layer needs is implemented: a single layer of Point
+features with string attributes, written straight to protobuf bytes.
+"""
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+EXTENT = 4096
+
+# Protobuf wire types
+VARINT = 0
+LENGTH_DELIMITED = 2
+
+GEOM_POINT = 1
+# MoveTo command (id 1) repeated once
+MOVE_TO_ONCE = (1 & 0x7) | (1 << 3)
+
+MAX_MERCATOR_LAT = 85.0511
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 31)
+
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint((field << 3) | wire_type)
+
+
+def _bytes_field(field: int, data: bytes) -> bytes:
+    return _key(field, LENGTH_DELIMITED) + _varint(len(data)) + data
+
+
+def _packed(field: int, values: Iterable[int]) -> bytes:
+    return _bytes_field(field, b"".join(_varint(value) for value in values))
+
+
+def tile_bounds(z: int, x: int, y: int, buffer: float = 0.0) -> Tuple[float, float, float, float]:
+    """
+    (min_lon, min_lat, max_lon, max_lat) of a Web Mercator tile, grown by
+    `buffer` tile units on each side and clamped to the world.
+    """
+    n = 2 ** z
+
+    def lon(tile_x):
+        return max(min(tile_x / n * 360 - 180, 180.0), -180.0)
+
+    def lat(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return lon(x - buffer), lat(y + 1 + buffer), lon(x + 1 + buffer), lat(y - buffer)
+
+
+def world_position(z: int, lon: float, lat: float) -> Tuple[float, float]:
+    """
+    Position of a point in tile units at zoom `z` (the integer part is the tile index).
+    """
+    n = 2 ** z
+    lat = max(min(lat, MAX_MERCATOR_LAT), -MAX_MERCATOR_LAT)
+    lat_rad = math.radians(lat)
+    world_x = (lon + 180) / 360 * n
+    world_y = (1 - math.log(math.tan(lat_rad) + 1 / math.cos(lat_rad)) / math.pi) / 2 * n
+    return world_x, world_y
+
+
+class PointLayer:
+    """
+    Accumulates point features for one tile layer, deduplicating keys and values.
+    """
+
+    def __init__(self, name: str, z: int, x: int, y: int, extent: int = EXTENT):
+        self.name = name
+        self.z, self.x, self.y = z, x, y
+        self.extent = extent
+        self._keys: Dict[str, int] = {}
+        self._values: Dict[str, int] = {}
+        self._features: List[bytes] = []
+
+    def _index(self, table: Dict[str, int], item: str) -> int:
+        if item not in table:
+            table[item] = len(table)
+        return table[item]
+
+    def add(self, lon: float, lat: float, properties: Dict[str, Optional[str]]):
+        world_x, world_y = world_position(self.z, lon, lat)
+        px = round((world_x - self.x) * self.extent)
+        py = round((world_y - self.y) * self.extent)
+
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            tags.append(self._index(self._keys, key))
+            tags.append(self._index(self._values, str(value)))
+
+        feature = (
+            _packed(2, tags)
+            + _key(3, VARINT) + _varint(GEOM_POINT)
+            + _packed(4, [MOVE_TO_ONCE, _zigzag(px), _zigzag(py)])
+        )
+        self._features.append(feature)
+
+    def __len__(self):
+        return len(self._features)
+
+    def encode(self) -> bytes:
+        layer = bytearray()
+        layer += _key(15, VARINT) + _varint(2)
+        layer += _bytes_field(1, self.name.encode())
+        for feature in self._features:
+            layer += _bytes_field(2, feature)
+        for key in self._keys:
+            layer += _bytes_field(3, key.encode())
+        for value in self._values:
+            layer += _bytes_field(4, _bytes_field(1, value.encode()))
+        layer += _key(5, VARINT) + _varint(self.extent)
+        return bytes(layer)
+
+
+def encode_tile(*layers: PointLayer) -> bytes:
+    """
+    Serialize layers into a vector tile; empty layers are left out.
+    """
+    return b"".join(_bytes_field(3, layer.encode()) for layer in layers if len(layer))
@@ -0,0 +1,91 @@
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of all threads at a fixed interval while running.
+
+    Meant to be switched on for a short while in a live process; the result
+    is in the collapsed-stack format read by flamegraph.pl and speedscope,
+    one `thread;outer;...;inner count` line per distinct stack.
+    """
+
+    def __init__(self):
+        self.interval: float = 0.01
+        self.samples: Counter = Counter()
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        # Counts the runs started, so a delayed stop can tell whether its run is still the current one
+        self.run = 0
+        self._stop: Optional[threading.Event] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._stop is not None
+
+    def start(self, interval: float):
+        if self.running:
+            return
+        self.interval = interval
+        # Each run has its own event and counter: a stopped thread still
+        # finishing its last sample cannot touch the next run
+        samples, stop = Counter(), threading.Event()
+        with self._lock:
+            self.samples = samples
+        self.started_at, self.stopped_at = time.time(), None
+        self.run += 1
+        self._stop = stop
+        threading.Thread(
+            target=self._run, args=(interval, stop, samples), name="sampling-profiler", daemon=True
+        ).start()
+
+    def stop(self, run: Optional[int] = None):
+        """
+        Stop sampling; with `run`, only if that run (see `run`) is still the current one.
+
+        Does not wait for the sampling thread, which exits within one
+        interval, so it is safe to call from the event loop.
+        """
+        if not self.running or (run is not None and run != self.run):
+            return
+        self._stop.set()
+        self._stop = None
+        self.stopped_at = time.time()
+
+    def _run(self, interval: float, stop: threading.Event, samples: Counter):
+        own_id = threading.get_ident()
+        while not stop.wait(interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                with self._lock:
+                    samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        with self._lock:
+            stacks = self.samples.most_common()
+        return "\n".join(f"{stack} {count}" for stack, count in stacks)
+
+    def status(self) -> dict:
+        with self._lock:
+            samples, stacks = sum(self.samples.values()), len(self.samples)
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "samples": samples,
+            "stacks": stacks,
+        }
@@ -0,0 +1,192 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from config import COUNTERS_COLLECTION, TOMBSTONES_COLLECTION
+
+
+# Counter document holding the last revision handed out to a unit write
+REVISION_COUNTER = "unit_revision"
+
+# After this long a reservation whose write never finished no longer holds readers back
+PENDING_REVISION_TIMEOUT = timedelta(seconds=60)
+
+# Reads of the counter while a reservation has not recorded where it starts
+UNPLACED_RESERVATION_RETRIES = 3
+UNPLACED_RESERVATION_DELAY = 0.01
+
+
+def as_utc(value: datetime) -> datetime:
+    # Mongo returns naive UTC datetimes unless the client is timezone aware
+    return value.astimezone(timezone.utc) if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+@asynccontextmanager
+async def reserve_revisions(db: AsyncIOMotorDatabase, count: int = 1) -> AsyncIterator[int]:
+    """
+    Reserve `count` consecutive revisions for a write made inside the block, yielding the first one.
+
+    Revisions only ever grow; a reserved block whose write fails simply
+    leaves a gap. The block is recorded as pending on the counter document
+    in the same atomic update that reserves it, and released when the block
+    exits, so readers never report a revision while a lower one may still
+    commit (see `committed_revision`).
+
+    The reservation itself is one round trip however many units the write
+    touches. The pending entry only learns where the block starts from the
+    counter that update returns, so its `first` is filled in by a second one.
+    """
+    counters = db[COUNTERS_COLLECTION]
+    token = ObjectId()
+    counter = await counters.find_one_and_update(
+        {"_id": REVISION_COUNTER},
+        {
+            "$inc": {"value": count},
+            "$push": {"pending": {"token": token, "count": count, "reserved_at": datetime.now(timezone.utc)}},
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    first = counter["value"] - count + 1
+    try:
+        await counters.update_one(
+            {"_id": REVISION_COUNTER, "pending.token": token}, {"$set": {"pending.$.first": first}}
+        )
+        yield first
+    finally:
+        await counters.update_one({"_id": REVISION_COUNTER}, {"$pull": {"pending": {"token": token}}})
+
+
+def committed_revision(counter: dict | None) -> Optional[int]:
+    """
+    The highest revision below every pending reservation of a counter document.
+
+    Every write at or below it has committed or failed, so no change can
+    still appear there. Reservations older than `PENDING_REVISION_TIMEOUT`
+    are taken to belong to a writer that died and are ignored.
+
+    Pending entries are kept in the order they were reserved, so one that has
+    not recorded its `first` yet starts after the entry before it. With no
+    such entry its position is unknown, and None is returned.
+    """
+    if counter is None:
+        return 0
+    cutoff = datetime.now(timezone.utc) - PENDING_REVISION_TIMEOUT
+    committed = counter["value"]
+    after = None
+    for entry in counter.get("pending", []):
+        first = entry.get("first", after + 1 if after is not None else None)
+        if as_utc(entry["reserved_at"]) >= cutoff:
+            if first is None:
+                return None
+            committed = min(committed, first - 1)
+        after = first + entry.get("count", 1) - 1 if first is not None else None
+    return committed
+
+
+async def current_revision(db: AsyncIOMotorDatabase, floor: int = 0) -> int:
+    """
+    The highest committed revision (see `committed_revision`), 0 before the first write.
+
+    A reservation is only unplaced for the round trip between reserving and
+    recording its start, so the counter is read again a few times before
+    settling for `floor`, a revision the caller already knows is committed.
+    Reservations of writers that died are removed here, off the write path.
+    """
+    counters = db[COUNTERS_COLLECTION]
+    for attempt in range(UNPLACED_RESERVATION_RETRIES):
+        if attempt:
+            await asyncio.sleep(UNPLACED_RESERVATION_DELAY)
+        counter = await counters.find_one({"_id": REVISION_COUNTER})
+        cutoff = datetime.now(timezone.utc) - PENDING_REVISION_TIMEOUT
+        if counter and any(as_utc(entry["reserved_at"]) < cutoff for entry in counter.get("pending", [])):
+            await counters.update_one(
+                {"_id": REVISION_COUNTER}, {"$pull": {"pending": {"reserved_at": {"$lt": cutoff}}}}
+            )
+        if (committed := committed_revision(counter)) is not None:
+            return committed
+    return floor
+
+
+async def record_tombstone(db: AsyncIOMotorDatabase, id: ObjectId, revision: int):
+    """
+    Remember a deleted unit so `GET /units?since=` can report it.
+    """
+    await db[TOMBSTONES_COLLECTION].replace_one(
+        {"_id": id},
+        {"_id": id, "revision": revision, "deleted_at": datetime.now(timezone.utc)},
+        upsert=True,
+    )
+
+
+async def ensure_revision_indexes(db: AsyncIOMotorDatabase, units: AsyncIOMotorCollection, retention_seconds: int):
+    """
+    Index `revision` on units and tombstones, and expire old tombstones.
+    """
+    await units.create_index([("revision", ASCENDING)])
+    tombstones = db[TOMBSTONES_COLLECTION]
+    await tombstones.create_index([("revision", ASCENDING)])
+    await tombstones.create_index([("deleted_at", ASCENDING)], expireAfterSeconds=retention_seconds)
+
+
+async def backfill_revisions(db: AsyncIOMotorDatabase, units: AsyncIOMotorCollection, batch_size: int = 1000) -> int:
+    """
+    Give a revision to units stored before writes were versioned.
+    """
+    ids = [document["_id"] async for document in units.find({"revision": {"$exists": False}}, {"_id": 1})]
+    if not ids:
+        return 0
+
+    updated = 0
+    async with reserve_revisions(db, len(ids)) as first:
+        for start in range(0, len(ids), batch_size):
+            operations = [
+                UpdateOne({"_id": id, "revision": {"$exists": False}}, {"$set": {"revision": first + start + offset}})
+                for offset, id in enumerate(ids[start:start + batch_size])
+            ]
+            updated += (await units.bulk_write(operations, ordered=False)).modified_count
+    return updated
+
+
+async def changes_since(
+    db: AsyncIOMotorDatabase,
+    units: AsyncIOMotorCollection,
+    since: int,
+    limit: int,
+) -> Tuple[List[dict], List[ObjectId], int, bool]:
+    """
+    Collect the units written and deleted after revision `since`, oldest first.
+
+    At most `limit` changes are returned. The result is `(documents, deleted_ids,
+    revision, more)`, where `revision` is the high-water mark the client passes
+    as `since` next time and `more` tells whether changes were left out.
+
+    Revisions are reserved before the write lands, so only changes up to the
+    committed revision are returned: a write still in flight is reported by
+    a later call instead of committing below a revision already handed out.
+    """
+    committed = await current_revision(db, floor=since)
+    window = {"revision": {"$gt": since, "$lte": committed}}
+    documents = await units.find(window).sort("revision", 1).limit(limit).to_list(length=limit)
+    tombstones = await (
+        db[TOMBSTONES_COLLECTION]
+        .find(window, {"revision": 1})
+        .sort("revision", 1)
+        .limit(limit)
+        .to_list(length=limit)
+    )
+
+    changes = sorted(documents + tombstones, key=lambda document: document["revision"])
+    more = len(changes) > limit or len(documents) == limit or len(tombstones) == limit
+    changes = changes[:limit]
+
+    revision = changes[-1]["revision"] if more else max(since, committed)
+    if more:
+        # Neither source may be past the revision the page stops at
+        documents = [document for document in documents if document["revision"] <= revision]
+        tombstones = [tombstone for tombstone in tombstones if tombstone["revision"] <= revision]
+
+    return documents, [tombstone["_id"] for tombstone in tombstones], revision, more
@@ -0,0 +1,51 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+from profiler import SamplingProfiler
+
+
+router = APIRouter()
+
+
+def get_profiler(request: Request) -> SamplingProfiler:
+    if not request.app.settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled (PROFILER_ENABLED)")
+    return request.app.profiler
+
+
+@router.get("/profiler", response_description="Sampling profiler status")
+async def profiler_status(request: Request):
+    return get_profiler(request).status()
+
+
+@router.post("/profiler/start", response_description="Start sampling stacks")
+async def start_profiler(
+    request: Request,
+    interval_ms: float = Query(10, ge=1, le=1000),
+    seconds: Optional[float] = Query(None, gt=0, le=3600, description="Stop automatically after this long"),
+):
+    """
+    Start sampling the stacks of every thread of this worker.
+
+    Samples from a previous run are discarded. Fetch them with
+    `/debug/profiler/stacks` (collapsed-stack format for flame graphs).
+    """
+    profiler = get_profiler(request)
+    profiler.start(interval_ms / 1000)
+    if seconds is not None:
+        # Tied to this run, so stopping and restarting in the meantime is not cut short
+        asyncio.get_running_loop().call_later(seconds, profiler.stop, profiler.run)
+    return profiler.status()
+
+
+@router.post("/profiler/stop", response_description="Stop sampling stacks")
+async def stop_profiler(request: Request):
+    profiler = get_profiler(request)
+    profiler.stop()
+    return profiler.status()
+
+
+@router.get("/profiler/stacks", response_class=PlainTextResponse, response_description="Collapsed stacks")
+async def profiler_stacks(request: Request):
+    return PlainTextResponse(get_profiler(request).collapsed())
@@ -1,13 +1,72 @@
-from fastapi import APIRouter, Body, Request, status, HTTPException, Response
-from models import UnitFeatureModel, UpdateUnitFeatureModel, UnitFeatureCollection
+import json
+import re
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+from fastapi import APIRouter, Body, Query, Request, status, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from config import UNITS_COLLECTION
+from geo import geo_filter, parse_bbox, parse_point
+from change_feed import UnitChange
+from encoding import dumps, feature_json, feature_collection_json, feature_changes_json
+from arrow_format import ARROW_MEDIA_TYPE, ARROW_PROJECTION, stream_arrow
+from sidc import symbol_for, with_symbol
+from database import primary
+from instrumentation import phase
+from revisions import as_utc, changes_since, current_revision, record_tombstone, reserve_revisions
+from models import (
+    UnitFeatureModel,
+    UpdateUnitFeatureModel,
+    UnitFeatureCollection,
+    BulkItemStatus,
+    BulkInsertResult,
+    PositionUpdateModel,
+    PositionUpdateResult,
+)
 from bson import ObjectId
-from pymongo import ReturnDocument
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from motor.motor_asyncio import AsyncIOMotorCollection
 
 
 router = APIRouter()
 
 UNITS_PER_PAGE = 10
+MAX_UNITS_PER_PAGE = 1000
+
+# Longest `q` accepted by GET /units
+MAX_SEARCH_LENGTH = 64
+
+# Mongo's error code for a unique index violation
+DUPLICATE_KEY_ERROR = 11000
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+def publish_changes(request: Request, *changes: UnitChange):
+    """
+    Announce this process's writes on the backplane, which hands them to local
+    subscribers (cache, streams) right away and to other workers as needed.
+    """
+    for change in changes:
+        request.app.change_feed.publish(change)
+
+
+def record_positions(request: Request, *documents: dict):
+    """
+    Add the positions of written units to their track history.
+    """
+    if (recorder := request.app.track_recorder) is not None:
+        for document in documents:
+            recorder.record_document(document)
+
+
+def designation_conflict(document: dict) -> HTTPException:
+    """
+    409 for a write whose `uniqueDesignation` another unit already has.
+    """
+    designation = (document.get("properties") or {}).get("uniqueDesignation")
+    return HTTPException(status_code=409, detail=f"A unit with designation {designation!r} already exists")
 
 
 # POST handler(s)
@@ -20,37 +79,364 @@ UNITS_PER_PAGE = 10
 )
 async def add_unit(request: Request, unit: UnitFeatureModel = Body(...)):
     """
-    Create a new unit feature with a generated id.
+    Create a new unit feature with a generated id; 409 if its `uniqueDesignation` is taken.
     """
-    units: AsyncIOMotorCollection = request.app.db["milsym_units_01"]
+    units: AsyncIOMotorCollection = request.app.db[UNITS_COLLECTION]
 
-    document = unit.model_dump(by_alias=True, exclude=["id"])
-    inserted = await units.insert_one(document)
+    document = with_symbol(unit.model_dump(by_alias=True, exclude=["id"]))
+    async with reserve_revisions(request.app.db) as revision:
+        document["revision"] = revision
+        try:
+            inserted = await units.insert_one(document)
+        except DuplicateKeyError:
+            raise designation_conflict(document)
+
+    created = await primary(request.app.db, UNITS_COLLECTION).find_one({"_id": inserted.inserted_id})
+    publish_changes(request, UnitChange(id=str(inserted.inserted_id), document=created))
+    record_positions(request, created)
+    return created
+
+
+async def iter_feature_collection(request: Request) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Yield `(index, feature)` pairs from a GeoJSON FeatureCollection body.
+    """
+    try:
+        body = json.loads(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+
+    if not isinstance(body, dict) or body.get("type") != "FeatureCollection":
+        raise HTTPException(status_code=400, detail="Body must be a GeoJSON FeatureCollection")
+    features = body.get("features")
+    if not isinstance(features, list):
+        raise HTTPException(status_code=400, detail="FeatureCollection has no features list")
+
+    for index, feature in enumerate(features):
+        yield index, feature
+
+
+async def iter_ndjson(request: Request) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Yield `(index, line)` pairs from an NDJSON body as it arrives, one feature per line.
+    """
+    index = 0
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield index, line
+                index += 1
+    if buffer.strip():
+        yield index, buffer
+
+
+def validate_bulk_feature(feature) -> UnitFeatureModel:
+    """
+    Validate one bulk item, given either as raw NDJSON bytes or a parsed object.
+    """
+    if isinstance(feature, bytes):
+        return UnitFeatureModel.model_validate_json(feature)
+    return UnitFeatureModel.model_validate(feature)
 
-    return await units.find_one({"_id": inserted.inserted_id})
+
+async def insert_batch(
+    request: Request,
+    units: AsyncIOMotorCollection,
+    batch: List[Tuple[int, dict]],
+) -> List[BulkItemStatus]:
+    """
+    Insert a batch with one unordered insert_many and report the outcome of each item.
+    """
+    documents = [document for _, document in batch]
+    errors = {}
+    async with reserve_revisions(request.app.db, len(documents)) as first_revision:
+        for offset, document in enumerate(documents):
+            document["revision"] = first_revision + offset
+        try:
+            await units.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            errors = {error["index"]: error.get("errmsg") for error in e.details.get("writeErrors", [])}
+
+    # insert_many assigns the generated _id to each document in place
+    inserted = [document for position, document in enumerate(documents) if position not in errors]
+    publish_changes(request, *(UnitChange(id=str(document["_id"]), document=document) for document in inserted))
+    record_positions(request, *inserted)
+    return [
+        BulkItemStatus(index=index, status="failed", detail=errors[position])
+        if position in errors
+        else BulkItemStatus(index=index, status="inserted", id=str(document["_id"]))
+        for position, (index, document) in enumerate(batch)
+    ]
+
+
+@router.post(
+    "/bulk",
+    response_description="Insert a batch of unit features",
+    response_model=BulkInsertResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "object", "description": "GeoJSON FeatureCollection"}},
+                "application/x-ndjson": {"schema": {"type": "string", "description": "One GeoJSON Feature per line"}},
+            },
+        }
+    },
+)
+async def add_units_bulk(
+    request: Request,
+    batch_size: Optional[int] = Query(None, ge=1, le=100_000),
+):
+    """
+    Insert many unit features in one request.
+
+    The body is either a GeoJSON FeatureCollection (`application/json`) or
+    NDJSON with one Feature per line (`application/x-ndjson`), which is read
+    incrementally. Every feature is validated once, then written with unordered
+    `insert_many` calls of `batch_size` documents (default `BULK_BATCH_SIZE`).
+
+    The response reports the status of each item by its position in the body;
+    invalid or failed items do not stop the rest of the batch.
+    """
+    units: AsyncIOMotorCollection = request.app.db[UNITS_COLLECTION]
+    batch_size = batch_size or request.app.settings.BULK_BATCH_SIZE
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    items = iter_ndjson(request) if content_type in NDJSON_MEDIA_TYPES else iter_feature_collection(request)
+
+    result = BulkInsertResult()
+    batch: List[Tuple[int, dict]] = []
+
+    async def flush():
+        statuses = await insert_batch(request, units, batch)
+        result.items.extend(statuses)
+        batch.clear()
+
+    async for index, feature in items:
+        try:
+            with phase("validation"):
+                unit = validate_bulk_feature(feature)
+        except ValidationError as e:
+            result.items.append(BulkItemStatus(index=index, status="invalid", detail=str(e)))
+            continue
+
+        batch.append((index, with_symbol(unit.model_dump(by_alias=True, exclude=["id"]))))
+        if len(batch) >= batch_size:
+            await flush()
+
+    if batch:
+        await flush()
+
+    result.items.sort(key=lambda item: item.index)
+    result.inserted = sum(item.status == "inserted" for item in result.items)
+    result.failed = len(result.items) - result.inserted
+    return result
+
+
+def parse_after(after: Optional[str]) -> Optional[ObjectId]:
+    """
+    Convert the `after` keyset cursor into an ObjectId, otherwise 400.
+    """
+    if after is None:
+        return None
+    try:
+        return ObjectId(after)
+    except Exception:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {after}")
+
+
+def parse_geo_params(
+    bbox: Optional[str] = None,
+    near: Optional[str] = None,
+    radius: Optional[float] = None,
+) -> dict:
+    """
+    Turn the `bbox`/`near`/`radius` query parameters into a geometry filter, otherwise 400.
+    """
+    if bbox is not None and near is not None:
+        raise HTTPException(status_code=400, detail="Use either bbox or near, not both")
+    if radius is not None and near is None:
+        raise HTTPException(status_code=400, detail="radius requires near")
+
+    try:
+        return geo_filter(
+            bbox=parse_bbox(bbox) if bbox is not None else None,
+            near=parse_point(near) if near is not None else None,
+            radius=radius,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def build_units_filter(
+    after: Optional[ObjectId] = None,
+    geometry: Optional[dict] = None,
+    symbol: Optional[dict] = None,
+    designation: Optional[List[str]] = None,
+    search: Optional[str] = None,
+) -> dict:
+    """
+    Build the Mongo filter shared by the list handlers.
+
+    `symbol` maps decoded SIDC fields to the accepted values, e.g.
+    `{"affiliation": ["hostile"]}`. `search` matches units whose designation
+    or SIDC starts with it.
+    """
+    query = dict(geometry or {})
+    if designation:
+        query["properties.uniqueDesignation"] = designation[0] if len(designation) == 1 else {"$in": designation}
+    if search:
+        # Anchored, case-sensitive prefixes are range scans on the field indexes
+        query["$or"] = [
+            {"properties.uniqueDesignation": {"$regex": f"^{re.escape(search)}"}},
+            {"properties.sidc": {"$regex": f"^{re.escape(search.upper())}"}},
+        ]
+    for field, values in (symbol or {}).items():
+        if values:
+            query[f"symbol.{field}"] = values[0] if len(values) == 1 else {"$in": values}
+    if after is not None:
+        query["_id"] = {"$gt": after}
+    return query
+
+
+async def stream_feature_collection(cursor, limit: Optional[int] = None) -> AsyncIterator[bytes]:
+    """
+    Write a GeoJSON FeatureCollection chunk by chunk as the cursor yields documents.
+
+    Only one document is held in memory at a time. When a `limit` is given and
+    reached, the keyset cursor for the next page is appended as `next`.
+    """
+    yield b'{"type":"FeatureCollection","features":['
+    count = 0
+    last_id = None
+    async for document in cursor:
+        if count:
+            yield b","
+        yield feature_json(document)
+        last_id = document["_id"]
+        count += 1
+    next_cursor = last_id if limit is not None and count == limit else None
+    yield b'],"next":' + dumps(next_cursor) + b"}"
 
 
 # GET handler(s)
 @router.get(
     "/",
-    response_description="List all units, no pagination",
+    response_description="List units, keyset-paginated by _id",
     response_model=UnitFeatureCollection,
     response_model_by_alias=False,
+    responses={200: {"content": {ARROW_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}}}},
 )
-async def list_units(request: Request):
+async def list_units(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_UNITS_PER_PAGE),
+    after: Optional[str] = None,
+    stream: bool = False,
+    bbox: Optional[str] = Query(None, description="minLon,minLat,maxLon,maxLat"),
+    near: Optional[str] = Query(None, description="lon,lat"),
+    radius: Optional[float] = Query(None, gt=0, description="Distance from `near` in meters"),
+    affiliation: Optional[List[str]] = Query(None, description="friend, hostile, neutral or unknown"),
+    symbol_set: Optional[List[str]] = Query(None, description="e.g. land_unit, air, sea_surface"),
+    echelon: Optional[List[str]] = Query(None, description="e.g. company, battalion, brigade"),
+    unit_status: Optional[List[str]] = Query(None, alias="status", description="e.g. present, planned"),
+    since: Optional[int] = Query(None, ge=0, description="Revision already held by the client"),
+    designation: Optional[List[str]] = Query(None, description="uniqueDesignation of the units"),
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=MAX_SEARCH_LENGTH, description="Prefix of the uniqueDesignation or SIDC"
+    ),
+):
     """
-    List all units.
+    List units in `_id` order.
+
+    Pages hold `limit` units (default `UNITS_PER_PAGE`); pass the returned
+    `next` cursor as `after` to fetch the following page.
+
+    With `stream=true` the matching units are written to the response as the
+    cursor produces them, so memory stays flat regardless of collection size.
+    `limit` is optional in this mode; without it the whole collection is sent.
+
+    `bbox` restricts the result to a viewport (`$geoWithin`), `near` and
+    `radius` to a distance around a point (`$nearSphere`). Both are served by
+    the 2dsphere index on `geometry`.
+
+    `affiliation`, `symbol_set`, `echelon` and `status` filter on the SIDC
+    fields decoded at write time, `designation` on `uniqueDesignation`;
+    repeat a parameter to accept several values. `q` searches for units
+    whose `uniqueDesignation` (case-sensitive) or SIDC starts with it.
+
+    Clients sending `Accept: application/vnd.apache.arrow.stream` get a
+    columnar Arrow IPC stream instead of GeoJSON (always streamed). The next
+    page starts after the last `id` when a full `limit` of rows is returned.
+    Its `X-Revision` header is the revision the snapshot is at least as new as.
+
+    With `since` only the changes after that revision are returned, oldest
+    first: written units in `features`, removed ids in `deleted`, and the
+    `revision` to pass as `since` next time. `more` is true when the page
+    (`limit`, default `MAX_UNITS_PER_PAGE`) did not hold every change.
     """
-    units: AsyncIOMotorCollection = request.app.db["milsym_units_01"]
+    units: AsyncIOMotorCollection = request.app.db[UNITS_COLLECTION]
+    cache = request.app.unit_cache
 
-    results = []
+    if since is not None:
+        # A filtered delta could not report units that moved out of the filter
+        if any((after, stream, bbox, near, affiliation, symbol_set, echelon, unit_status, designation, q)):
+            raise HTTPException(status_code=400, detail="`since` can only be combined with `limit`")
+        documents, deleted, revision, more = await changes_since(
+            request.app.db, units, since, limit or MAX_UNITS_PER_PAGE
+        )
+        with phase("serialization"):
+            body = feature_changes_json((feature_json(document) for document in documents), deleted, revision, more)
+        return Response(content=body, media_type="application/json")
 
-    cursor = units.find()
+    query = build_units_filter(
+        after=parse_after(after),
+        geometry=parse_geo_params(bbox, near, radius),
+        symbol={
+            "affiliation": affiliation,
+            "symbol_set": symbol_set,
+            "echelon": echelon,
+            "status": unit_status,
+        },
+        designation=designation,
+        search=q,
+    )
 
-    async for document in cursor:
-        results.append(document)
-    
-    return UnitFeatureCollection(type="FeatureCollection", features=results)
+    if ARROW_MEDIA_TYPE in request.headers.get("accept", ""):
+        # Read before the snapshot: changes racing it are replayed, never missed
+        revision = await current_revision(request.app.db)
+        cursor = units.find(query, ARROW_PROJECTION).sort("_id", 1)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return StreamingResponse(
+            stream_arrow(cursor),
+            media_type=ARROW_MEDIA_TYPE,
+            headers={"X-Revision": str(revision)},
+        )
+
+    # The full picture is served from the in-process cache when it is enabled
+    if stream and not query and limit is None and cache is not None:
+        if (body := cache.feature_collection()) is not None:
+            return Response(content=body, media_type="application/json")
+
+    if stream:
+        cursor = units.find(query).sort("_id", 1)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return StreamingResponse(
+            stream_feature_collection(cursor, limit),
+            media_type="application/json",
+        )
+
+    limit = limit or UNITS_PER_PAGE
+    results = await units.find(query).sort("_id", 1).limit(limit).to_list(length=limit)
+
+    next_cursor = str(results[-1]["_id"]) if len(results) == limit else None
+    with phase("serialization"):
+        body = feature_collection_json((feature_json(document) for document in results), next_cursor)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get(
@@ -63,16 +449,22 @@ async def show_unit(id: str, request: Request):
     """
     Get the record for a specific unit, looked up by `id`.
     """
-    units: AsyncIOMotorCollection = request.app.db["milsym_units_01"]
+    units: AsyncIOMotorCollection = request.app.db[UNITS_COLLECTION]
+    cache = request.app.unit_cache
 
     # try to convert the ID to an ObjectId, otherwise 404:
     try:
         id = ObjectId(id)
     except Exception:
         raise HTTPException(status_code=404, detail=f"Unit {id} not found")
-    
+
+    if cache is not None and (feature := cache.get(str(id))) is not None:
+        return Response(content=feature, media_type="application/json")
+
+    # Not written back to the cache: a read can race a write or delete, and
+    # only the change feed knows which state is newest
     if (unit := await units.find_one({"_id": ObjectId(id)})) is not None:
-        return unit
+        return Response(content=feature_json(unit), media_type="application/json")
     
     raise HTTPException(status_code=404, detail=f"Unit with id: {id} not found")
 
@@ -108,15 +500,26 @@ async def update_unit(
         if v is not None and k != "_id"
     }
 
-    if len(unit) >= 1:
-        units: AsyncIOMotorCollection = request.app.db["milsym_units_01"]
+    units: AsyncIOMotorCollection = request.app.db[UNITS_COLLECTION]
 
-        update_result = await units.find_one_and_update(
-            {"_id": id},
-            {"$set": unit},
-            return_document=ReturnDocument.AFTER,
-        )
+    if "properties" in unit:
+        unit["symbol"] = symbol_for(unit["properties"])
+
+    if len(unit) >= 1:
+        async with reserve_revisions(request.app.db) as revision:
+            unit["revision"] = revision
+            try:
+                update_result = await units.find_one_and_update(
+                    {"_id": id},
+                    {"$set": unit},
+                    return_document=ReturnDocument.AFTER,
+                )
+            except DuplicateKeyError:
+                raise designation_conflict(unit)
         if update_result is not None:
+            publish_changes(request, UnitChange(id=str(id), document=update_result))
+            if "geometry" in unit:
+                record_positions(request, update_result)
             return update_result
         else:
             raise HTTPException(status_code=404, detail=f"Unit {id} not found")
@@ -128,6 +531,145 @@ async def update_unit(
     raise HTTPException(status_code=404, detail=f"Unit {id} not found")
 
 
+@router.patch(
+    "/positions",
+    response_description="Apply a batch of position reports",
+    response_model=PositionUpdateResult,
+)
+async def update_positions(
+    request: Request,
+    positions: List[PositionUpdateModel] = Body(...),
+):
+    """
+    Move units to their latest reported positions, keyed by `uniqueDesignation`.
+
+    Reports for the same designation are coalesced to the newest one, then the
+    moves are applied as a single unordered `bulk_write`. A report older than
+    the one a unit already holds is counted as `stale` and not applied.
+
+    A report for an unknown designation creates the unit when it carries a
+    `sidc` (counted as `upserted`), and is counted as `not_found` otherwise.
+    Units are only created while designations are known to be unique, so a
+    report can never add a second unit with the same designation. Only counts
+    (and the messages of any failed writes) are returned.
+    """
+    latest = {}
+    for position in positions:
+        current = latest.get(position.designation)
+        if current is None or position.timestamp >= current.timestamp:
+            latest[position.designation] = position
+
+    # The history keeps every report, not just the newest per designation
+    if (recorder := request.app.track_recorder) is not None:
+        for position in positions:
+            recorder.record(position.designation, float(position.lon), float(position.lat), position.timestamp)
+
+    result = PositionUpdateResult(
+        received=len(positions), applied=len(latest), matched=0, modified=0, upserted=0
+    )
+    if not latest:
+        return result
+
+    units: AsyncIOMotorCollection = request.app.db[UNITS_COLLECTION]
+    known = {
+        document["properties"]["uniqueDesignation"]: document["properties"].get("timestamp")
+        async for document in units.find(
+            {"properties.uniqueDesignation": {"$in": list(latest)}},
+            {"properties.uniqueDesignation": 1, "properties.timestamp": 1},
+        )
+    }
+    moves, creates = [], []
+    for position in latest.values():
+        if position.designation in known:
+            stored = known[position.designation]
+            if isinstance(stored, datetime) and as_utc(stored) > position.timestamp:
+                result.stale += 1
+            else:
+                moves.append(position)
+        elif position.sidc and request.app.unique_designations:
+            creates.append(position)
+        else:
+            result.not_found += 1
+    if not (moves or creates):
+        return result
+
+    async with reserve_revisions(request.app.db, len(moves) + len(creates)) as first_revision:
+        revisions = {
+            position.designation: first_revision + offset
+            for offset, position in enumerate(moves + creates)
+        }
+        errors = []
+        if creates:
+            documents = [
+                with_symbol({
+                    "type": "Feature",
+                    "geometry": position_geometry(position),
+                    "properties": {
+                        "uniqueDesignation": position.designation,
+                        "sidc": position.sidc,
+                        "timestamp": position.timestamp,
+                    },
+                    "revision": revisions[position.designation],
+                })
+                for position in creates
+            ]
+            try:
+                result.upserted = len((await units.insert_many(documents, ordered=False)).inserted_ids)
+            except BulkWriteError as e:
+                result.upserted = e.details.get("nInserted", 0)
+                for error in e.details.get("writeErrors", []):
+                    if error.get("code") == DUPLICATE_KEY_ERROR:
+                        # Created by a concurrent batch since it was looked up: move it instead
+                        moves.append(creates[error["index"]])
+                    else:
+                        errors.append(error)
+
+        if moves:
+            operations = [
+                UpdateOne(
+                    # A unit that got a newer report meanwhile is left alone
+                    {
+                        "properties.uniqueDesignation": position.designation,
+                        "properties.timestamp": {"$not": {"$gt": position.timestamp}},
+                    },
+                    {"$set": {
+                        "geometry": position_geometry(position),
+                        "properties.timestamp": position.timestamp,
+                        "revision": revisions[position.designation],
+                    }},
+                )
+                for position in moves
+            ]
+            try:
+                write_result = (await units.bulk_write(operations, ordered=False)).bulk_api_result
+            except BulkWriteError as e:
+                # Unordered: the other updates were still applied
+                write_result = e.details
+                errors += write_result.get("writeErrors", [])
+            result.matched = write_result.get("nMatched", 0)
+            result.modified = write_result.get("nModified", 0)
+            result.stale += len(moves) - result.matched - len(write_result.get("writeErrors", []))
+
+    result.errors = [error.get("errmsg") for error in errors]
+
+    # Bulk writes do not return documents. Without a change stream to deliver
+    # them, read the written units back so subscribers stay current.
+    if not request.app.change_feed.watching:
+        cursor = primary(request.app.db, UNITS_COLLECTION).find(
+            {"properties.uniqueDesignation": {"$in": [position.designation for position in moves + creates]}}
+        )
+        publish_changes(request, *[
+            UnitChange(id=str(document["_id"]), document=document)
+            async for document in cursor
+        ])
+
+    return result
+
+
+def position_geometry(position: PositionUpdateModel) -> dict:
+    return {"type": "Point", "coordinates": [float(position.lon), float(position.lat)]}
+
+
 # DELETE handler(s)
 @router.delete(
     "/{id}",
@@ -142,11 +684,16 @@ async def delete_unit(id: str, request: Request):
     except Exception:
         raise HTTPException(status_code=404, detail=f"Unit {id} not found")
     
-    units: AsyncIOMotorCollection = request.app.db["milsym_units_01"]
+    units: AsyncIOMotorCollection = request.app.db[UNITS_COLLECTION]
 
-    delete_result = await units.delete_one({"_id": id})
+    # Reserved before the delete, so readers wait for the tombstone too
+    async with reserve_revisions(request.app.db) as revision:
+        delete_result = await units.delete_one({"_id": id})
+        if delete_result.deleted_count == 1:
+            await record_tombstone(request.app.db, id, revision)
 
-    if delete_result == 1:
+    if delete_result.deleted_count == 1:
+        publish_changes(request, UnitChange(id=str(id)))
         return Response(status_code=status.HTTP_204_NO_CONTENT)
     
     raise HTTPException(status_code=404, detail=f"Unit with {id} not found")
@@ -0,0 +1,111 @@
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from encoding import dumps
+from symbols import SVG_MEDIA_TYPE, SymbolCache, normalize_sidc, render_sprite, render_symbol
+from symbols import sprite_layout, sprite_sidcs, MAX_DESIGNATION_LENGTH
+
+
+router = APIRouter()
+
+# Symbols per sprite atlas
+MAX_SPRITE_SYMBOLS = 2000
+
+SIZE_QUERY = Query(64, ge=8, le=512, description="Pixels across the symbol's frame canvas")
+SIDCS_QUERY = Query(..., description="SIDCs to include; repeated and/or comma-separated")
+
+
+def cached_response(request: Request, content: bytes, media_type: str, digest: str) -> Response:
+    """
+    A response that may be cached for good, or 304 if the client has it already.
+
+    The URL fully determines the content for a given renderer version, which
+    is part of the ETag, so clients revalidate only after `SYMBOL_MAX_AGE_SECONDS`.
+    """
+    etag = f'"{digest[:32]}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={request.app.settings.SYMBOL_MAX_AGE_SECONDS}, immutable",
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+def sprite_request(sidc: List[str]) -> List[str]:
+    sidcs = sprite_sidcs(sidc)
+    if not sidcs:
+        raise HTTPException(status_code=400, detail="No valid SIDC given")
+    if len(sidcs) > MAX_SPRITE_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SPRITE_SYMBOLS} SIDCs per sprite")
+    return sidcs
+
+
+# Registered before /{sidc}.svg, which would otherwise match them
+@router.get(
+    "/sprite.json",
+    response_description="Position of each symbol in the sprite atlas of the same SIDCs and size",
+)
+async def get_sprite_index(request: Request, sidc: List[str] = SIDCS_QUERY, size: int = SIZE_QUERY):
+    """
+    Index of the sprite atlas served by `/symbols/sprite.svg` for the same parameters.
+
+    Each SIDC maps to its `x`, `y`, `width` and `height` in the atlas and the
+    `anchor_x`/`anchor_y` of the frame center within the symbol, in pixels.
+    SIDCs that are not valid are left out.
+    """
+    sidcs = sprite_request(sidc)
+    cache: SymbolCache = request.app.symbol_cache
+    digest = cache.digest("sprite.json", str(size), *sidcs)
+    content = await cache.get(digest, "json", lambda: dumps(sprite_layout(sidcs, size)))
+    return cached_response(request, content, "application/json", digest)
+
+
+@router.get(
+    "/sprite.svg",
+    response_description="SVG sprite atlas of the given SIDCs",
+    response_class=Response,
+    responses={200: {"content": {SVG_MEDIA_TYPE: {}}}},
+)
+async def get_sprite(request: Request, sidc: List[str] = SIDCS_QUERY, size: int = SIZE_QUERY):
+    """
+    All the given symbols in one image, laid out as described by `/symbols/sprite.json`.
+
+    Lets a map draw every unit of a response from a single cached download.
+    """
+    sidcs = sprite_request(sidc)
+    cache: SymbolCache = request.app.symbol_cache
+    digest = cache.digest("sprite.svg", str(size), *sidcs)
+    content = await cache.get(digest, "svg", lambda: render_sprite(sprite_layout(sidcs, size)))
+    return cached_response(request, content, SVG_MEDIA_TYPE, digest)
+
+
+@router.get(
+    "/{sidc}.svg",
+    response_description="SVG of a MIL-STD-2525 symbol",
+    response_class=Response,
+    responses={200: {"content": {SVG_MEDIA_TYPE: {}}}},
+)
+async def get_symbol(
+    sidc: str,
+    request: Request,
+    size: int = SIZE_QUERY,
+    designation: Optional[str] = Query(
+        None, max_length=MAX_DESIGNATION_LENGTH, description="Unique designation drawn beside the frame"
+    ),
+):
+    """
+    Render the symbol of a 2525D (20 digit) or 2525C (15 character) SIDC.
+
+    Draws the affiliation frame for the symbol set, dashed for pending,
+    assumed and planned, with the status and echelon amplifiers. The frame
+    center is at (`size` / 2, `size` * 0.65) pixels.
+    """
+    normalized = normalize_sidc(sidc)
+    if normalized is None:
+        raise HTTPException(status_code=400, detail=f"Invalid SIDC: {sidc}")
+
+    cache: SymbolCache = request.app.symbol_cache
+    digest = cache.digest("symbol", normalized, str(size), designation or "")
+    # Designations are per unit: those renders stay in memory rather than piling up on disk
+    content = await cache.get(digest, "svg", lambda: render_symbol(normalized, size, designation), persist=not designation)
+    return cached_response(request, content, SVG_MEDIA_TYPE, digest)
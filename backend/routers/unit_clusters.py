@@ -0,0 +1,115 @@
+import math
+from typing import List, Optional
+from fastapi import APIRouter, Query, Request, Response
+from config import UNITS_COLLECTION
+from encoding import dumps
+from routers.milsymbol_units import build_units_filter, parse_geo_params
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+
+router = APIRouter()
+
+# Web Mercator is undefined at the poles; latitudes are clamped to its extent
+MAX_MERCATOR_LAT = 85.0511
+
+
+def grid_cell_expressions(zoom: int, cells_per_tile: int) -> dict:
+    """
+    Aggregation expressions for the Web Mercator grid cell of `$lon`/`$lat`.
+
+    The grid has `cells_per_tile` cells across each map tile at `zoom`, so
+    clusters keep the same on-screen size at every zoom level.
+    """
+    cells = (2 ** zoom) * cells_per_tile
+    lat = {"$max": [{"$min": ["$lat", MAX_MERCATOR_LAT]}, -MAX_MERCATOR_LAT]}
+    mercator_y = {
+        "$ln": {"$tan": {"$add": [math.pi / 4, {"$divide": [{"$degreesToRadians": lat}, 2]}]}}
+    }
+    return {
+        "x": {"$floor": {"$multiply": [{"$divide": [{"$add": ["$lon", 180]}, 360]}, cells]}},
+        "y": {
+            "$floor": {
+                "$multiply": [
+                    {"$divide": [{"$subtract": [1, {"$divide": [mercator_y, math.pi]}]}, 2]},
+                    cells,
+                ]
+            }
+        },
+    }
+
+
+def cluster_pipeline(query: dict, zoom: int, cells_per_tile: int) -> List[dict]:
+    """
+    Group units into grid cells with a count per affiliation and a centroid.
+    """
+    cell = grid_cell_expressions(zoom, cells_per_tile)
+    return [
+        {"$match": query},
+        {"$project": {
+            "lon": {"$arrayElemAt": ["$geometry.coordinates", 0]},
+            "lat": {"$arrayElemAt": ["$geometry.coordinates", 1]},
+            "affiliation": {"$ifNull": ["$symbol.affiliation", "unknown"]},
+        }},
+        {"$group": {
+            "_id": {"x": cell["x"], "y": cell["y"], "affiliation": "$affiliation"},
+            "count": {"$sum": 1},
+            "lon": {"$sum": "$lon"},
+            "lat": {"$sum": "$lat"},
+        }},
+        {"$group": {
+            "_id": {"x": "$_id.x", "y": "$_id.y"},
+            "count": {"$sum": "$count"},
+            "lon": {"$sum": "$lon"},
+            "lat": {"$sum": "$lat"},
+            "affiliations": {"$push": {"k": "$_id.affiliation", "v": "$count"}},
+        }},
+        {"$project": {
+            "_id": 0,
+            "count": 1,
+            "lon": {"$divide": ["$lon", "$count"]},
+            "lat": {"$divide": ["$lat", "$count"]},
+            "affiliations": {"$arrayToObject": "$affiliations"},
+        }},
+    ]
+
+
+@router.get(
+    "/clusters",
+    response_description="Unit counts aggregated on a zoom-dependent grid",
+)
+async def list_unit_clusters(
+    request: Request,
+    zoom: int = Query(..., ge=0, le=22),
+    bbox: Optional[str] = Query(None, description="minLon,minLat,maxLon,maxLat"),
+    affiliation: Optional[List[str]] = Query(None),
+    symbol_set: Optional[List[str]] = Query(None),
+    echelon: Optional[List[str]] = Query(None),
+):
+    """
+    Aggregate units into clusters for zoomed-out views.
+
+    Units are grouped on a Web Mercator grid of `CLUSTER_CELLS_PER_TILE` cells
+    per tile at `zoom`. Each cluster is returned as a GeoJSON Point at the
+    centroid of its units, with the unit `count` and a count per affiliation.
+    The response size depends on the viewport and zoom, not on the unit count.
+    """
+    units: AsyncIOMotorCollection = request.app.db[UNITS_COLLECTION]
+
+    query = build_units_filter(
+        geometry=parse_geo_params(bbox=bbox),
+        symbol={"affiliation": affiliation, "symbol_set": symbol_set, "echelon": echelon},
+    )
+    pipeline = cluster_pipeline(query, zoom, request.app.settings.CLUSTER_CELLS_PER_TILE)
+
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [cluster["lon"], cluster["lat"]]},
+            "properties": {"count": cluster["count"], "affiliations": cluster["affiliations"]},
+        }
+        async for cluster in units.aggregate(pipeline)
+    ]
+    return Response(
+        content=dumps({"type": "FeatureCollection", "features": features}),
+        media_type="application/json",
+    )
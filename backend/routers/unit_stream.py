@@ -0,0 +1,148 @@
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from config import UNITS_COLLECTION
+from geo import BBox, geo_filter, parse_bbox
+from change_feed import UnitChange, UnitSubscription, encode_delta
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+
+router = APIRouter()
+
+# Units per message when sending the initial snapshot
+SNAPSHOT_CHUNK_SIZE = 500
+
+
+def parse_stream_bbox(bbox: Optional[str]) -> Optional[BBox]:
+    if bbox is None:
+        return None
+    try:
+        return parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def iter_snapshot(units: AsyncIOMotorCollection, subscription: UnitSubscription):
+    """
+    Yield the units currently inside the subscription's bbox as delta messages.
+    """
+    chunk = []
+    async for document in units.find(geo_filter(bbox=subscription.bbox)):
+        change = UnitChange(id=str(document["_id"]), document=document)
+        subscription.visible.add(change.id)
+        chunk.append(change)
+        if len(chunk) >= SNAPSHOT_CHUNK_SIZE:
+            yield encode_delta(chunk)
+            chunk = []
+    if chunk:
+        yield encode_delta(chunk)
+
+
+@router.websocket("/stream")
+async def stream_units_websocket(
+    websocket: WebSocket,
+    bbox: Optional[str] = None,
+    snapshot: bool = False,
+):
+    """
+    Push unit changes as `delta` messages: `{"type": "delta", "upserts": [...], "deletes": [...]}`.
+
+    Updates are coalesced per unit over `STREAM_COALESCE_SECONDS`. With `bbox`
+    only changes inside that viewport are sent; the client can move its
+    viewport by sending `{"bbox": [minLon, minLat, maxLon, maxLat]}` (or
+    `{"bbox": null}`), optionally with `"snapshot": true` to receive the units
+    already inside it.
+    """
+    app = websocket.app
+    units: AsyncIOMotorCollection = app.db[UNITS_COLLECTION]
+
+    try:
+        subscription = UnitSubscription(bbox=parse_bbox(bbox) if bbox else None)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+
+    await websocket.accept()
+    app.change_feed.subscribe(subscription)
+
+    async def send_changes():
+        if snapshot:
+            async for message in iter_snapshot(units, subscription):
+                await websocket.send_text(message)
+        while True:
+            batch = await subscription.next_batch(app.settings.STREAM_COALESCE_SECONDS)
+            if batch:
+                await websocket.send_text(encode_delta(batch))
+
+    async def receive_viewports():
+        while True:
+            text = await websocket.receive_text()
+            try:
+                message = json.loads(text)
+                new_bbox = message["bbox"]
+                subscription.set_bbox(parse_bbox(",".join(map(str, new_bbox))) if new_bbox else None)
+            except (ValueError, KeyError, TypeError):
+                continue  # not a viewport message
+            if message.get("snapshot"):
+                async for chunk in iter_snapshot(units, subscription):
+                    await websocket.send_text(chunk)
+
+    tasks = [asyncio.create_task(send_changes()), asyncio.create_task(receive_viewports())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if not isinstance(task.exception(), WebSocketDisconnect):
+                task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        app.change_feed.unsubscribe(subscription)
+
+
+@router.get(
+    "/stream",
+    response_description="Server-sent events stream of unit changes",
+)
+async def stream_units_sse(
+    request: Request,
+    bbox: Optional[str] = Query(None, description="minLon,minLat,maxLon,maxLat"),
+    snapshot: bool = False,
+):
+    """
+    Server-sent events fallback for `/units/stream`, for clients without WebSockets.
+
+    Each event carries one `delta` message. The viewport is fixed for the
+    lifetime of the connection; reconnect to change it.
+    """
+    app = request.app
+    units: AsyncIOMotorCollection = app.db[UNITS_COLLECTION]
+    subscription = UnitSubscription(bbox=parse_stream_bbox(bbox))
+    keepalive = app.settings.STREAM_KEEPALIVE_SECONDS
+
+    async def events():
+        app.change_feed.subscribe(subscription)
+        try:
+            if snapshot:
+                async for message in iter_snapshot(units, subscription):
+                    yield f"event: delta\ndata: {message}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    batch = await asyncio.wait_for(
+                        subscription.next_batch(app.settings.STREAM_COALESCE_SECONDS),
+                        timeout=keepalive,
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if batch:
+                    yield f"event: delta\ndata: {encode_delta(batch)}\n\n"
+        finally:
+            app.change_feed.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
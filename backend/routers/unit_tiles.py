@@ -0,0 +1,79 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from config import UNITS_COLLECTION
+from geo import geo_filter
+from mvt import PointLayer, encode_tile, tile_bounds
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+
+router = APIRouter()
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+UNIT_LAYER = "units"
+
+TILE_PROJECTION = {
+    "geometry.coordinates": 1,
+    "properties.sidc": 1,
+    "properties.uniqueDesignation": 1,
+    "symbol.affiliation": 1,
+}
+
+
+@router.get(
+    "/tiles/{z}/{x}/{y}.mvt",
+    response_description="Mapbox Vector Tile of the units in a tile",
+    response_class=Response,
+    responses={200: {"content": {MVT_MEDIA_TYPE: {}}}},
+)
+async def get_unit_tile(z: int, x: int, y: int, request: Request):
+    """
+    Render the units in tile `z/x/y` as a Mapbox Vector Tile.
+
+    The tile has a single `units` layer of points with `id`, `sidc`,
+    `designation` and `affiliation` attributes. Units within `TILE_BUFFER` of
+    the tile edge are included so symbols are not clipped at tile seams.
+    Tiles are cached until a unit in them changes.
+    """
+    if not (0 <= z <= 22 and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=404, detail=f"Tile {z}/{x}/{y} not found")
+
+    key = (z, x, y)
+    cache = request.app.tile_cache
+    if (tile := cache.get(key)) is None:
+        version = cache.begin(key)
+        try:
+            tile, unit_ids = await render_tile(request.app.db[UNITS_COLLECTION], z, x, y, cache.buffer)
+        except Exception:
+            cache.abort(key)
+            raise
+        cache.put(key, version, tile, unit_ids)
+
+    return Response(
+        content=tile,
+        media_type=MVT_MEDIA_TYPE,
+        headers={"Cache-Control": f"public, max-age={request.app.settings.TILE_MAX_AGE_SECONDS}"},
+    )
+
+
+async def render_tile(units: AsyncIOMotorCollection, z: int, x: int, y: int, buffer: float):
+    """
+    Query and encode the units of a tile; returns the tile and the ids it contains.
+    """
+    # Padded in tile units, like the cache's invalidation (TileCache._tiles_covering)
+    bbox = tile_bounds(z, x, y, buffer)
+
+    layer = PointLayer(UNIT_LAYER, z, x, y)
+    unit_ids = set()
+    async for document in units.find(geo_filter(bbox=bbox), TILE_PROJECTION):
+        lon, lat = document["geometry"]["coordinates"][:2]
+        properties = document.get("properties") or {}
+        unit_id = str(document["_id"])
+        layer.add(lon, lat, {
+            "id": unit_id,
+            "sidc": properties.get("sidc"),
+            "designation": properties.get("uniqueDesignation"),
+            "affiliation": (document.get("symbol") or {}).get("affiliation"),
+        })
+        unit_ids.add(unit_id)
+
+    return encode_tile(layer), unit_ids
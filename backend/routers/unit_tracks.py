@@ -0,0 +1,64 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from bson import ObjectId
+from config import UNITS_COLLECTION, TRACKS_COLLECTION
+from models import TrackPointModel, UnitTrackModel
+from revisions import as_utc
+from track_history import downsample_pipeline, track_designation
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+
+router = APIRouter()
+
+
+@router.get(
+    "/{id}/track",
+    response_description="Downsampled position history of a unit",
+    response_model=UnitTrackModel,
+)
+async def show_unit_track(
+    id: str,
+    request: Request,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    max_points: int = Query(500, ge=2, le=10_000),
+):
+    """
+    Get the track of a unit between `from` and `to` (defaults: its first and last report).
+
+    The range is split into `max_points` time buckets and the last report in
+    each is returned, so the response stays bounded however long the range.
+    """
+    units: AsyncIOMotorCollection = request.app.db[UNITS_COLLECTION]
+    tracks: AsyncIOMotorCollection = request.app.db[TRACKS_COLLECTION]
+
+    try:
+        id = ObjectId(id)
+    except Exception:
+        raise HTTPException(status_code=404, detail=f"Unit {id} not found")
+
+    if (unit := await units.find_one({"_id": id}, {"properties.uniqueDesignation": 1})) is None:
+        raise HTTPException(status_code=404, detail=f"Unit {id} not found")
+    designation = track_designation(unit)
+
+    track = UnitTrackModel(id=str(id), designation=designation, points=[])
+
+    # Open-ended ranges start/end at the first/last recorded point
+    if start is None:
+        first = await tracks.find_one({"designation": designation}, sort=[("timestamp", 1)])
+        start = first["timestamp"] if first else None
+    if end is None:
+        last = await tracks.find_one({"designation": designation}, sort=[("timestamp", -1)])
+        end = last["timestamp"] if last else None
+    if start is None or end is None:
+        return track
+    # Query bounds may carry an offset while stored ones are naive UTC
+    start, end = as_utc(start), as_utc(end)
+    if start > end:
+        return track
+
+    track.start, track.end = start, end
+    async for point in tracks.aggregate(downsample_pipeline(designation, start, end, max_points)):
+        track.points.append(TrackPointModel(**point))
+    return track
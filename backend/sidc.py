@@ -0,0 +1,233 @@
+from functools import lru_cache
+from typing import Optional
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+
+# ------------------------------------------------------------------------------
+#  MIL-STD-2525D (numeric, 20 digits) lookup tables
+# ------------------------------------------------------------------------------
+STANDARD_IDENTITIES = {
+    "0": "pending",
+    "1": "unknown",
+    "2": "assumed_friend",
+    "3": "friend",
+    "4": "neutral",
+    "5": "suspect",
+    "6": "hostile",
+}
+
+SYMBOL_SETS = {
+    "01": "air",
+    "02": "air_missile",
+    "05": "space",
+    "06": "space_missile",
+    "10": "land_unit",
+    "11": "land_civilian",
+    "15": "land_equipment",
+    "20": "land_installation",
+    "25": "control_measure",
+    "30": "sea_surface",
+    "35": "sea_subsurface",
+    "36": "mine_warfare",
+    "40": "activity",
+    "45": "atmospheric",
+    "46": "oceanographic",
+    "47": "meteorological_space",
+    "50": "sigint_space",
+    "51": "sigint_air",
+    "52": "sigint_land",
+    "53": "sigint_surface",
+    "54": "sigint_subsurface",
+    "60": "cyberspace",
+}
+
+STATUSES = {
+    "0": "present",
+    "1": "planned",
+    "2": "fully_capable",
+    "3": "damaged",
+    "4": "destroyed",
+    "5": "full_to_capacity",
+}
+
+ECHELONS = {
+    "11": "team",
+    "12": "squad",
+    "13": "section",
+    "14": "platoon",
+    "15": "company",
+    "16": "battalion",
+    "17": "regiment",
+    "18": "brigade",
+    "21": "division",
+    "22": "corps",
+    "23": "army",
+    "24": "army_group",
+    "25": "region",
+    "26": "command",
+}
+
+# ------------------------------------------------------------------------------
+#  Legacy MIL-STD-2525C (15 characters) lookup tables, mapped onto 2525D values
+# ------------------------------------------------------------------------------
+LEGACY_STANDARD_IDENTITIES = {
+    "P": "pending",
+    "U": "unknown",
+    "A": "assumed_friend",
+    "F": "friend",
+    "N": "neutral",
+    "S": "suspect",
+    "H": "hostile",
+    # Exercise amplifications
+    "G": "pending",
+    "W": "unknown",
+    "M": "assumed_friend",
+    "D": "friend",
+    "L": "neutral",
+    "J": "suspect",  # joker
+    "K": "hostile",  # faker
+}
+
+LEGACY_BATTLE_DIMENSIONS = {
+    "P": "space",
+    "A": "air",
+    "S": "sea_surface",
+    "U": "sea_subsurface",
+    "F": "land_unit",  # SOF are land units in 2525D
+}
+
+# Ground symbols are split on the first character of the function ID
+LEGACY_GROUND_FUNCTIONS = {
+    "U": "land_unit",
+    "E": "land_equipment",
+    "I": "land_installation",
+}
+
+LEGACY_STATUSES = {
+    "A": "planned",
+    "P": "present",
+    "C": "fully_capable",
+    "D": "damaged",
+    "X": "destroyed",
+    "F": "full_to_capacity",
+}
+
+LEGACY_ECHELONS = dict(zip("ABCDEFGHIJKLMN", ECHELONS.values()))
+
+# Symbol modifier indicators (position 11) after which position 12 is an echelon
+LEGACY_ECHELON_INDICATORS = set("-ABCDEFG")
+
+# Frame shape shared by each standard identity
+AFFILIATIONS = {
+    "pending": "unknown",
+    "unknown": "unknown",
+    "assumed_friend": "friend",
+    "friend": "friend",
+    "neutral": "neutral",
+    "suspect": "hostile",
+    "hostile": "hostile",
+}
+
+SYMBOL_FIELDS = ("standard_identity", "affiliation", "symbol_set", "entity", "echelon", "status")
+
+
+def _decode_numeric(sidc: str) -> dict:
+    standard_identity = STANDARD_IDENTITIES.get(sidc[3])
+    return {
+        "standard_identity": standard_identity,
+        "affiliation": AFFILIATIONS.get(standard_identity, "unknown"),
+        "symbol_set": SYMBOL_SETS.get(sidc[4:6]),
+        "entity": sidc[10:16],
+        "echelon": ECHELONS.get(sidc[8:10]),
+        "status": STATUSES.get(sidc[6]),
+    }
+
+
+def _decode_legacy(sidc: str) -> dict:
+    standard_identity = LEGACY_STANDARD_IDENTITIES.get(sidc[1])
+    function_id = sidc[4:10]
+
+    symbol_set = None
+    if sidc[0] == "S":
+        if sidc[2] == "G":
+            symbol_set = LEGACY_GROUND_FUNCTIONS.get(function_id[0])
+        else:
+            symbol_set = LEGACY_BATTLE_DIMENSIONS.get(sidc[2])
+
+    echelon = None
+    if sidc[10] in LEGACY_ECHELON_INDICATORS:
+        echelon = LEGACY_ECHELONS.get(sidc[11])
+
+    return {
+        "standard_identity": standard_identity,
+        "affiliation": AFFILIATIONS.get(standard_identity, "unknown"),
+        "symbol_set": symbol_set,
+        "entity": function_id.rstrip("-") or None,
+        "echelon": echelon,
+        "status": LEGACY_STATUSES.get(sidc[3]),
+    }
+
+
+@lru_cache(maxsize=4096)
+def _decode(sidc: str) -> tuple:
+    sidc = sidc.strip().upper()
+    if len(sidc) >= 20 and sidc[:20].isdigit():
+        fields = _decode_numeric(sidc)
+    elif len(sidc) >= 15:
+        fields = _decode_legacy(sidc)
+    else:
+        fields = {"affiliation": "unknown"}
+    return tuple((name, fields.get(name)) for name in SYMBOL_FIELDS)
+
+
+def decode_sidc(sidc: str) -> dict:
+    """
+    Decode a SIDC into standard identity, affiliation, symbol set, entity, echelon and status.
+
+    Accepts 20 digit MIL-STD-2525D codes as well as 15 character 2525C codes
+    (e.g. "SFGPUCIZ--------"), whose values are mapped onto the 2525D names.
+    Results are memoized; unrecognized parts decode to None.
+    """
+    return dict(_decode(sidc))
+
+
+def symbol_for(properties: Optional[dict]) -> Optional[dict]:
+    """
+    Decoded symbol fields for a feature's properties, or None without a SIDC.
+    """
+    sidc = (properties or {}).get("sidc")
+    if not isinstance(sidc, str):
+        return None
+    return decode_sidc(sidc)
+
+
+def with_symbol(document: dict) -> dict:
+    """
+    Store the decoded SIDC on a unit document about to be written.
+    """
+    document["symbol"] = symbol_for(document.get("properties"))
+    return document
+
+
+async def backfill_symbols(collection: AsyncIOMotorCollection, batch_size: int = 1000) -> int:
+    """
+    Decode the SIDC of units stored before symbols were decoded on write.
+    """
+    updated = 0
+    operations = []
+    cursor = collection.find(
+        {"symbol": {"$exists": False}, "properties.sidc": {"$type": "string"}},
+        {"properties.sidc": 1},
+    )
+    async for document in cursor:
+        operations.append(UpdateOne(
+            {"_id": document["_id"]},
+            {"$set": {"symbol": symbol_for(document["properties"])}},
+        ))
+        if len(operations) >= batch_size:
+            updated += (await collection.bulk_write(operations, ordered=False)).modified_count
+            operations = []
+    if operations:
+        updated += (await collection.bulk_write(operations, ordered=False)).modified_count
+    return updated
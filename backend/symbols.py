@@ -0,0 +1,416 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+from sidc import decode_sidc
+
+
+# Bumped whenever the drawing changes, so cached symbols and ETags are replaced
+RENDERER_VERSION = "1"
+
+SVG_MEDIA_TYPE = "image/svg+xml"
+
+# Symbols are drawn on a 200 unit wide canvas, the frame centered on (100, 100);
+# the extra height leaves room for echelon amplifiers above the frame
+CANVAS = 200
+CANVAS_TOP = -30
+CANVAS_HEIGHT = 260
+
+# Characters a SIDC may contain (2525D digits, 2525C letters and dashes)
+SIDC_PATTERN = re.compile(r"^[0-9A-Z*\-]{10,30}$")
+
+# MIL-STD-2525 frame fill colors per affiliation
+FILL_COLORS = {
+    "friend": "#80e0ff",
+    "hostile": "#ff8080",
+    "neutral": "#aaffaa",
+    "unknown": "#ffff80",
+}
+
+# Frame outlines per affiliation: land (and anything not listed), air and
+# space (open at the bottom), subsurface (open at the top) and sea surface.
+# The second value is the top of the frame, where echelons are stacked.
+LAND_FRAMES = {
+    "friend": ("M25,50 L175,50 175,150 25,150 Z", 50),
+    "hostile": ("M100,28 L172,100 100,172 28,100 Z", 28),
+    "neutral": ("M45,45 L155,45 155,155 45,155 Z", 45),
+    "unknown": ("M63,63 C63,20 137,20 137,63 C180,63 180,137 137,137 C137,180 63,180 63,137 C20,137 20,63 63,63 Z", 30),
+}
+AIR_FRAMES = {
+    "friend": ("M25,150 C25,110 45,50 100,50 C155,50 175,110 175,150", 50),
+    "hostile": ("M45,150 L45,70 100,20 155,70 155,150", 20),
+    "neutral": ("M45,150 L45,30 155,30 155,150", 30),
+    "unknown": ("M65,150 C10,150 15,60 65,60 C65,10 135,10 135,60 C185,60 190,150 135,150", 22),
+}
+SUBSURFACE_FRAMES = {
+    "friend": ("M25,50 C25,90 45,150 100,150 C155,150 175,90 175,50", 50),
+    "hostile": ("M45,50 L45,130 100,180 155,130 155,50", 50),
+    "neutral": ("M45,50 L45,170 155,170 155,50", 50),
+    "unknown": ("M65,50 C10,50 15,140 65,140 C65,190 135,190 135,140 C185,140 190,50 135,50", 50),
+}
+SEA_SURFACE_FRAMES = {
+    **LAND_FRAMES,
+    "friend": ("M160,100 A60,60 0 1,1 40,100 A60,60 0 1,1 160,100 Z", 40),
+}
+FRAMES_BY_SYMBOL_SET = {
+    "air": AIR_FRAMES,
+    "air_missile": AIR_FRAMES,
+    "space": AIR_FRAMES,
+    "space_missile": AIR_FRAMES,
+    "sigint_air": AIR_FRAMES,
+    "sigint_space": AIR_FRAMES,
+    "sea_surface": SEA_SURFACE_FRAMES,
+    "sigint_surface": SEA_SURFACE_FRAMES,
+    "sea_subsurface": SUBSURFACE_FRAMES,
+    "sigint_subsurface": SUBSURFACE_FRAMES,
+    "mine_warfare": SUBSURFACE_FRAMES,
+}
+
+# Standard identities and statuses drawn with a dashed frame
+DASHED_IDENTITIES = {"pending", "assumed_friend", "suspect"}
+DASHED_STATUSES = {"planned"}
+
+# Echelon amplifiers: (mark, count) stacked centered above the frame
+ECHELON_MARKS = {
+    "team": ("team", 1),
+    "squad": ("dot", 1),
+    "section": ("dot", 2),
+    "platoon": ("dot", 3),
+    "company": ("bar", 1),
+    "battalion": ("bar", 2),
+    "regiment": ("bar", 3),
+    "brigade": ("cross", 1),
+    "division": ("cross", 2),
+    "corps": ("cross", 3),
+    "army": ("cross", 4),
+    "army_group": ("cross", 5),
+    "region": ("cross", 6),
+    "command": ("plus", 2),
+}
+MARK_WIDTHS = {"team": 30, "dot": 20, "bar": 15, "cross": 25, "plus": 25}
+
+# Designation text (field T) to the right of the frame
+DESIGNATION_FONT_SIZE = 36
+MAX_DESIGNATION_LENGTH = 32
+
+
+def _echelon(echelon: Optional[str], top: float) -> str:
+    if echelon not in ECHELON_MARKS:
+        return ""
+    mark, count = ECHELON_MARKS[echelon]
+    step = MARK_WIDTHS[mark]
+    left = 100 - step * (count - 1) / 2
+    bottom = top - 8
+    elements = []
+    for i in range(count):
+        x = left + step * i
+        if mark == "dot":
+            elements.append(f'<circle cx="{x:g}" cy="{bottom - 8:g}" r="7.5" fill="black"/>')
+        elif mark == "bar":
+            elements.append(f'<path d="M{x:g},{bottom:g} L{x:g},{bottom - 30:g}"/>')
+        elif mark == "cross":
+            elements.append(
+                f'<path d="M{x - 10:g},{bottom:g} L{x + 10:g},{bottom - 25:g} '
+                f'M{x - 10:g},{bottom - 25:g} L{x + 10:g},{bottom:g}"/>'
+            )
+        elif mark == "plus":
+            elements.append(
+                f'<path d="M{x:g},{bottom:g} L{x:g},{bottom - 25:g} '
+                f'M{x - 12.5:g},{bottom - 12.5:g} L{x + 12.5:g},{bottom - 12.5:g}"/>'
+            )
+        else:
+            elements.append(
+                f'<circle cx="{x:g}" cy="{bottom - 12:g}" r="12" fill="none"/>'
+                f'<path d="M{x - 17:g},{bottom + 5:g} L{x + 17:g},{bottom - 29:g}"/>'
+            )
+    return f'<g stroke="black" stroke-width="4">{"".join(elements)}</g>'
+
+
+def _status(status: Optional[str]) -> str:
+    if status == "damaged":
+        return '<path d="M40,160 L160,40" stroke="black" stroke-width="4"/>'
+    if status == "destroyed":
+        return '<path d="M40,160 L160,40 M40,40 L160,160" stroke="black" stroke-width="4"/>'
+    return ""
+
+
+@lru_cache(maxsize=8192)
+def symbol_body(sidc: str) -> str:
+    """
+    The SVG elements of a symbol on the 200 unit canvas: frame, status and echelon.
+
+    Only the frame and its amplifiers are drawn; the entity icons of the
+    standard are not.
+    """
+    symbol = decode_sidc(sidc)
+    affiliation = symbol["affiliation"] or "unknown"
+    path, top = FRAMES_BY_SYMBOL_SET.get(symbol["symbol_set"], LAND_FRAMES)[affiliation]
+    dashed = symbol["standard_identity"] in DASHED_IDENTITIES or symbol["status"] in DASHED_STATUSES
+    dash = ' stroke-dasharray="16,8"' if dashed else ""
+    frame = f'<path d="{path}" fill="{FILL_COLORS[affiliation]}" stroke="black" stroke-width="4"{dash}/>'
+    return frame + _status(symbol["status"]) + _echelon(symbol["echelon"], top)
+
+
+def _designation(designation: str) -> Tuple[str, float]:
+    text = escape(designation[:MAX_DESIGNATION_LENGTH])
+    width = 0.6 * DESIGNATION_FONT_SIZE * len(designation[:MAX_DESIGNATION_LENGTH]) + 15
+    element = (
+        f'<text x="190" y="{100 + DESIGNATION_FONT_SIZE * 0.35:g}" font-family="Arial, sans-serif" '
+        f'font-size="{DESIGNATION_FONT_SIZE}" stroke="white" stroke-width="6" paint-order="stroke">{text}</text>'
+    )
+    return element, width
+
+
+def symbol_dimensions(size: int, designation: Optional[str] = None) -> Dict[str, float]:
+    """
+    Pixel width, height and anchor (the frame center) of a symbol `size` pixels across.
+    """
+    scale = size / CANVAS
+    width = CANVAS + (_designation(designation)[1] if designation else 0)
+    return {
+        "width": round(width * scale, 2),
+        "height": round(CANVAS_HEIGHT * scale, 2),
+        "anchor_x": round(100 * scale, 2),
+        "anchor_y": round((100 - CANVAS_TOP) * scale, 2),
+    }
+
+
+def render_symbol(sidc: str, size: int, designation: Optional[str] = None) -> bytes:
+    """
+    A standalone SVG of a symbol, `size` pixels across the frame canvas.
+    """
+    body = symbol_body(sidc)
+    width = CANVAS
+    if designation:
+        text, text_width = _designation(designation)
+        body += text
+        width += text_width
+    dimensions = symbol_dimensions(size, designation)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{dimensions["width"]:g}" height="{dimensions["height"]:g}" '
+        f'viewBox="0 {CANVAS_TOP} {width:g} {CANVAS_HEIGHT}">{body}</svg>'
+    ).encode()
+
+
+def sprite_layout(sidcs: Iterable[str], size: int) -> dict:
+    """
+    Where each symbol of a sprite atlas is, in pixels; symbols are laid out in SIDC order on a grid.
+    """
+    ordered = sorted(set(sidcs))
+    dimensions = symbol_dimensions(size)
+    columns = max(1, math.ceil(math.sqrt(len(ordered))))
+    rows = math.ceil(len(ordered) / columns)
+    symbols = {}
+    for i, sidc in enumerate(ordered):
+        row, column = divmod(i, columns)
+        symbols[sidc] = {
+            "x": round(column * dimensions["width"], 2),
+            "y": round(row * dimensions["height"], 2),
+            **dimensions,
+        }
+    return {
+        "size": size,
+        "width": round(columns * dimensions["width"], 2),
+        "height": round(rows * dimensions["height"], 2),
+        "symbols": symbols,
+    }
+
+
+def render_sprite(layout: dict) -> bytes:
+    """
+    The sprite atlas SVG for a layout from `sprite_layout`.
+    """
+    cells = [
+        f'<svg x="{cell["x"]:g}" y="{cell["y"]:g}" width="{cell["width"]:g}" height="{cell["height"]:g}" '
+        f'viewBox="0 {CANVAS_TOP} {CANVAS} {CANVAS_HEIGHT}">{symbol_body(sidc)}</svg>'
+        for sidc, cell in layout["symbols"].items()
+    ]
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{layout["width"]:g}" height="{layout["height"]:g}">'
+        f'{"".join(cells)}</svg>'
+    ).encode()
+
+
+def normalize_sidc(sidc: str) -> Optional[str]:
+    """
+    The SIDC in upper case, or None if it is not a plausible SIDC.
+    """
+    sidc = sidc.strip().upper()
+    return sidc if SIDC_PATTERN.match(sidc) else None
+
+
+class SymbolCache:
+    """
+    Rendered symbols and sprites by content hash: an LRU in memory over files on disk.
+
+    Entries are addressed by a hash of what was rendered and the renderer
+    version, which doubles as the ETag. The directory may be shared by the
+    workers of a deployment; files are written atomically. Clients choose
+    what is rendered, so the directory is bounded too: past
+    `max_disk_bytes` the least recently used files are removed, down to
+    `DISK_PRUNE_FRACTION` of it.
+
+    Disk reads and writes run in worker threads, and pruning in a
+    background task, so the event loop never waits on the filesystem.
+    """
+
+    # Share of `max_disk_bytes` left after pruning, so pruning is not repeated on every write
+    DISK_PRUNE_FRACTION = 0.9
+
+    def __init__(self, max_entries: int, directory: Optional[str] = None, max_disk_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # This process's view of the directory size: other workers' writes
+        # are only seen when it is rescanned by `_prune`
+        self.disk_bytes = 0
+        self._pruning: Optional[asyncio.Task] = None
+        if directory:
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError as e:
+                logging.warning("Symbol cache directory unavailable, caching in memory only: %s", e)
+                self.directory = None
+            else:
+                # Once at startup, before requests are served
+                self.disk_bytes = self._prune()
+
+    @staticmethod
+    def digest(*parts: str) -> str:
+        return hashlib.sha256("|".join((RENDERER_VERSION, *parts)).encode()).hexdigest()
+
+    async def get(self, digest: str, extension: str, render: Callable[[], bytes], persist: bool = True) -> bytes:
+        """
+        The cached content for `digest`, rendered (and stored) on a miss.
+
+        With `persist` False the content is only kept in memory, for
+        variants unlikely to be asked for again after a restart.
+        """
+        content = self._entries.get(digest)
+        if content is not None:
+            self.hits += 1
+            self._entries.move_to_end(digest)
+            return content
+
+        content = await asyncio.to_thread(self._read, digest, extension) if persist and self.directory else None
+        if content is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            content = render()
+            if persist and self.directory and await asyncio.to_thread(self._write, digest, extension, content):
+                self.disk_bytes += len(content)
+                if self.disk_bytes > self.max_disk_bytes and self._pruning is None:
+                    self._pruning = asyncio.create_task(self._prune_in_background())
+
+        self._entries[digest] = content
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return content
+
+    async def _prune_in_background(self):
+        try:
+            self.disk_bytes = await asyncio.to_thread(self._prune)
+        except Exception:
+            logging.exception("Failed to prune the symbol cache directory")
+        finally:
+            self._pruning = None
+
+    def _path(self, digest: str, extension: str) -> str:
+        # Two-level fan-out keeps directories small
+        return os.path.join(self.directory, digest[:2], f"{digest}.{extension}")
+
+    def _read(self, digest: str, extension: str) -> Optional[bytes]:
+        path = self._path(digest, extension)
+        try:
+            with open(path, "rb") as file:
+                content = file.read()
+            # The modification time orders files for pruning, least recently used first
+            os.utime(path)
+            return content
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logging.warning("Failed to read cached symbol %s: %s", digest, e)
+            return None
+
+    def _write(self, digest: str, extension: str, content: bytes) -> bool:
+        path = self._path(digest, extension)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temporary, "wb") as file:
+                file.write(content)
+            os.replace(temporary, path)
+        except OSError as e:
+            logging.warning("Failed to store cached symbol %s: %s", digest, e)
+            return False
+        return True
+
+    def _prune(self) -> int:
+        """
+        Measure the directory and remove the least recently used files while it
+        is over budget. Returns the bytes left; blocking, run it in a thread.
+        """
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".tmp"):  # being written by a worker
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:  # removed by another worker meanwhile
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        if total > self.max_disk_bytes:
+            target = self.max_disk_bytes * self.DISK_PRUNE_FRACTION
+            removed = 0
+            for _, size, path in sorted(files):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logging.warning("Failed to remove cached symbol %s: %s", path, e)
+                    continue
+                total -= size
+                removed += 1
+            logging.info("Pruned %d cached symbols, %d bytes left on disk", removed, total)
+        return total
+
+    def stats(self) -> dict:
+        return {
+            "symbols": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "directory": self.directory,
+            "disk_bytes": self.disk_bytes,
+        }
+
+
+def sprite_sidcs(values: List[str]) -> List[str]:
+    """
+    SIDCs from repeated and/or comma-separated query values, normalized; invalid ones are dropped.
+    """
+    sidcs = set()
+    for value in values:
+        for part in value.split(","):
+            if part and (sidc := normalize_sidc(part)) is not None:
+                sidcs.add(sidc)
+    return sorted(sidcs)
@@ -0,0 +1,59 @@
+import asyncio
+from contextlib import asynccontextmanager
+import backplane
+from backplane import ChangeStreamBackplane
+
+
+class FailingStream:
+    """ Delivers its events, then fails like a stream whose history was lost """
+
+    def __init__(self, events, error=None):
+        self.events = events
+        self.error = error
+        self.resume_token = None
+
+    async def __aiter__(self):
+        for event in self.events:
+            self.resume_token = {"_data": event["documentKey"]["_id"]}
+            yield event
+        if self.error is not None:
+            raise self.error
+        await asyncio.Event().wait()
+
+
+class FakeCollection:
+    name = "units"
+
+    def __init__(self, *streams):
+        self.streams = list(streams)
+        self.resume_tokens = []
+
+    @asynccontextmanager
+    async def watch(self, pipeline, full_document=None, resume_after=None):
+        self.resume_tokens.append(resume_after)
+        yield self.streams.pop(0)
+
+
+def test_lost_stream_is_reopened_without_its_token_and_resynced(monkeypatch):
+    monkeypatch.setattr(backplane, "FIRST_RETRY_DELAY", 0)
+
+    async def scenario():
+        event = {"operationType": "delete", "documentKey": {"_id": "a"}}
+        collection = FakeCollection(FailingStream([event], RuntimeError("history lost")), FailingStream([]))
+        delivered, resyncs = [], []
+
+        async def resync():
+            resyncs.append(len(delivered))
+
+        plane = ChangeStreamBackplane(collection)
+        await plane.start(delivered.append, resync)
+        for _ in range(10):
+            await asyncio.sleep(0)
+        await plane.stop()
+
+        assert [change.id for change in delivered] == ["a"]
+        assert collection.resume_tokens == [None, None]
+        # Only after the reopened stream, not on the first start
+        assert resyncs == [1]
+
+    asyncio.run(scenario())
@@ -0,0 +1,47 @@
+import pytest
+from geo import MAX_POLYGON_LAT, MAX_POLYGON_SPAN, PARALLEL_STEP, bbox_contains, bbox_geometry, parse_bbox
+
+
+def rings(geometry):
+    assert geometry["type"] == "MultiPolygon"
+    return [polygon[0] for polygon in geometry["coordinates"]]
+
+
+def test_bbox_polygon_follows_the_parallels():
+    ring, = rings(bbox_geometry((0.0, 40.0, 10.0, 50.0)))
+    assert ring[0] == ring[-1]
+    south = [point for point in ring if point[1] == 40.0]
+    north = [point for point in ring if point[1] == 50.0]
+    assert len(south) + len(north) == len(ring)
+    for edge in (south, north):
+        longitudes = sorted(lon for lon, _ in edge)
+        assert longitudes[0] == 0.0 and longitudes[-1] == 10.0
+        assert max(b - a for a, b in zip(longitudes, longitudes[1:])) <= PARALLEL_STEP
+
+
+def test_wide_bbox_is_split_into_narrow_polygons():
+    polygons = rings(bbox_geometry((-180.0, -10.0, 180.0, 10.0)))
+    assert len(polygons) == 4
+    for ring in polygons:
+        longitudes = [lon for lon, _ in ring]
+        assert max(longitudes) - min(longitudes) <= MAX_POLYGON_SPAN
+
+
+def test_antimeridian_bbox_covers_both_sides():
+    polygons = rings(bbox_geometry((170.0, 0.0, -170.0, 5.0)))
+    spans = sorted((min(lon for lon, _ in ring), max(lon for lon, _ in ring)) for ring in polygons)
+    assert spans == [(-180.0, -170.0), (170.0, 180.0)]
+    assert bbox_contains((170.0, 0.0, -170.0, 5.0), 179.5, 1.0)
+    assert bbox_contains((170.0, 0.0, -170.0, 5.0), -175.0, 1.0)
+    assert not bbox_contains((170.0, 0.0, -170.0, 5.0), 0.0, 1.0)
+
+
+def test_polar_bbox_stays_off_the_poles():
+    ring, = rings(bbox_geometry((0.0, 80.0, 10.0, 90.0)))
+    assert max(lat for _, lat in ring) == MAX_POLYGON_LAT
+
+
+@pytest.mark.parametrize("value", ["1,2,3", "0,10,0,20", "0,20,10,10", "0,0,190,10", "a,b,c,d"])
+def test_invalid_bbox_is_rejected(value):
+    with pytest.raises(ValueError):
+        parse_bbox(value)
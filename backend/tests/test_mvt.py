@@ -0,0 +1,68 @@
+from mvt import EXTENT, PointLayer, encode_tile, tile_bounds
+
+
+def read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, offset
+
+
+def read_fields(data):
+    """ (field, value) pairs of a protobuf message: ints for varints, bytes for length-delimited fields """
+    offset, fields = 0, []
+    while offset < len(data):
+        key, offset = read_varint(data, offset)
+        if key & 0x7 == 0:
+            value, offset = read_varint(data, offset)
+        else:
+            length, offset = read_varint(data, offset)
+            value, offset = data[offset:offset + length], offset + length
+        fields.append((key >> 3, value))
+    return fields
+
+
+def read_packed(data):
+    values, offset = [], 0
+    while offset < len(data):
+        value, offset = read_varint(data, offset)
+        values.append(value)
+    return values
+
+
+def unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def test_encodes_points_with_deduplicated_tags():
+    z, x, y = 10, 550, 335
+    min_lon, min_lat, max_lon, max_lat = tile_bounds(z, x, y)
+    layer = PointLayer("units", z, x, y)
+    layer.add(min_lon, max_lat, {"id": "a", "affiliation": "friend", "designation": None})
+    layer.add(max_lon, min_lat, {"id": "b", "affiliation": "friend"})
+
+    (field, encoded_layer), = read_fields(encode_tile(layer))
+    assert field == 3
+    fields = read_fields(encoded_layer)
+    assert dict(fields)[15] == 2
+    assert dict(fields)[1] == b"units"
+    assert dict(fields)[5] == EXTENT
+    keys = [value.decode() for field, value in fields if field == 3]
+    values = [read_fields(value)[0][1].decode() for field, value in fields if field == 4]
+    assert keys == ["id", "affiliation"]
+    assert values == ["a", "friend", "b"]
+
+    features = [dict(read_fields(value)) for field, value in fields if field == 2]
+    assert [read_packed(feature[2]) for feature in features] == [[0, 0, 1, 1], [0, 2, 1, 1]]
+    assert all(feature[3] == 1 for feature in features)
+    # Tile corners land on the extent's corners
+    positions = [[unzigzag(value) for value in read_packed(feature[4])[1:]] for feature in features]
+    assert positions == [[0, 0], [EXTENT, EXTENT]]
+
+
+def test_empty_layers_are_left_out():
+    assert encode_tile(PointLayer("units", 0, 0, 0)) == b""
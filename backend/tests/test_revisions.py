@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime, timezone
+import pytest
+from config import COUNTERS_COLLECTION, UNITS_COLLECTION
+from revisions import REVISION_COUNTER, changes_since, committed_revision, current_revision, reserve_revisions
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+def test_slow_writer_is_not_skipped():
+    """
+    A write that reserved its revision first but commits last is still delivered.
+    """
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient()["test"]
+        units = db[UNITS_COLLECTION]
+
+        async with reserve_revisions(db) as slow:
+            async with reserve_revisions(db) as fast:
+                await units.insert_one({"_id": "fast", "revision": fast})
+            assert fast > slow
+
+            # The fast write committed, but the slow one may still land below it
+            documents, _, revision, _ = await changes_since(db, units, 0, 100)
+            assert documents == []
+            assert revision < slow
+            assert await current_revision(db) < slow
+
+            await units.insert_one({"_id": "slow", "revision": slow})
+
+        documents, _, revision, more = await changes_since(db, units, revision, 100)
+        assert [document["_id"] for document in documents] == ["slow", "fast"]
+        assert revision == fast and not more
+
+    asyncio.run(scenario())
+
+
+def test_failed_writer_releases_its_reservation():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient()["test"]
+        with pytest.raises(RuntimeError):
+            async with reserve_revisions(db, 3):
+                raise RuntimeError("write failed")
+        assert await current_revision(db) == 3
+
+    asyncio.run(scenario())
+
+
+def test_unplaced_reservation_holds_readers():
+    """
+    A reservation that has not recorded its first revision yet is never reported as committed.
+    """
+    now = datetime.now(timezone.utc)
+    placed = {"token": 1, "count": 2, "first": 4, "reserved_at": now}
+    unplaced = {"token": 2, "count": 3, "reserved_at": now}
+
+    # Reserved after a placed entry: it starts right after that block
+    assert committed_revision({"value": 8, "pending": [placed, unplaced]}) == 3
+    # An expired entry no longer holds readers, but still places the next one
+    expired = dict(placed, reserved_at=datetime(2000, 1, 1, tzinfo=timezone.utc))
+    assert committed_revision({"value": 8, "pending": [expired, unplaced]}) == 5
+    # Nothing to place it after
+    assert committed_revision({"value": 8, "pending": [unplaced]}) is None
+
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient()["test"]
+        await db[COUNTERS_COLLECTION].insert_one({"_id": REVISION_COUNTER, "value": 8, "pending": [unplaced]})
+        assert await current_revision(db, floor=2) == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,45 @@
+from sidc import decode_sidc, symbol_for, with_symbol
+
+
+def test_decodes_2525d():
+    assert decode_sidc("10031000161211000000") == {
+        "standard_identity": "friend",
+        "affiliation": "friend",
+        "symbol_set": "land_unit",
+        "entity": "121100",
+        "echelon": "battalion",
+        "status": "present",
+    }
+    assert decode_sidc("10061000001101000000")["affiliation"] == "hostile"
+
+
+def test_decodes_2525c_onto_2525d_names():
+    assert decode_sidc("SFGPUCI----D---") == {
+        "standard_identity": "friend",
+        "affiliation": "friend",
+        "symbol_set": "land_unit",
+        "entity": "UCI",
+        "echelon": "platoon",
+        "status": "present",
+    }
+    # Case and padding do not matter
+    hostile = decode_sidc(" shgpucaa--****x ")
+    assert (hostile["affiliation"], hostile["entity"], hostile["echelon"]) == ("hostile", "UCAA", None)
+    assert decode_sidc("SNAPMF---------")["symbol_set"] == "air"
+
+
+def test_unrecognized_sidc_decodes_to_unknown():
+    assert decode_sidc("XYZ") == {
+        "standard_identity": None,
+        "affiliation": "unknown",
+        "symbol_set": None,
+        "entity": None,
+        "echelon": None,
+        "status": None,
+    }
+
+
+def test_with_symbol_follows_the_sidc_property():
+    assert with_symbol({"properties": {"sidc": "SFGPUCI----D---"}})["symbol"]["echelon"] == "platoon"
+    assert with_symbol({"properties": {}, "symbol": {"affiliation": "friend"}})["symbol"] is None
+    assert symbol_for(None) is None
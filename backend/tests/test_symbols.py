@@ -0,0 +1,30 @@
+import asyncio
+import os
+from symbols import SymbolCache
+
+
+def directory_size(directory):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+
+
+def test_disk_cache_is_shared_and_pruned(tmp_path):
+    async def scenario():
+        cache = SymbolCache(max_entries=2, directory=str(tmp_path), max_disk_bytes=1000)
+        for index in range(20):
+            await cache.get(cache.digest(str(index)), "svg", lambda: b"x" * 100)
+            await asyncio.sleep(0.01)
+        if cache._pruning is not None:
+            await cache._pruning
+        assert directory_size(tmp_path) <= 1000
+        assert cache.misses == 20
+
+        # Another worker sharing the directory reads the recent renders instead of rendering
+        other = SymbolCache(max_entries=2, directory=str(tmp_path), max_disk_bytes=1000)
+        content = await other.get(cache.digest("19"), "svg", lambda: b"rendered again")
+        assert content == b"x" * 100 and other.disk_hits == 1
+
+        # Not persisted: only this process keeps it
+        await cache.get(cache.digest("private"), "svg", lambda: b"y", persist=False)
+        assert await other.get(cache.digest("private"), "svg", lambda: b"z") == b"z"
+
+    asyncio.run(scenario())
@@ -0,0 +1,51 @@
+import math
+from change_feed import UnitChange
+from mvt import tile_bounds, world_position
+from tile_cache import TileCache
+
+
+def draws(key, buffer, lon, lat):
+    """ Whether the render query of tile `key` (see routers.unit_tiles.render_tile) includes the point """
+    min_lon, min_lat, max_lon, max_lat = tile_bounds(*key, buffer)
+    return min_lon <= lon <= max_lon and min_lat <= lat <= max_lat
+
+
+def test_move_near_tile_edge_invalidates_every_tile_drawing_it():
+    """
+    A unit moved into the buffer of neighbouring tiles drops all of them, also far from the equator.
+    """
+    buffer = 0.06
+    for zoom, lon, lat in [(8, 13.4, 60.0), (12, -70.2, -54.8), (3, 0.0, 0.0)]:
+        cache = TileCache(max_tiles=100, buffer=buffer)
+        world_x, world_y = world_position(zoom, lon, lat)
+        # Near the bottom right corner of its tile: inside the buffer of the three tiles across it
+        n = 2 ** zoom
+        target_lon = (int(world_x) + 1 - buffer * 0.9) / n * 360 - 180
+        target_y = int(world_y) + 1 - buffer * 0.9
+        target_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * target_y / n))))
+
+        neighbours = [
+            (zoom, int(world_x) + dx, int(world_y) + dy)
+            for dx in (-1, 0, 1, 2) for dy in (-1, 0, 1, 2)
+        ]
+        for key in neighbours:
+            cache.put(key, cache.begin(key), b"tile", set())
+
+        drawing = {key for key in neighbours if draws(key, buffer, target_lon, target_lat)}
+        assert len(drawing) == 4
+
+        cache.apply(UnitChange(id="moved", document={
+            "_id": "moved", "geometry": {"type": "Point", "coordinates": [target_lon, target_lat]},
+        }))
+        assert all(cache.get(key) is None for key in drawing)
+
+
+def test_move_invalidates_the_tiles_a_unit_was_drawn_in():
+    cache = TileCache(max_tiles=10, buffer=0.06)
+    key = (10, 550, 335)
+    cache.put(key, cache.begin(key), b"tile", {"moved"})
+
+    cache.apply(UnitChange(id="moved", document={
+        "_id": "moved", "geometry": {"type": "Point", "coordinates": [-120.0, -40.0]},
+    }))
+    assert cache.get(key) is None
@@ -0,0 +1,99 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+import pytest
+
+httpx = pytest.importorskip("httpx")
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+os.environ.setdefault("DB_URL", "mongodb://test")
+os.environ.setdefault("DB_NAME", "test")
+import main  # noqa: E402
+
+
+@asynccontextmanager
+async def api_client(monkeypatch):
+    """ The app started through its lifespan on mongomock, minus change streams and track history """
+    monkeypatch.setattr(main, "settings", main.settings.model_copy(update={
+        "BACKPLANE": "memory",
+        "TRACK_HISTORY_ENABLED": False,
+        "SYMBOL_CACHE_DIR": "",
+    }))
+    app = main.app
+    monkeypatch.setattr(app, "client_factory", lambda settings, *listeners: mongomock_motor.AsyncMongoMockClient())
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+
+
+def feature(designation, lon=13.4, lat=52.5, sidc="10031000161211000000"):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lon, lat]},
+        "properties": {"sidc": sidc, "uniqueDesignation": designation},
+    }
+
+
+def report(designation, timestamp, lon=13.4, lat=52.5, **fields):
+    return {"designation": designation, "lon": lon, "lat": lat, "timestamp": timestamp, **fields}
+
+
+def test_bulk_reports_each_item(monkeypatch):
+    async def scenario():
+        async with api_client(monkeypatch) as client:
+            body = {"type": "FeatureCollection", "features": [
+                feature("A"),
+                {"type": "Feature", "geometry": {"type": "Point", "coordinates": [13.4]}},
+                feature("B"),
+                feature("A"),
+            ]}
+            response = await client.post("/units/bulk", json=body)
+            assert response.status_code == 200
+            result = response.json()
+            assert [item["status"] for item in result["items"]] == ["inserted", "invalid", "inserted", "failed"]
+            assert [item["index"] for item in result["items"]] == [0, 1, 2, 3]
+            assert (result["inserted"], result["failed"]) == (2, 2)
+
+            units = (await client.get("/units/", params={"limit": 10})).json()["features"]
+            assert sorted(unit["properties"]["uniqueDesignation"] for unit in units) == ["A", "B"]
+
+    asyncio.run(scenario())
+
+
+def test_positions_move_known_units_only(monkeypatch):
+    async def scenario():
+        async with api_client(monkeypatch) as client:
+            await client.post("/units/bulk", json={"type": "FeatureCollection", "features": [feature("A")]})
+
+            response = await client.patch("/units/positions", json=[
+                report("A", "2026-01-01T00:00:05Z", lon=1.0),
+                report("A", "2026-01-01T00:00:06Z", lon=2.0),
+                report("ghost", "2026-01-01T00:00:06Z"),
+            ])
+            result = response.json()
+            assert (result["received"], result["applied"], result["modified"]) == (3, 2, 1)
+            assert (result["not_found"], result["upserted"], result["stale"]) == (1, 0, 0)
+
+            # Older than what the unit holds
+            result = (await client.patch("/units/positions", json=[report("A", "2026-01-01T00:00:01Z", lon=9.0)])).json()
+            assert (result["stale"], result["modified"]) == (1, 0)
+
+            unit, = (await client.get("/units/", params={"designation": "A"})).json()["features"]
+            assert unit["geometry"]["coordinates"] == [2.0, 52.5]
+
+    asyncio.run(scenario())
+
+
+def test_position_with_sidc_creates_a_complete_unit(monkeypatch):
+    async def scenario():
+        async with api_client(monkeypatch) as client:
+            response = await client.patch("/units/positions", json=[
+                report("new", "2026-01-01T00:00:00Z", sidc="10031000161211000000"),
+            ])
+            assert response.json()["upserted"] == 1
+
+            unit, = (await client.get("/units/", params={"designation": "new"})).json()["features"]
+            assert unit["properties"]["sidc"] == "10031000161211000000"
+            assert unit["symbol"]["echelon"] == "battalion"
+
+    asyncio.run(scenario())
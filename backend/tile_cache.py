@@ -0,0 +1,143 @@
+import math
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+from change_feed import UnitChange
+from mvt import world_position
+
+
+TileKey = Tuple[int, int, int]
+
+
+class TileCache:
+    """
+    LRU cache of encoded vector tiles, invalidated per tile as units change.
+
+    Each cached tile remembers which units it contains. A change to a unit
+    drops the tiles it was drawn in and the tiles covering its new position,
+    so moving units only cost a re-render of the tiles they touch.
+    """
+
+    def __init__(self, max_tiles: int, buffer: float):
+        self.max_tiles = max_tiles
+        # Fraction of a tile around it whose units are drawn in it too
+        self.buffer = buffer
+        self._tiles: "OrderedDict[TileKey, bytes]" = OrderedDict()
+        self._tile_units: Dict[TileKey, Set[str]] = {}
+        self._unit_tiles: Dict[str, Set[TileKey]] = {}
+        # In-flight renders per tile, and a version bumped when one is invalidated
+        self._rendering: Dict[TileKey, int] = {}
+        self._versions: Dict[TileKey, int] = {}
+        # Cached or rendering tiles per zoom level, to find tiles covering a point
+        self._zooms: Dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: TileKey) -> Optional[bytes]:
+        tile = self._tiles.get(key)
+        if tile is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._tiles.move_to_end(key)
+        return tile
+
+    def begin(self, key: TileKey) -> int:
+        """
+        Mark `key` as being rendered. Returns the version to hand back to `put`,
+        so a tile invalidated while it renders is not cached stale.
+        """
+        self._rendering[key] = self._rendering.get(key, 0) + 1
+        self._add_zoom(key[0])
+        return self._versions.get(key, 0)
+
+    def put(self, key: TileKey, version: int, tile: bytes, unit_ids: Set[str]):
+        valid = self._versions.get(key, 0) == version
+        self._end(key)
+        if not valid:
+            return
+
+        self._discard(key)
+        self._add_zoom(key[0])
+        self._tiles[key] = tile
+        self._tile_units[key] = unit_ids
+        for unit_id in unit_ids:
+            self._unit_tiles.setdefault(unit_id, set()).add(key)
+
+        while len(self._tiles) > self.max_tiles:
+            self._discard(next(iter(self._tiles)))
+
+    def abort(self, key: TileKey):
+        """
+        Forget a render started with `begin` that did not complete.
+        """
+        self._end(key)
+
+    def _end(self, key: TileKey):
+        remaining = self._rendering[key] - 1
+        if remaining:
+            self._rendering[key] = remaining
+        else:
+            del self._rendering[key]
+            self._versions.pop(key, None)
+        self._release_zoom(key[0])
+
+    def _add_zoom(self, zoom: int):
+        self._zooms[zoom] = self._zooms.get(zoom, 0) + 1
+
+    def _release_zoom(self, zoom: int):
+        self._zooms[zoom] -= 1
+        if not self._zooms[zoom]:
+            del self._zooms[zoom]
+
+    def _discard(self, key: TileKey):
+        if self._tiles.pop(key, None) is None:
+            return
+        self._release_zoom(key[0])
+        for unit_id in self._tile_units.pop(key, ()):
+            tiles = self._unit_tiles.get(unit_id)
+            if tiles is not None:
+                tiles.discard(key)
+                if not tiles:
+                    del self._unit_tiles[unit_id]
+
+    def _invalidate(self, key: TileKey):
+        self._discard(key)
+        if key in self._rendering:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def _tiles_covering(self, lon: float, lat: float):
+        """
+        Cached or rendering tiles whose buffered area contains the point.
+
+        Tile `x` spans `[x - buffer, x + 1 + buffer]` in tile units, edges
+        included, the same area `tile_bounds` gives the render query.
+        """
+        for zoom in list(self._zooms):
+            world_x, world_y = world_position(zoom, lon, lat)
+            for x in range(math.ceil(world_x - self.buffer) - 1, math.floor(world_x + self.buffer) + 1):
+                for y in range(math.ceil(world_y - self.buffer) - 1, math.floor(world_y + self.buffer) + 1):
+                    yield zoom, x % (2 ** zoom), y
+
+    def apply(self, change: UnitChange):
+        """
+        Invalidate the tiles affected by a change; subscribed to the change feed.
+        """
+        for key in list(self._unit_tiles.get(change.id, ())):
+            self._invalidate(key)
+        if change.coordinates:
+            for key in list(self._tiles_covering(change.coordinates[0], change.coordinates[1])):
+                self._invalidate(key)
+
+    __call__ = apply
+
+    def clear(self):
+        """
+        Drop every tile, including ones still rendering.
+        """
+        for key in list(self._tiles):
+            self._discard(key)
+        for key in self._rendering:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def stats(self) -> dict:
+        return {"tiles": len(self._tiles), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ASCENDING
+
+
+async def ensure_track_collection(db: AsyncIOMotorDatabase, name: str, retention_seconds: Optional[int]):
+    """
+    Create the time-series collection holding track points, bucketed by designation.
+    """
+    if name not in await db.list_collection_names(filter={"name": name}):
+        options = {}
+        if retention_seconds:
+            options["expireAfterSeconds"] = retention_seconds
+        await db.create_collection(
+            name,
+            timeseries={"timeField": "timestamp", "metaField": "designation", "granularity": "seconds"},
+            **options,
+        )
+    await db[name].create_index([("designation", ASCENDING), ("timestamp", ASCENDING)])
+
+
+def track_designation(document: dict) -> Optional[str]:
+    """
+    Key of a unit's track: its designation, or its id for units without one.
+    """
+    designation = (document.get("properties") or {}).get("uniqueDesignation")
+    if isinstance(designation, str):
+        return designation
+    return str(document["_id"]) if "_id" in document else None
+
+
+class TrackRecorder:
+    """
+    Buffers position reports and writes them to the track collection in batches.
+
+    Points are flushed with one unordered insert_many when `batch_size` points
+    are buffered or every `flush_seconds`, whichever comes first, so the write
+    paths never wait on the history store.
+    """
+
+    def __init__(self, collection: AsyncIOMotorCollection, batch_size: int, flush_seconds: float):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._points: List[dict] = []
+        self._task: Optional[asyncio.Task] = None
+        self._flushes = set()
+
+    def record(self, designation: str, lon: float, lat: float, timestamp: Optional[datetime] = None):
+        self._points.append({
+            "designation": designation,
+            "timestamp": timestamp or datetime.now(timezone.utc),
+            "coordinates": [lon, lat],
+        })
+        if len(self._points) >= self.batch_size:
+            task = asyncio.create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    def record_document(self, document: dict):
+        """
+        Record the current position of a unit document, if it has one.
+        """
+        designation = track_designation(document)
+        coordinates = (document.get("geometry") or {}).get("coordinates")
+        if designation is None or not coordinates:
+            return
+        timestamp = (document.get("properties") or {}).get("timestamp")
+        self.record(
+            designation,
+            coordinates[0],
+            coordinates[1],
+            timestamp if isinstance(timestamp, datetime) else None,
+        )
+
+    async def flush(self):
+        points, self._points = self._points, []
+        if not points:
+            return
+        try:
+            await self.collection.insert_many(points, ordered=False)
+        except Exception as e:
+            logging.error("Failed to write %d track points: %s", len(points), e)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.gather(*self._flushes)
+        await self.flush()
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+
+def downsample_pipeline(designation: str, start: datetime, end: datetime, max_points: int) -> List[dict]:
+    """
+    Aggregation returning at most `max_points` track points between `start` and `end`.
+
+    The range is split into `max_points` equal time buckets and the last
+    point of each bucket is kept.
+    """
+    # The +1 keeps a point exactly at `end` inside the last bucket
+    span_ms = int((end - start).total_seconds() * 1000) + 1
+    bucket_ms = -(-span_ms // max_points)
+    return [
+        {"$match": {"designation": designation, "timestamp": {"$gte": start, "$lte": end}}},
+        {"$sort": {"timestamp": 1}},
+        {"$group": {
+            "_id": {"$floor": {"$divide": [{"$subtract": ["$timestamp", start]}, bucket_ms]}},
+            "timestamp": {"$last": "$timestamp"},
+            "coordinates": {"$last": "$coordinates"},
+        }},
+        {"$sort": {"_id": 1}},
+        {"$project": {"_id": 0, "timestamp": 1, "coordinates": 1}},
+    ]
@@ -0,0 +1,88 @@
+import logging
+from typing import Dict, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+from change_feed import UnitChange
+from encoding import feature_collection_json
+
+
+class UnitCache:
+    """
+    In-process copy of the unit collection, held as pre-serialized GeoJSON per feature.
+
+    The cache is loaded once at startup and then kept current by applying
+    UnitChange events, both from this process's writes and from the change
+    stream. Until the initial load completes, readers fall back to Mongo.
+    """
+
+    def __init__(self):
+        self._features: Dict[str, bytes] = {}
+        self._collection_body: Optional[bytes] = None
+        # Changes seen while loading, replayed over the snapshot once it is read
+        self._changes_during_load: Optional[Dict[str, UnitChange]] = None
+        self.ready = False
+        self.hits = 0
+        self.misses = 0
+
+    async def load(self, collection: AsyncIOMotorCollection):
+        self._changes_during_load = {}
+        features = {}
+        async for document in collection.find():
+            change = UnitChange(id=str(document["_id"]), document=document)
+            features[change.id] = change.feature_json
+
+        changes, self._changes_during_load = self._changes_during_load, None
+        self._features = features
+        for change in changes.values():
+            self.apply(change)
+        self._collection_body = None
+        self.ready = True
+        logging.info("Unit cache loaded %d units", len(self._features))
+
+    def apply(self, change: UnitChange):
+        """
+        Patch the cache with a change; subscribed to the change feed.
+        """
+        if self._changes_during_load is not None:
+            self._changes_during_load[change.id] = change
+        if change.deleted:
+            self._features.pop(change.id, None)
+        else:
+            self._features[change.id] = change.feature_json
+        self._collection_body = None
+
+    __call__ = apply
+
+    def get(self, unit_id: str) -> Optional[bytes]:
+        """
+        Serialized feature for `unit_id`, or None on a miss.
+        """
+        feature = self._features.get(unit_id) if self.ready else None
+        if feature is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return feature
+
+    def feature_collection(self) -> Optional[bytes]:
+        """
+        Serialized FeatureCollection of every unit, or None before the cache is loaded.
+
+        The body is assembled once and reused until the next change.
+        """
+        if not self.ready:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self._collection_body is None:
+            self._collection_body = feature_collection_json(self._features.values())
+        return self._collection_body
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "ready": self.ready,
+            "units": len(self._features),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+        }
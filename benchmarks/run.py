@@ -0,0 +1,330 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+import httpx
+import psutil
+from synthetic import moved, synthetic_unit, synthetic_units
+from targets import http_client, in_memory_client
+
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Features per POST /units/bulk call, when seeding and in the bulk workload
+BULK_SIZE = 1000
+# Position reports per PATCH /units/positions call
+POSITIONS_BATCH = 100
+
+
+@dataclass
+class BenchmarkState:
+    """ What the workloads share: the client, the seeded units and the units they created """
+    client: httpx.AsyncClient
+    rng: random.Random
+    units: Dict[str, dict] = field(default_factory=dict)
+    ids: List[str] = field(default_factory=list)
+    created: List[str] = field(default_factory=list)
+    next_index: int = 0
+    seed_revision: int = 0
+
+    def new_unit(self) -> dict:
+        self.next_index += 1
+        return synthetic_unit(self.next_index, self.rng)
+
+    def random_id(self) -> str:
+        return self.rng.choice(self.ids)
+
+
+Operation = Callable[[BenchmarkState], Awaitable[Optional[httpx.Response]]]
+
+
+async def create_unit(state: BenchmarkState):
+    response = await state.client.post("/units/", json=state.new_unit())
+    if response.status_code == 201:
+        state.created.append(response.json()["id"])
+    return response
+
+
+async def read_unit(state: BenchmarkState):
+    return await state.client.get(f"/units/{state.random_id()}")
+
+
+async def list_page(state: BenchmarkState):
+    return await state.client.get("/units/", params={"limit": 100})
+
+
+async def list_viewport(state: BenchmarkState):
+    lon, lat = state.units[state.random_id()]["geometry"]["coordinates"]
+    bbox = f"{lon - 0.25},{lat - 0.25},{lon + 0.25},{lat + 0.25}"
+    return await state.client.get("/units/", params={"bbox": bbox, "limit": 1000})
+
+
+async def snapshot_arrow(state: BenchmarkState):
+    # What the Streamlit map loads first (UnitSyncStore)
+    return await state.client.get("/units/", headers={"Accept": ARROW_MEDIA_TYPE})
+
+
+async def sync_since(state: BenchmarkState):
+    # What the Streamlit map polls afterwards
+    return await state.client.get("/units/", params={"since": state.seed_revision, "limit": 1000})
+
+
+async def update_unit(state: BenchmarkState):
+    id = state.random_id()
+    unit = state.units[id]
+    unit["geometry"]["coordinates"] = moved(unit["geometry"]["coordinates"], state.rng)
+    return await state.client.put(f"/units/{id}", json=unit)
+
+
+async def update_positions(state: BenchmarkState):
+    now = datetime.now(timezone.utc).isoformat()
+    reports = []
+    for id in state.rng.sample(state.ids, min(POSITIONS_BATCH, len(state.ids))):
+        unit = state.units[id]
+        lon, lat = unit["geometry"]["coordinates"] = moved(unit["geometry"]["coordinates"], state.rng)
+        reports.append({
+            "designation": unit["properties"]["uniqueDesignation"],
+            "lon": lon,
+            "lat": lat,
+            "timestamp": now,
+        })
+    return await state.client.patch("/units/positions", json=reports)
+
+
+async def delete_unit(state: BenchmarkState):
+    # Only units created by the create workload, so the seeded set stays intact
+    if not state.created:
+        return None
+    return await state.client.delete(f"/units/{state.created.pop()}")
+
+
+async def bulk_insert(state: BenchmarkState):
+    features = [state.new_unit() for _ in range(BULK_SIZE)]
+    return await state.client.post("/units/bulk", json={"type": "FeatureCollection", "features": features})
+
+
+@dataclass
+class Workload:
+    name: str
+    operation: Operation
+    # Share of --requests run for this workload (heavy requests run fewer times)
+    weight: float = 1.0
+    # Relies on query operators mongomock does not implement
+    needs_mongo: bool = False
+
+
+WORKLOADS = [
+    Workload("create", create_unit),
+    Workload("read", read_unit),
+    Workload("list_page", list_page),
+    Workload("list_viewport", list_viewport, needs_mongo=True),
+    Workload("snapshot_arrow", snapshot_arrow, weight=0.01),
+    Workload("sync_since", sync_since, weight=0.1),
+    Workload("update", update_unit),
+    Workload("positions", update_positions, weight=0.1),
+    Workload("delete", delete_unit),
+    Workload("bulk", bulk_insert, weight=0.01),
+]
+
+
+class MemorySampler:
+    """
+    Samples the resident set size of some processes while a workload runs.
+    """
+
+    def __init__(self, processes: Dict[str, psutil.Process], interval: float = 0.05):
+        self.processes = processes
+        self.interval = interval
+        self.peaks: Dict[str, int] = {}
+        self.starts: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _sample(self):
+        for name, process in self.processes.items():
+            rss = process.memory_info().rss
+            self.starts.setdefault(name, rss)
+            self.peaks[name] = max(self.peaks.get(name, 0), rss)
+
+    async def _run(self):
+        while True:
+            self._sample()
+            await asyncio.sleep(self.interval)
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        self._sample()
+        return False
+
+    def summary(self) -> Dict[str, dict]:
+        mb = 1024 * 1024
+        return {
+            name: {
+                "rss_start_mb": round(self.starts[name] / mb, 1),
+                "rss_end_mb": round(process.memory_info().rss / mb, 1),
+                "rss_peak_mb": round(self.peaks[name] / mb, 1),
+            }
+            for name, process in self.processes.items()
+        }
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    """ Nearest-rank percentile of sorted values """
+    if not ordered:
+        return 0.0
+    rank = max(1, round(p / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def run_workload(state: BenchmarkState, workload: Workload, count: int, concurrency: int, processes) -> dict:
+    latencies: List[float] = []
+    errors: Dict[int, int] = {}
+    pending = iter(range(count))
+
+    async def worker():
+        for _ in pending:
+            started = time.perf_counter()
+            response = await workload.operation(state)
+            if response is None:
+                continue
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors[response.status_code] = errors.get(response.status_code, 0) + 1
+
+    async with MemorySampler(processes) as memory:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    ms = 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordered) / len(ordered) * ms, 3) if ordered else 0.0,
+            "p50": round(percentile(ordered, 50) * ms, 3),
+            "p90": round(percentile(ordered, 90) * ms, 3),
+            "p99": round(percentile(ordered, 99) * ms, 3),
+            "max": round(ordered[-1] * ms, 3) if ordered else 0.0,
+        },
+        "memory": memory.summary(),
+    }
+
+
+async def seed(state: BenchmarkState, count: int, seed_value: int):
+    """
+    Insert `count` synthetic units through POST /units/bulk and remember them.
+    """
+    for start in range(0, count, BULK_SIZE):
+        features = list(synthetic_units(min(BULK_SIZE, count - start), seed=seed_value, start=start))
+        response = await state.client.post("/units/bulk", json={"type": "FeatureCollection", "features": features})
+        response.raise_for_status()
+        for item in response.json()["items"]:
+            if item["status"] == "inserted":
+                state.units[item["id"]] = features[item["index"]]
+                state.ids.append(item["id"])
+    state.next_index = count
+
+    # The revision the seeded units are at, for the sync_since workload
+    response = await state.client.get("/units/", params={"limit": 1}, headers={"Accept": ARROW_MEDIA_TYPE})
+    state.seed_revision = int(response.headers.get("X-Revision", 0))
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args):
+    in_memory = args.target == "memory"
+    selected = [
+        workload for workload in WORKLOADS
+        if (not args.workloads or workload.name in args.workloads)
+    ]
+
+    processes = {"benchmark": psutil.Process()}
+    if args.server_pid:
+        processes["server"] = psutil.Process(args.server_pid)
+
+    client_factory = in_memory_client if in_memory else (lambda c: http_client(args.target, c))
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "target": args.target,
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "units": args.units,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "workloads": {},
+        "skipped": [],
+    }
+
+    async with client_factory(args.concurrency) as client:
+        state = BenchmarkState(client=client, rng=random.Random(args.seed))
+        started = time.perf_counter()
+        await seed(state, args.units, args.seed)
+        results["seed_seconds"] = round(time.perf_counter() - started, 3)
+        print(f"Seeded {len(state.units)} units in {results['seed_seconds']}s")
+
+        for workload in selected:
+            if workload.needs_mongo and in_memory:
+                results["skipped"].append(workload.name)
+                continue
+            count = max(1, int(args.requests * workload.weight))
+            result = await run_workload(state, workload, count, args.concurrency, processes)
+            results["workloads"][workload.name] = result
+            latency = result["latency_ms"]
+            print(
+                f"{workload.name:<16} {result['requests']:>7} req  {result['throughput_rps']:>9.1f} req/s"
+                f"  p50 {latency['p50']:>8.2f} ms  p99 {latency['p99']:>8.2f} ms"
+                + (f"  errors {result['errors']}" if result["errors"] else "")
+            )
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the units API")
+    parser.add_argument(
+        "--target", default="memory",
+        help='"memory" for the app in-process on mongomock, or the base URL of a running backend',
+    )
+    parser.add_argument("--units", type=int, default=10_000, help="synthetic units seeded before the workloads")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per workload (scaled by its weight)")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight at once")
+    parser.add_argument(
+        "--workloads", type=lambda value: value.split(","), default=None,
+        help="comma-separated subset of: " + ", ".join(workload.name for workload in WORKLOADS),
+    )
+    parser.add_argument("--seed", type=int, default=0, help="random seed for units and workloads")
+    parser.add_argument("--server-pid", type=int, default=None, help="also sample the memory of this process")
+    parser.add_argument("--output", default=None, help="JSON results file (default: benchmarks/results/<time>.json)")
+    asyncio.run(main(parser.parse_args()))
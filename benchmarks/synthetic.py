@@ -0,0 +1,55 @@
+import random
+from typing import Iterator, List
+
+
+# Standard identity digits: friend, hostile, neutral, unknown
+STANDARD_IDENTITIES = ("3", "6", "4", "1")
+ECHELONS = ("11", "12", "14", "15", "16", "18", "21")
+ENTITIES = ("121100", "121102", "121300", "121500", "130100", "140700")
+
+
+def synthetic_sidc(rng: random.Random) -> str:
+    """
+    A 20 digit land unit SIDC with a random identity, status, echelon and entity.
+    """
+    identity = rng.choice(STANDARD_IDENTITIES)
+    status = rng.choice("01")
+    return f"100{identity}10{status}0{rng.choice(ECHELONS)}{rng.choice(ENTITIES)}0000"
+
+
+def synthetic_unit(index: int, rng: random.Random, center=(13.4, 52.5), spread: float = 2.0) -> dict:
+    """
+    A GeoJSON unit feature as accepted by `POST /units`.
+    """
+    lon = center[0] + rng.uniform(-spread, spread)
+    lat = center[1] + rng.uniform(-spread, spread)
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [round(lon, 6), round(lat, 6)]},
+        "properties": {
+            "sidc": synthetic_sidc(rng),
+            "uniqueDesignation": f"BENCH-{index:07d}",
+        },
+    }
+
+
+def synthetic_units(count: int, seed: int = 0, start: int = 0) -> Iterator[dict]:
+    """
+    `count` reproducible units, numbered from `start`.
+
+    The SIDCs cover all four affiliations and a range of echelons, so the
+    decoded symbol fields and their indexes are exercised as with real data.
+    """
+    rng = random.Random(seed + start)
+    for index in range(start, start + count):
+        yield synthetic_unit(index, rng)
+
+
+def moved(coordinates: List[float], rng: random.Random, step: float = 0.01) -> List[float]:
+    """
+    Coordinates shifted by a small random step, like `Unit.simulate_movement` in the frontend.
+    """
+    lon, lat = coordinates[:2]
+    lon = min(max(lon + rng.uniform(-step, step), -180.0), 180.0)
+    lat = min(max(lat + rng.uniform(-step, step), -90.0), 90.0)
+    return [round(lon, 6), round(lat, 6)]
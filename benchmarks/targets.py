@@ -0,0 +1,48 @@
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+import httpx
+
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "backend")
+
+
+@asynccontextmanager
+async def in_memory_client(concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    A client calling the backend app in-process, with mongomock in place of MongoDB.
+
+    The app starts through its own lifespan, on a mongomock client, minus
+    what mongomock does not provide: change streams (the in-memory backplane
+    is used instead) and time-series collections (track history is off).
+    Symbols are cached in memory only. Figures are only comparable between
+    runs of this target; they measure the Python side of the API, not the
+    database.
+    """
+    os.environ.setdefault("DB_URL", "mongodb://benchmark")
+    os.environ.setdefault("DB_NAME", "benchmark")
+    os.environ["BACKPLANE"] = "memory"
+    os.environ["TRACK_HISTORY_ENABLED"] = "false"
+    os.environ["SYMBOL_CACHE_DIR"] = ""
+    sys.path.insert(0, BACKEND_DIR)
+
+    from mongomock_motor import AsyncMongoMockClient
+    import main
+
+    app = main.app
+    app.client_factory = lambda settings, *event_listeners: AsyncMongoMockClient()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+            yield client
+
+
+@asynccontextmanager
+async def http_client(base_url: str, concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    A client for a running backend, e.g. `docker compose up` or gunicorn on a real MongoDB.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url.rstrip("/"), limits=limits, timeout=60) as client:
+        yield client
@@ -0,0 +1,189 @@
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Any, Callable, Hashable
+import requests
+from requests.adapters import HTTPAdapter
+import streamlit as st
+from config import BACKEND_URL, BACKEND_CONNECT_TIMEOUT_SECONDS, BACKEND_READ_TIMEOUT_SECONDS
+from config import BACKEND_FAILURE_THRESHOLD, BACKEND_RETRY_SECONDS
+
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+
+class BackendUnavailable(requests.exceptions.ConnectionError):
+    """
+    Raised instead of sending a request while the circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops calling a backend that keeps failing, and probes it again later.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    requests fail at once with `BackendUnavailable`. After `retry_seconds` a
+    single trial request is let through: its success closes the breaker,
+    its failure opens it for another `retry_seconds`.
+    """
+
+    def __init__(self, failure_threshold: int = 3, retry_seconds: float = 15.0):
+        self.failure_threshold = failure_threshold
+        self.retry_seconds = retry_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self._trial else "open"
+
+    def before_request(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if self._trial or time.monotonic() - self.opened_at < self.retry_seconds:
+                raise BackendUnavailable("Backend unavailable, not retrying yet")
+            self._trial = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logging.warning("Backend failed %d times, pausing requests", self.failures)
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class _CacheEntry:
+    __slots__ = ("value", "fetched_at", "refresh")
+
+    def __init__(self):
+        self.value: Any = None
+        self.fetched_at: float | None = None
+        self.refresh: Future | None = None
+
+
+class BackendClient:
+    """
+    Pooled HTTP client for the backend, shared by every session.
+
+    Requests reuse keep-alive connections from one `requests.Session`, ask
+    for compressed responses, and go through a `CircuitBreaker`, so a down
+    backend costs one timeout rather than one per request. `cached` serves
+    stale values while refreshing them on a background thread, which keeps
+    reruns from waiting on the network once a value has been loaded.
+    """
+
+    def __init__(
+        self,
+        base_url: str = BACKEND_URL,
+        pool_size: int = 16,
+        workers: int = 4,
+        timeout: tuple[float, float] = (BACKEND_CONNECT_TIMEOUT_SECONDS, BACKEND_READ_TIMEOUT_SECONDS),
+        breaker: CircuitBreaker | None = None,
+        cache_size: int = 256,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker(BACKEND_FAILURE_THRESHOLD, BACKEND_RETRY_SECONDS)
+        self.session = requests.Session()
+        # requests advertises gzip/deflate, plus br and zstd when brotli/zstandard are installed
+        self.session.headers["Accept-Encoding"] = requests.utils.DEFAULT_ACCEPT_ENCODING
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backend-client")
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        """
+        GET a backend path (or absolute URL); raises for error statuses like `raise_for_status`.
+
+        Any error raised while sending the request, and 5xx responses, count
+        against the circuit breaker; 4xx responses do not.
+        """
+        self.breaker.before_request()
+        kwargs.setdefault("timeout", self.timeout)
+        failed = True
+        try:
+            url = path if "://" in path else f"{self.base_url}{path}"
+            response = self.session.get(url, **kwargs)
+            failed = response.status_code >= 500
+        finally:
+            # Always settles a half-open breaker's trial, whatever was raised
+            if failed:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        response.raise_for_status()
+        return response
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Run a blocking call on the client's worker threads.
+        """
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def cached(self, key: Hashable, fetch: Callable[[], Any], max_age: float, default: Any = None) -> Any:
+        """
+        The value of `fetch()` under `key`, refreshed in the background once older than `max_age`.
+
+        A stale value is returned right away while a single refresh runs. Only
+        the first load of a key waits for the backend, up to the read timeout;
+        if it fails, `default` is returned and the next call tries again. A
+        failed refresh keeps the stale value. `fetch` failing in any way,
+        including a response it cannot parse, counts as a failed refresh.
+        """
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                entry = self._cache[key] = _CacheEntry()
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            self._cache.move_to_end(key)
+            fresh = entry.fetched_at is not None and time.monotonic() - entry.fetched_at < max_age
+            if not fresh and entry.refresh is None:
+                entry.refresh = self.executor.submit(self._refresh, entry, fetch)
+            refresh = entry.refresh
+
+        if entry.fetched_at is not None:
+            return entry.value
+        try:
+            refresh.result(timeout=sum(self.timeout))
+        except TimeoutError:
+            return default
+        return entry.value if entry.fetched_at is not None else default
+
+    def _refresh(self, entry: _CacheEntry, fetch: Callable[[], Any]):
+        try:
+            value = fetch()
+        except Exception as e:
+            logging.warning("Request failed: %s", e)
+        else:
+            with self._lock:
+                entry.value, entry.fetched_at = value, time.monotonic()
+        finally:
+            with self._lock:
+                entry.refresh = None
+
+
+@st.cache_resource
+def get_backend_client() -> BackendClient:
+    return BackendClient()
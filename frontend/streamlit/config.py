@@ -0,0 +1,40 @@
+import os
+
+
+# Base URL of the FastAPI backend
+BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+
+# Seconds to wait for a backend connection, and for a response
+BACKEND_CONNECT_TIMEOUT_SECONDS = float(os.getenv("BACKEND_CONNECT_TIMEOUT_SECONDS", "2"))
+BACKEND_READ_TIMEOUT_SECONDS = float(os.getenv("BACKEND_READ_TIMEOUT_SECONDS", "10"))
+
+# Consecutive backend failures after which requests pause, and for how long
+BACKEND_FAILURE_THRESHOLD = int(os.getenv("BACKEND_FAILURE_THRESHOLD", "3"))
+BACKEND_RETRY_SECONDS = float(os.getenv("BACKEND_RETRY_SECONDS", "15"))
+
+# Backend URL as reached from the user's browser (vector tiles, symbols)
+BACKEND_PUBLIC_URL = os.getenv("BACKEND_PUBLIC_URL", BACKEND_URL)
+
+# Where the milsymbol map opens when there are no units to center it on, as (lat, lon)
+DEFAULT_MAP_CENTER = (
+    float(os.getenv("DEFAULT_MAP_LAT", "51.1657")),
+    float(os.getenv("DEFAULT_MAP_LON", "10.4515")),
+)
+
+# Below this zoom level the milsymbol map shows server-side clusters instead of units
+CLUSTER_ZOOM_THRESHOLD = int(os.getenv("CLUSTER_ZOOM_THRESHOLD", "9"))
+
+# Above this many units in the fetched area the milsymbol map shows clusters instead
+MAX_MAP_UNITS = int(os.getenv("MAX_MAP_UNITS", "5000"))
+
+# Rows per page of the unit details sidebar
+SIDEBAR_PAGE_SIZE = int(os.getenv("SIDEBAR_PAGE_SIZE", "100"))
+
+# Most matches listed for a sidebar search (the backend's page size limit)
+UNIT_SEARCH_LIMIT = int(os.getenv("UNIT_SEARCH_LIMIT", "1000"))
+
+# Minimum seconds between two syncs of the local unit copy with the backend
+UNIT_SYNC_SECONDS = float(os.getenv("UNIT_SYNC_SECONDS", "5"))
+
+# Pixels across the unit symbols drawn by the backend's /symbols service
+SYMBOL_SIZE = int(os.getenv("SYMBOL_SIZE", "40"))
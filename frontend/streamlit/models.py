@@ -39,6 +39,10 @@ PyObjectId = Annotated[str, BeforeValidator(str)]
 
 class UnitFeatureModel(Feature[Point, Dict]):
     id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    # SIDC fields decoded by the backend (affiliation, symbol_set, echelon, ...)
+    symbol: Optional[Dict] = None
+    # Backend write counter, see GET /units?since=
+    revision: Optional[int] = None
 
     model_config = ConfigDict(
         populate_by_name=True,
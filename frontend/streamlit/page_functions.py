@@ -2,13 +2,17 @@ import streamlit as st
 import folium
 from folium.plugins import Realtime, Fullscreen
 from streamlit_folium import st_folium
-from utils import get_cached_basic_units, find_centroid, add_unit_marker, fetch_basic_units, get_affilition_from_sidc
+from utils import get_cached_basic_units, find_centroid, get_unit_affiliation, symbol_icon
+from utils import UnitLayer, AFFILIATION_IMAGES, UNIT_TABLE_COLUMNS, ARROW_MEDIA_TYPE
+from utils import units_frame, unit_table, decode_units_arrow
+from utils import bounds_from_map_state, pad_bounds, bounds_contain, bounds_to_bbox, wrap_bounds, add_cluster_marker, unit_vector_tile_layer
+from unit_sync import get_unit_store
+from backend_client import get_backend_client
+from config import BACKEND_PUBLIC_URL, CLUSTER_ZOOM_THRESHOLD, DEFAULT_MAP_CENTER, MAX_MAP_UNITS, UNIT_SEARCH_LIMIT, UNIT_SYNC_SECONDS
 from placeholder_data import sample_units
 import requests
 import pandas
 import logging
-from typing import List
-from models import UnitFeatureModel
 
 
 # Set up logging
@@ -18,58 +22,100 @@ logging.basicConfig(level=logging.INFO)
 def milsymbol_unit_map_page():
     st.title("Milsym Mapper")
     
-    # Fetch units from FastAPI
-    @st.cache_data(ttl=60)
-    def fetch_units() -> List[UnitFeatureModel]:
-        url = "http://localhost:8000/units"
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            units = [UnitFeatureModel(**data) for data in response.json()['features']]
-            return units
-        except requests.exceptions.RequestException as e:
-            logging.warning("Request failed: %s", e)
-
-    units: List[UnitFeatureModel] = fetch_units()
-
-    # Display unit details in sidebar
+    client = get_backend_client()
+
+    # Fetch per-cell unit counts for zoomed-out views; refreshed in the background
+    def fetch_clusters(bbox: str | None, zoom: int) -> list[dict]:
+        return client.cached(
+            ("clusters", bbox, zoom),
+            lambda: client.get("/units/clusters", params={"bbox": bbox, "zoom": zoom}).json()["features"],
+            max_age=60,
+            default=[],
+        )
+
+    # Search matches come from the backend, so units outside the view are found too
+    def search_units(query: str) -> pandas.DataFrame:
+        return client.cached(
+            ("search", query),
+            lambda: decode_units_arrow(client.get(
+                "/units",
+                params={"q": query, "limit": UNIT_SEARCH_LIMIT},
+                headers={"Accept": ARROW_MEDIA_TYPE},
+            ).content).select(UNIT_TABLE_COLUMNS).to_pandas(),
+            max_age=UNIT_SYNC_SECONDS,
+            default=pandas.DataFrame(columns=UNIT_TABLE_COLUMNS),
+        )
+
+    # Vector tiles are rendered by the browser straight from the backend. The
+    # symbol layer sends the units as one GeoJSON layer styled in the browser,
+    # markers are built here per unit (or per cluster when zoomed out)
+    render_mode = st.radio("Render mode", ["Symbol layer", "Markers", "Vector tiles"], horizontal=True)
+    use_tiles = render_mode == "Vector tiles"
+
+    # The viewport reported by the map on the previous run. Data is fetched
+    # for a padded area around it, so small pans do not trigger a refetch.
+    view = st.session_state.get("milsym_view")
+    zoom = view["zoom"] if view else 12
+    bbox = bounds_to_bbox(view["fetched"]) if view else None
+    show_clusters = zoom < CLUSTER_ZOOM_THRESHOLD and not use_tiles
+
+    # Units come from a local copy that only pulls what changed since the last run
+    store = get_unit_store()
+    store.sync()
+    units = []
+    if not (show_clusters or use_tiles):
+        area = wrap_bounds(view["fetched"]) if view else None
+        # Too many units to draw quickly: cluster them until the user zooms in further
+        unit_count = store.count_in(area)
+        if unit_count > MAX_MAP_UNITS:
+            st.caption(f"{unit_count} units in view, zoom in to see them individually.")
+            show_clusters = True
+        else:
+            units = store.units_in(area)
+    clusters = fetch_clusters(bbox, zoom) if show_clusters else []
+
+    # Display unit details in sidebar: a table of the units in view, or of the
+    # search matches, with details for the selected unit only
     with st.sidebar:
         st.header("Unit Details")
+        query = st.text_input("Search", placeholder="Designation or SIDC prefix", key="milsym_search").strip()
+        if query:
+            frame = search_units(query)
+            st.caption(f"{len(frame)} matches" + (" (first ones only)" if len(frame) >= UNIT_SEARCH_LIMIT else ""))
+        else:
+            frame = units_frame(units)
+            if not units:
+                st.caption("Search, or zoom in to list the units in view.")
         st.markdown("---")
-        for unit in units:
-            expander = st.expander(label=unit.properties["uniqueDesignation"])
-            expander.write(f"SIDC: {unit.properties['sidc']}")
-            expander.info(f"LAT: {unit.geometry.coordinates.latitude}")
-            expander.info(f"LON: {unit.geometry.coordinates.longitude}")
-
-    # Create folium map
-    all_coordinates = [(unit.geometry.coordinates) for unit in units]
-    start_location = find_centroid(all_coordinates)
-    unit_map = folium.Map(location=start_location, zoom_start=12)
+        unit = unit_table(frame, key="milsym_units")
+        if unit is not None:
+            st.subheader(unit["designation"] or unit["id"])
+            st.write(f"SIDC: {unit['sidc']}")
+            st.info(f"LAT: {unit['lat']}")
+            st.info(f"LON: {unit['lon']}")
+
+    # The base map only depends on where the page first opened (and the render
+    # mode), so reruns leave it mounted in the browser: panning and zooming
+    # just replace the feature group of units below.
+    origin = st.session_state.get("milsym_origin")
+    if origin is None:
+        if view:
+            start_location = view["center"]
+        elif use_tiles:
+            world_clusters = fetch_clusters(None, 0)
+            start_location = find_centroid([(c["geometry"]["coordinates"][1], c["geometry"]["coordinates"][0]) for c in world_clusters])
+        else:
+            # No viewport yet: average the store's columns
+            start_location = store.centroid()
+        origin = st.session_state["milsym_origin"] = {"center": start_location or DEFAULT_MAP_CENTER, "zoom": zoom}
+    unit_map = folium.Map(location=origin["center"], zoom_start=origin["zoom"])
 
     # Map view layer control
     folium.TileLayer('OpenTopoMap').add_to(unit_map)
     folium.LayerControl().add_to(unit_map)
 
-    # folium.GeoJson(
-    #     [unit.model_dump_json() for unit in units],
-    #     # units,
-    #     zoom_on_click=True,
-    # ).add_to(unit_map)
-    icon_image_mapping = {
-        "Friendly": "images/milsymbol_2525D_FRIEND_Land_Unit.png",
-        "Neutral": "images/milsymbol_2525D_NEUTRAL_Land_Unit.png",
-        "Unknown": "images/milsymbol_2525D_UNKNOWN_Land_Unit.png",
-        "Hostile": "images/milsymbol_2525D_HOSTILE_Land_Unit.png",
-    }
-    for unit in units:
-        icon_url = icon_image_mapping[get_affilition_from_sidc(unit.properties["sidc"])]
-        icon = folium.CustomIcon(icon_image=icon_url, icon_size=(30, 30))
-        folium.Marker(
-            location=unit.geometry.coordinates,
-            popup=f"Lat: {unit.geometry.coordinates.latitude}, Lon: {unit.geometry.coordinates.longitude}",
-            icon=icon
-        ).add_to(unit_map)
+    if use_tiles:
+        unit_vector_tile_layer(f"{BACKEND_PUBLIC_URL}/units/tiles/{{z}}/{{x}}/{{y}}.mvt").add_to(unit_map)
 
     Fullscreen(
         position="topright",
@@ -78,7 +124,55 @@ def milsymbol_unit_map_page():
         force_separate_button=True,
     ).add_to(unit_map)
 
-    st_folium(unit_map)
+    # Units and clusters of the fetched area, sent as an update to the mounted map
+    unit_group = folium.FeatureGroup(name="Units")
+    if render_mode == "Symbol layer":
+        UnitLayer(
+            [unit.lon for unit in units],
+            [unit.lat for unit in units],
+            [unit.sidc for unit in units],
+            [unit.designation for unit in units],
+            [get_unit_affiliation(unit) for unit in units],
+        ).add_to(unit_group)
+    else:
+        for unit in units:
+            # Units without a SIDC fall back to the static image of their affiliation
+            if unit.sidc:
+                icon = symbol_icon(unit.sidc)
+            else:
+                icon = folium.CustomIcon(icon_image=AFFILIATION_IMAGES[get_unit_affiliation(unit)], icon_size=(30, 30))
+            folium.Marker(
+                location=(unit.lat, unit.lon),
+                popup=f"Lat: {unit.lat}, Lon: {unit.lon}",
+                icon=icon
+            ).add_to(unit_group)
+
+    for cluster in clusters:
+        add_cluster_marker(unit_group, cluster)
+
+    map_state = st_folium(
+        unit_map,
+        key="milsym_map",
+        # Keeps the viewport when the base map is rebuilt (render mode change)
+        center=view["center"] if view else None,
+        zoom=view["zoom"] if view else None,
+        feature_group_to_add=unit_group,
+        returned_objects=["bounds", "zoom", "center"],
+    )
+
+    # Refetch when the zoom changes or the viewport leaves the fetched area.
+    # Vector tiles are fetched by the browser itself, so no rerun is needed.
+    bounds = bounds_from_map_state(map_state)
+    if bounds is not None and not use_tiles:
+        new_zoom = map_state.get("zoom") or zoom
+        if view is None or new_zoom != view["zoom"] or not bounds_contain(view["fetched"], bounds):
+            center = map_state.get("center") or {}
+            st.session_state["milsym_view"] = {
+                "zoom": new_zoom,
+                "center": (center.get("lat"), center.get("lng")) if center else origin["center"],
+                "fetched": pad_bounds(bounds, 0.5),
+            }
+            st.rerun()
 
 
 def basic_unit_map_page():
@@ -98,18 +192,14 @@ def basic_unit_map_page():
     folium.TileLayer('OpenTopoMap').add_to(unit_map)
     folium.LayerControl().add_to(unit_map)
 
-    # Add markers for each unit
-    icon_image_mapping = {
-        "friendly": "images/milsymbol_2525D_FRIEND_Land_Unit.png",
-        "neutral": "images/milsymbol_2525D_NEUTRAL_Land_Unit.png",
-        "unknown": "images/milsymbol_2525D_UNKNOWN_Land_Unit.png",
-        "hostile": "images/milsymbol_2525D_HOSTILE_Land_Unit.png",
-    }
-
-    for unit in units:
-        icon_image_file = icon_image_mapping[unit.affilitation.lower()]
-        add_unit_marker(unit_map, unit, icon_image_file)
-        # unit.simulate_movement()
+    # Add all units as one layer, drawn with the image of their affiliation
+    UnitLayer(
+        [unit.longitude for unit in units],
+        [unit.latitude for unit in units],
+        [None] * len(units),
+        [unit.callsign for unit in units],
+        [unit.affilitation.capitalize() for unit in units],
+    ).add_to(unit_map)
 
     # Display the map
     st_folium(unit_map)
@@ -117,12 +207,23 @@ def basic_unit_map_page():
     # Sidebar
     with st.sidebar:
         st.header("Unit Details")
+        frame = pandas.DataFrame({
+            "callsign": [unit.callsign for unit in units],
+            "affiliation": [unit.affilitation for unit in units],
+            "latitude": [unit.latitude for unit in units],
+            "longitude": [unit.longitude for unit in units],
+        })
+        # The basic endpoint has no search, so filter the fetched units here
+        query = st.text_input("Search", placeholder="Callsign prefix", key="basic_search").strip()
+        if query:
+            frame = frame[frame["callsign"].fillna("").str.upper().str.startswith(query.upper())]
         st.markdown("---")
-        for unit in units:
-            expander = st.expander(label=unit.callsign)
-            expander.write(unit.affilitation.upper())
-            expander.write(f"- Latitude: {unit.latitude}")
-            expander.write(f"- Longitude: {unit.longitude}")
+        unit = unit_table(frame, key="basic_units")
+        if unit is not None:
+            st.subheader(unit["callsign"])
+            st.write(unit["affiliation"].upper())
+            st.write(f"- Latitude: {unit['latitude']}")
+            st.write(f"- Longitude: {unit['longitude']}")
 
 
 def test_page():
@@ -0,0 +1,60 @@
+from unit_store import UnitArrays
+
+
+def unit(id, lon, lat, **fields):
+    return {"id": id, "lon": lon, "lat": lat, **fields}
+
+
+def ids(store, indices):
+    return sorted(store.ids[indices].tolist())
+
+
+def test_upsert_adds_then_replaces():
+    store = UnitArrays(capacity=2)
+    for index in range(5):
+        store.upsert(unit(f"u{index}", index, index, sidc="SFGPUCI----D---", affiliation="friend", revision=index))
+    assert len(store) == 5 and "u4" in store
+
+    store.upsert(unit("u1", 10.0, 20.0, sidc=None, designation="Renamed", affiliation="hostile", revision=9))
+    assert len(store) == 5
+    record, = [record for record in store.records() if record.id == "u1"]
+    assert (record.lon, record.lat, record.sidc, record.designation, record.affiliation, record.revision) == (
+        10.0, 20.0, None, "Renamed", "hostile", 9
+    )
+
+
+def test_remove_keeps_rows_dense():
+    store = UnitArrays()
+    for index in range(4):
+        store.upsert(unit(f"u{index}", index, 0.0, designation=f"D{index}"))
+
+    store.remove("u1")
+    store.remove("missing")
+    assert len(store) == 3 and "u1" not in store
+    # The last row took the removed one's place and is still found by id
+    records = {record.id: record for record in store.records()}
+    assert sorted(records) == ["u0", "u2", "u3"]
+    assert (records["u3"].lon, records["u3"].designation) == (3.0, "D3")
+
+    store.upsert(unit("u3", 30.0, 0.0))
+    assert len(store) == 3
+    assert {record.id: record.lon for record in store.records()}["u3"] == 30.0
+
+    for id in ("u0", "u2", "u3"):
+        store.remove(id)
+    assert len(store) == 0 and store.records() == []
+
+
+def test_within_bbox_and_across_the_antimeridian():
+    store = UnitArrays()
+    store.upsert(unit("berlin", 13.4, 52.5))
+    store.upsert(unit("fiji", 179.5, -17.0))
+    store.upsert(unit("samoa", -172.0, -13.8))
+    store.upsert(unit("edge", 10.0, 50.0))
+
+    assert ids(store, store.within((5.0, 50.0, 15.0, 55.0))) == ["berlin", "edge"]
+    assert ids(store, store.within((170.0, -20.0, -170.0, -10.0))) == ["fiji", "samoa"]
+    assert ids(store, store.within((-180.0, -90.0, 180.0, 90.0))) == ["berlin", "edge", "fiji", "samoa"]
+
+    store.remove("edge")
+    assert ids(store, store.within((5.0, 50.0, 15.0, 55.0))) == ["berlin"]
@@ -0,0 +1,327 @@
+import numpy as np
+import pyarrow
+from models import UnitFeatureModel
+from utils import Bounds
+
+
+# Mean Earth radius used by the haversine helpers
+EARTH_RADIUS_M = 6_371_008.8
+
+# Meters per degree of latitude, for movement steps given in meters
+METERS_PER_DEGREE = 111_320.0
+
+
+def haversine(lon1, lat1, lon2, lat2) -> np.ndarray:
+    """
+    Great-circle distance in meters; arguments broadcast like NumPy arrays.
+    """
+    lon1, lat1, lon2, lat2 = (np.radians(np.asarray(value, dtype=np.float64)) for value in (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def haversine_matrix(lon_a: np.ndarray, lat_a: np.ndarray, lon_b: np.ndarray, lat_b: np.ndarray) -> np.ndarray:
+    """
+    Distances in meters between every point of `a` (rows) and every point of `b` (columns).
+
+    Memory grows with len(a) * len(b); compare large sets in chunks.
+    """
+    return haversine(lon_a[:, np.newaxis], lat_a[:, np.newaxis], lon_b[np.newaxis, :], lat_b[np.newaxis, :])
+
+
+def unit_vectors(lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    """
+    (n, 3) Cartesian points on the unit sphere.
+    """
+    lon, lat = np.radians(lon), np.radians(lat)
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_meters(dot: np.ndarray) -> np.ndarray:
+    """
+    Great-circle distance for the dot product of two unit vectors.
+    """
+    chord = np.sqrt(np.maximum(2.0 - 2.0 * dot, 0.0))
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.minimum(chord / 2, 1.0))
+
+
+class UnitRecord:
+    """
+    One unit read out of a `UnitArrays`, for rendering.
+
+    A slotted record rather than a Pydantic model: the map builds one per
+    visible unit on every rerun. Use `to_feature` where the full model is needed.
+    """
+    __slots__ = ("id", "lon", "lat", "sidc", "designation", "affiliation", "revision")
+
+    def __init__(self, id: str, lon: float, lat: float, sidc: str | None, designation: str | None,
+                 affiliation: str | None, revision: int):
+        self.id = id
+        self.lon = lon
+        self.lat = lat
+        self.sidc = sidc
+        self.designation = designation
+        self.affiliation = affiliation
+        self.revision = revision
+
+    def to_feature(self) -> UnitFeatureModel:
+        return UnitFeatureModel(
+            type="Feature",
+            id=self.id,
+            geometry={"type": "Point", "coordinates": [self.lon, self.lat]},
+            properties={"sidc": self.sidc, "uniqueDesignation": self.designation},
+            symbol={"affiliation": self.affiliation} if self.affiliation else None,
+            revision=self.revision,
+        )
+
+
+class CodeTable:
+    """
+    Interns strings as small integer codes; -1 stands for None.
+    """
+
+    def __init__(self):
+        self.values: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def encode(self, value: str | None) -> int:
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode_dictionary(self, column: pyarrow.ChunkedArray) -> np.ndarray:
+        """
+        Codes for a dictionary-encoded Arrow column, translating its dictionary once.
+        """
+        codes = []
+        for chunk in column.chunks:
+            translation = np.array([self.encode(value) for value in chunk.dictionary.to_pylist()] + [-1], dtype=np.int32)
+            indices = chunk.indices.fill_null(-1).to_numpy(zero_copy_only=False)
+            codes.append(translation[indices])
+        return np.concatenate(codes) if codes else np.empty(0, dtype=np.int32)
+
+    def decode(self, code: int) -> str | None:
+        return self.values[code] if code >= 0 else None
+
+    def decode_many(self, codes: np.ndarray) -> list[str | None]:
+        values = self.values + [None]  # code -1 picks the trailing None
+        return [values[code] for code in codes.tolist()]
+
+
+class UnitArrays:
+    """
+    Units held as a structure of arrays: one NumPy column per field.
+
+    Coordinates are float64 columns; SIDCs, designations and affiliations are
+    int32 codes into shared `CodeTable`s, so 100k units take a few MB and
+    whole-set operations (viewport filters, centroid, movement, distances)
+    are single vectorized passes. Rows are kept dense: a removed unit is
+    replaced by the last row.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.ids = np.empty(capacity, dtype=object)
+        self.lon = np.empty(capacity, dtype=np.float64)
+        self.lat = np.empty(capacity, dtype=np.float64)
+        self.sidc = np.empty(capacity, dtype=np.int32)
+        self.designation = np.empty(capacity, dtype=np.int32)
+        self.affiliation = np.empty(capacity, dtype=np.int32)
+        self.revision = np.empty(capacity, dtype=np.int64)
+        self.sidcs = CodeTable()
+        self.designations = CodeTable()
+        self.affiliations = CodeTable()
+        self._rows: dict[str, int] = {}
+
+    _COLUMNS = ("ids", "lon", "lat", "sidc", "designation", "affiliation", "revision")
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._rows
+
+    @classmethod
+    def from_arrow(cls, table: pyarrow.Table) -> "UnitArrays":
+        """
+        Builds the store from a `decode_units_arrow` table without going through Python rows.
+        """
+        table = table.unify_dictionaries()
+        store = cls(capacity=max(len(table), 1024))
+        size = len(table)
+        store.ids[:size] = table["id"].to_numpy(zero_copy_only=False)
+        store.lon[:size] = table["lon"].to_numpy()
+        store.lat[:size] = table["lat"].to_numpy()
+        store.sidc[:size] = store.sidcs.encode_dictionary(table["sidc"])
+        store.designation[:size] = store.designations.encode_dictionary(table["designation"])
+        store.affiliation[:size] = store.affiliations.encode_dictionary(table["affiliation"])
+        store.revision[:size] = table["revision"].fill_null(0).to_numpy()
+        store.size = size
+        store._rows = {id: row for row, id in enumerate(store.ids[:size])}
+        return store
+
+    def _grow(self, needed: int):
+        capacity = len(self.lon)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for name in self._COLUMNS:
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def upsert(self, unit: dict):
+        """
+        Adds or replaces a unit given as a row dict (see `decode_units_arrow`).
+        """
+        row = self._rows.get(unit["id"])
+        if row is None:
+            self._grow(self.size + 1)
+            row = self._rows[unit["id"]] = self.size
+            self.size += 1
+        self.ids[row] = unit["id"]
+        self.lon[row] = unit["lon"]
+        self.lat[row] = unit["lat"]
+        self.sidc[row] = self.sidcs.encode(unit.get("sidc"))
+        self.designation[row] = self.designations.encode(unit.get("designation"))
+        self.affiliation[row] = self.affiliations.encode(unit.get("affiliation"))
+        self.revision[row] = unit.get("revision") or 0
+
+    def remove(self, id: str):
+        row = self._rows.pop(id, None)
+        if row is None:
+            return
+        last = self.size - 1
+        if row != last:
+            for name in self._COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            self._rows[self.ids[row]] = row
+        self.ids[last] = None
+        self.size = last
+
+    def record(self, index: int) -> UnitRecord:
+        return UnitRecord(
+            self.ids[index],
+            float(self.lon[index]),
+            float(self.lat[index]),
+            self.sidcs.decode(self.sidc[index]),
+            self.designations.decode(self.designation[index]),
+            self.affiliations.decode(self.affiliation[index]),
+            int(self.revision[index]),
+        )
+
+    def records(self, indices: np.ndarray | None = None) -> list[UnitRecord]:
+        """
+        Records for rendering, for the given row indices or all units.
+
+        Columns are sliced and converted in bulk rather than element by element.
+        """
+        if indices is None:
+            indices = slice(0, self.size)
+        columns = (
+            self.ids[indices].tolist(),
+            self.lon[indices].tolist(),
+            self.lat[indices].tolist(),
+            self.sidcs.decode_many(self.sidc[indices]),
+            self.designations.decode_many(self.designation[indices]),
+            self.affiliations.decode_many(self.affiliation[indices]),
+            self.revision[indices].tolist(),
+        )
+        return [UnitRecord(*fields) for fields in zip(*columns)]
+
+    def within(self, bbox: Bounds) -> np.ndarray:
+        """
+        Row indices of the units inside a wrapped bbox (see `wrap_bounds`).
+        """
+        west, south, east, north = bbox
+        lon, lat = self.lon[:self.size], self.lat[:self.size]
+        inside = (lat >= south) & (lat <= north)
+        if west <= east:
+            inside &= (lon >= west) & (lon <= east)
+        else:
+            inside &= (lon >= west) | (lon <= east)
+        return np.flatnonzero(inside)
+
+    def centroid(self, indices: np.ndarray | None = None) -> tuple[float, float] | None:
+        """
+        Mean (lat, lon) of the units, or None without any.
+        """
+        lon, lat = self.lon[:self.size], self.lat[:self.size]
+        if indices is not None:
+            lon, lat = lon[indices], lat[indices]
+        if not len(lat):
+            return None
+        return (float(lat.mean()), float(lon.mean()))
+
+    def bounds(self) -> Bounds | None:
+        """
+        (west, south, east, north) around all units, or None without any.
+        """
+        if not self.size:
+            return None
+        lon, lat = self.lon[:self.size], self.lat[:self.size]
+        return (float(lon.min()), float(lat.min()), float(lon.max()), float(lat.max()))
+
+    def move(self, rng: np.random.Generator, max_step_m: float = 1000.0):
+        """
+        Moves every unit by a random step of up to `max_step_m` meters in a random direction.
+        """
+        lat = self.lat[:self.size]
+        distance = rng.uniform(0.0, max_step_m, self.size)
+        heading = rng.uniform(0.0, 2 * np.pi, self.size)
+        lat += distance * np.cos(heading) / METERS_PER_DEGREE
+        np.clip(lat, -85.0, 85.0, out=lat)
+        lon = self.lon[:self.size]
+        lon += distance * np.sin(heading) / (METERS_PER_DEGREE * np.cos(np.radians(lat)))
+        lon[:] = (lon + 180.0) % 360.0 - 180.0
+
+    def distances_from(self, lon: float, lat: float) -> np.ndarray:
+        """
+        Great-circle distance in meters from a point to every unit.
+        """
+        return haversine(lon, lat, self.lon[:self.size], self.lat[:self.size])
+
+    def nearest(self, lon: float, lat: float, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Row indices and distances (meters) of the `k` units closest to a point, closest first.
+        """
+        distances = self.distances_from(lon, lat)
+        k = min(k, self.size)
+        if k == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        candidates = np.argpartition(distances, k - 1)[:k]
+        order = candidates[np.argsort(distances[candidates])]
+        return order, distances[order]
+
+    def nearest_neighbors(self, indices: np.ndarray, k: int = 1, chunk_size: int = 256) -> tuple[np.ndarray, np.ndarray]:
+        """
+        For each of the given units, the `k` closest other units and their distances (meters).
+
+        Neighbors are ranked by the dot product of unit vectors, a matrix
+        product, which orders points like great-circle distance does. The
+        product is built `chunk_size` rows at a time to bound memory.
+        """
+        k = min(k, max(self.size - 1, 0))
+        vectors = unit_vectors(self.lon[:self.size], self.lat[:self.size])
+        indices = np.asarray(indices, dtype=np.intp)
+        neighbors = np.empty((len(indices), k), dtype=np.intp)
+        distances = np.empty((len(indices), k))
+        if k == 0:
+            return neighbors, distances
+        for start in range(0, len(indices), chunk_size):
+            chunk = indices[start:start + chunk_size]
+            similarity = vectors[chunk] @ vectors.T
+            similarity[np.arange(len(chunk)), chunk] = -np.inf  # not its own neighbor
+            candidates = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+            closest = np.take_along_axis(similarity, candidates, axis=1)
+            order = np.argsort(-closest, axis=1)
+            neighbors[start:start + len(chunk)] = np.take_along_axis(candidates, order, axis=1)
+            distances[start:start + len(chunk)] = chord_to_meters(np.take_along_axis(closest, order, axis=1))
+        return neighbors, distances
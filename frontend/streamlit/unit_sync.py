@@ -0,0 +1,139 @@
+import threading
+import time
+import logging
+from concurrent.futures import Future, TimeoutError
+import streamlit as st
+from backend_client import BackendClient, get_backend_client
+from utils import decode_units_arrow, ARROW_MEDIA_TYPE, Bounds
+from unit_store import UnitArrays, UnitRecord
+from config import UNIT_SYNC_SECONDS
+
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+# Changes requested per GET /units?since= call
+SYNC_PAGE_SIZE = 1000
+
+
+def unit_row_from_feature(feature: dict) -> dict:
+    """
+    Converts a GeoJSON unit feature into the row layout of `decode_units_arrow`.
+    """
+    lon, lat = feature["geometry"]["coordinates"][:2]
+    properties = feature.get("properties") or {}
+    return {
+        "id": feature["id"],
+        "lon": lon,
+        "lat": lat,
+        "sidc": properties.get("sidc"),
+        "designation": properties.get("uniqueDesignation"),
+        "affiliation": (feature.get("symbol") or {}).get("affiliation"),
+        "revision": feature.get("revision"),
+    }
+
+
+class UnitSyncStore:
+    """
+    Local copy of the backend's units, kept current with revision deltas.
+
+    The first sync loads an Arrow snapshot; later ones only fetch what changed
+    since the last revision seen (`GET /units?since=`), so a refresh costs a
+    few rows instead of the whole unit set. Units are held in a `UnitArrays`,
+    so viewport filters run as one vectorized pass. Shared by every session.
+
+    Syncs run on the backend client's worker threads: a rerun only waits for
+    the first load, later ones render the current copy while it refreshes.
+    """
+
+    def __init__(self, client: BackendClient):
+        self.client = client
+        self.units = UnitArrays()
+        self.revision: int | None = None
+        self._synced_at = 0.0
+        self._running: Future | None = None
+        # Guards `units` and `revision`, which the sync replaces and updates
+        self._lock = threading.Lock()
+
+    def sync(self, min_interval: float = UNIT_SYNC_SECONDS) -> None:
+        """
+        Starts bringing the local copy up to date, at most once per `min_interval` seconds.
+
+        On a failed request the previous state is kept and retried next time.
+        """
+        with self._lock:
+            if self._running is None and time.monotonic() - self._synced_at >= min_interval:
+                self._synced_at = time.monotonic()
+                self._running = self.client.submit(self._sync)
+            running = self._running
+
+        if self.revision is None and running is not None:
+            try:
+                running.result(timeout=sum(self.client.timeout))
+            except TimeoutError:
+                pass
+
+    def _sync(self) -> None:
+        try:
+            if self.revision is None:
+                self._load_snapshot()
+            else:
+                self._apply_changes()
+        except Exception as e:
+            # Includes responses that fail to decode; retried on the next sync
+            logging.warning("Unit sync failed: %s", e)
+        finally:
+            with self._lock:
+                self._running = None
+
+    def _load_snapshot(self) -> None:
+        response = self.client.get("/units", headers={"Accept": ARROW_MEDIA_TYPE})
+        units = UnitArrays.from_arrow(decode_units_arrow(response.content))
+        with self._lock:
+            self.units = units
+            self.revision = int(response.headers.get("X-Revision", 0))
+
+    def _apply_changes(self) -> None:
+        more = True
+        while more:
+            response = self.client.get("/units", params={"since": self.revision, "limit": SYNC_PAGE_SIZE})
+            changes = response.json()
+
+            if changes["revision"] < self.revision:
+                # The backend's counter went back (database replaced): start over
+                logging.info("Backend revision went back, reloading units")
+                self._load_snapshot()
+                return
+
+            with self._lock:
+                for feature in changes["features"]:
+                    self.units.upsert(unit_row_from_feature(feature))
+                for id in changes["deleted"]:
+                    self.units.remove(id)
+                self.revision = changes["revision"]
+            more = changes["more"]
+
+    def units_in(self, bbox: Bounds | None = None) -> list[UnitRecord]:
+        """
+        Returns the units inside a wrapped bbox (see `wrap_bounds`), or all of them.
+        """
+        with self._lock:
+            if bbox is None:
+                return self.units.records()
+            return self.units.records(self.units.within(bbox))
+
+    def count_in(self, bbox: Bounds | None = None) -> int:
+        """
+        Number of units inside a wrapped bbox, or of all units, without building records.
+        """
+        with self._lock:
+            return len(self.units) if bbox is None else len(self.units.within(bbox))
+
+    def centroid(self) -> tuple[float, float] | None:
+        with self._lock:
+            return self.units.centroid()
+
+
+@st.cache_resource
+def get_unit_store() -> UnitSyncStore:
+    return UnitSyncStore(get_backend_client())
@@ -1,36 +1,102 @@
 from pydantic_extra_types.coordinate import Latitude, Longitude
+from functools import lru_cache
+import math
 import requests
 from typing import List, Iterable, Literal
 import streamlit as st
 import logging
-import time
 from models import Unit
+from config import BACKEND_PUBLIC_URL, SYMBOL_SIZE, SIDEBAR_PAGE_SIZE
+from backend_client import get_backend_client
 import folium
+from folium.plugins import VectorGridProtobuf
+from folium.utilities import image_to_url
+from folium.map import Layer
+from jinja2 import Template
+import json
+import numpy as np
+import pandas
+from urllib.parse import quote
+import pyarrow
 
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
+# Columnar unit snapshot served by the backend's GET /units
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+UNIT_ARROW_SCHEMA = pyarrow.schema([
+    ("id", pyarrow.string()),
+    ("lon", pyarrow.float64()),
+    ("lat", pyarrow.float64()),
+    ("sidc", pyarrow.dictionary(pyarrow.int32(), pyarrow.string())),
+    ("designation", pyarrow.dictionary(pyarrow.int32(), pyarrow.string())),
+    ("affiliation", pyarrow.dictionary(pyarrow.int32(), pyarrow.string())),
+    ("revision", pyarrow.int64()),
+])
+
+# Affiliations decoded by the backend, as named by get_affilition_from_sidc
+BACKEND_AFFILIATIONS = {
+    "friend": "Friendly",
+    "hostile": "Hostile",
+    "neutral": "Neutral",
+    "unknown": "Unknown",
+}
+
+# MIL-STD-2525 frame fill colors per affiliation
+AFFILIATION_COLORS = {
+    "friend": "#80e0ff",
+    "hostile": "#ff8080",
+    "neutral": "#aaffaa",
+    "unknown": "#ffff80",
+}
+
+# Static marker images per affiliation, for units without a SIDC
+AFFILIATION_IMAGES = {
+    "Friendly": "images/milsymbol_2525D_FRIEND_Land_Unit.png",
+    "Neutral": "images/milsymbol_2525D_NEUTRAL_Land_Unit.png",
+    "Unknown": "images/milsymbol_2525D_UNKNOWN_Land_Unit.png",
+    "Hostile": "images/milsymbol_2525D_HOSTILE_Land_Unit.png",
+}
+
+# Map bounds as (west, south, east, north), in the map's own (unwrapped) longitudes
+Bounds = tuple[float, float, float, float]
+
 
 def find_centroid(coordinates: tuple[Latitude, Longitude]) -> tuple[Latitude, Longitude]:
-    if not coordinates:
+    if not len(coordinates):
         return None
 
-    lat_sum = 0
-    lon_sum = 0
-    count = len(coordinates)
+    # (lat, lon) pairs, or an (n, 2) array of them
+    lat, lon = np.asarray(coordinates, dtype=np.float64).mean(axis=0)
+    return (float(lat), float(lon))
+
 
-    for lat, lon in coordinates:
-        lat_sum += lat
-        lon_sum += lon
+def decode_units_arrow(content: bytes | None) -> pyarrow.Table:
+    """
+    Decodes an Arrow IPC stream of units into a table.
+
+    The columns reference the response buffer directly, so no per-unit
+    objects are created. An empty body yields an empty table.
 
-    centroid = (lat_sum / count, lon_sum / count)
-    return centroid
+    Parameters:
+        content: The raw response body
+    
+    Returns:
+        A table with the id, lon, lat, sidc, designation, affiliation and revision columns.
+    """
+    if not content:
+        return UNIT_ARROW_SCHEMA.empty_table()
+    return pyarrow.ipc.open_stream(pyarrow.py_buffer(content)).read_all()
 
 
+@lru_cache(maxsize=1024)
 def get_affilition_from_sidc(sidc: str) -> Literal["Friendly", "Hostile", "Neutral", "Unknown"]:
     """
     Determines unit affiliation from a MIL-STD-2525D SIDC string.
+
+    Prefer the affiliation decoded by the backend (see `get_unit_affiliation`);
+    this is the fallback for units stored without one.
     
     Parameters:
         sidc: The SIDC string
@@ -38,6 +104,10 @@ def get_affilition_from_sidc(sidc: str) -> Literal["Friendly", "Hostile", "Neutr
     Returns:
         The unit affiliation ("Friendly", "Hostile", "Neutral", or "Unknown").
     """
+    if len(sidc) >= 20 and sidc[:20].isdigit():
+        # Numeric 2525D code: the standard identity is the fourth digit
+        return {"2": "Friendly", "3": "Friendly", "4": "Neutral", "5": "Hostile", "6": "Hostile"}.get(sidc[3], "Unknown")
+
     if len(sidc) >= 15:
         affiliation_code = sidc[1]
         if affiliation_code == "F":
@@ -52,14 +122,324 @@ def get_affilition_from_sidc(sidc: str) -> Literal["Friendly", "Hostile", "Neutr
     return "Unknown"
 
 
+def symbol_icon(sidc: str, size: int = SYMBOL_SIZE) -> folium.CustomIcon:
+    """
+    Creates a marker icon referencing the backend's rendering of a SIDC.
+
+    The icon is a URL rather than embedded image data, so every marker with
+    the same SIDC shares one download that the browser caches.
+    """
+    return folium.CustomIcon(
+        icon_image=f"{BACKEND_PUBLIC_URL}/symbols/{quote(sidc, safe='')}.svg?size={size}",
+        # Matches the backend's canvas: 1.3 times as tall as wide, frame centered 0.65 down
+        icon_size=(size, round(size * 1.3)),
+        icon_anchor=(size // 2, round(size * 0.65)),
+    )
+
+
+def get_unit_affiliation(unit) -> Literal["Friendly", "Hostile", "Neutral", "Unknown"]:
+    """
+    Returns the affiliation of a unit record (see `UnitArrays.records`).
+    """
+    if unit.affiliation in BACKEND_AFFILIATIONS:
+        return BACKEND_AFFILIATIONS[unit.affiliation]
+    return get_affilition_from_sidc(unit.sidc or "")
+
+
+def bounds_from_map_state(map_state: dict | None) -> Bounds | None:
+    """
+    Extracts the viewport bounds from the value returned by `st_folium`.
+    """
+    bounds = (map_state or {}).get("bounds") or {}
+    south_west, north_east = bounds.get("_southWest") or {}, bounds.get("_northEast") or {}
+    if south_west.get("lat") is None or north_east.get("lat") is None:
+        return None
+    return (south_west["lng"], south_west["lat"], north_east["lng"], north_east["lat"])
+
+
+def pad_bounds(bounds: Bounds, ratio: float) -> Bounds:
+    """
+    Grows bounds by `ratio` of their width/height on every side.
+    """
+    west, south, east, north = bounds
+    pad_x, pad_y = (east - west) * ratio, (north - south) * ratio
+    return (west - pad_x, max(south - pad_y, -90.0), east + pad_x, min(north + pad_y, 90.0))
+
+
+def bounds_contain(outer: Bounds, inner: Bounds) -> bool:
+    return (
+        outer[0] <= inner[0] and outer[1] <= inner[1]
+        and outer[2] >= inner[2] and outer[3] >= inner[3]
+    )
+
+
+def wrap_bounds(bounds: Bounds) -> Bounds:
+    """
+    Wraps map bounds into [-180, 180] longitudes and [-90, 90] latitudes.
+
+    The result may cross the antimeridian (west > east).
+    """
+    west, south, east, north = bounds
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    else:
+        west = (west + 180) % 360 - 180
+        east = (east + 180) % 360 - 180
+        if east == -180:
+            east = 180.0
+    return (west, max(south, -90.0), east, min(north, 90.0))
+
+
+def bbox_contains_point(bbox: Bounds, lon: float, lat: float) -> bool:
+    """
+    Tests a point against wrapped bounds from `wrap_bounds`.
+    """
+    west, south, east, north = bbox
+    if not south <= lat <= north:
+        return False
+    if west <= east:
+        return west <= lon <= east
+    return lon >= west or lon <= east
+
+
+def bounds_to_bbox(bounds: Bounds) -> str:
+    """
+    Formats map bounds as the backend's `minLon,minLat,maxLon,maxLat` bbox parameter.
+
+    The bbox may cross the antimeridian (minLon > maxLon), which the backend supports.
+    """
+    west, south, east, north = wrap_bounds(bounds)
+    return f"{west:.6f},{south:.6f},{east:.6f},{north:.6f}"
+
+
+def unit_vector_tile_layer(tile_url: str) -> VectorGridProtobuf:
+    """
+    Creates a vector tile layer drawing the backend's `units` tile layer.
+
+    Units are drawn as circles in their affiliation color, entirely in the
+    browser, so the page size does not depend on the number of units.
+    """
+    colors = json.dumps(AFFILIATION_COLORS)
+    options = f"""{{
+        "interactive": true,
+        "getFeatureId": function(feature) {{ return feature.properties.id; }},
+        "vectorTileLayerStyles": {{
+            "units": function(properties, zoom) {{
+                var colors = {colors};
+                return {{
+                    radius: 6,
+                    weight: 1,
+                    color: "black",
+                    fill: true,
+                    fillColor: colors[properties.affiliation] || colors["unknown"],
+                    fillOpacity: 0.9
+                }};
+            }}
+        }}
+    }}"""
+    return VectorGridProtobuf(tile_url, "Units", options)
+
+
+def _dictionary_encode(values: Iterable[str | None]) -> tuple[list[int], list[str]]:
+    codes, index = [], {}
+    for value in values:
+        codes.append(-1 if value is None else index.setdefault(value, len(index)))
+    return codes, list(index)
+
+
+class UnitLayer(Layer):
+    """
+    All units as one Leaflet GeoJSON layer, styled in the browser.
+
+    The page carries the units once, as compact columns with dictionary
+    encoded SIDCs and affiliations, plus a single `pointToLayer`, instead of
+    a block of generated JS per marker. Icons are created once per SIDC from
+    the backend's /symbols URLs; units without a SIDC get the static image of
+    their affiliation, embedded once per affiliation used.
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = (function() {
+            var options = {{ this.options|tojson }};
+            var units = {{ this.data }};
+            var icons = {};
+            function iconFor(properties) {
+                var key = properties.sidc ? "sidc:" + properties.sidc : "affiliation:" + properties.affiliation;
+                if (!(key in icons)) {
+                    icons[key] = properties.sidc
+                        ? L.icon({
+                            iconUrl: options.symbolUrl.replace("{sidc}", encodeURIComponent(properties.sidc)),
+                            iconSize: options.iconSize,
+                            iconAnchor: options.iconAnchor
+                        })
+                        : L.icon({
+                            iconUrl: options.fallbackIcons[properties.affiliation] || options.fallbackIcons.Unknown,
+                            iconSize: options.fallbackIconSize
+                        });
+                }
+                return icons[key];
+            }
+            var features = new Array(units.lon.length);
+            for (var i = 0; i < features.length; i++) {
+                features[i] = {
+                    type: "Feature",
+                    geometry: {type: "Point", coordinates: [units.lon[i], units.lat[i]]},
+                    properties: {
+                        sidc: units.sidc[i] < 0 ? null : units.sidcs[units.sidc[i]],
+                        designation: units.designation[i],
+                        affiliation: units.affiliations[units.affiliation[i]]
+                    }
+                };
+            }
+            return L.geoJSON({type: "FeatureCollection", features: features}, {
+                pointToLayer: function(feature, latlng) {
+                    return L.marker(latlng, {icon: iconFor(feature.properties)});
+                },
+                onEachFeature: function(feature, layer) {
+                    if (feature.properties.designation) {
+                        layer.bindTooltip(feature.properties.designation);
+                    }
+                    layer.bindPopup(function() {
+                        var position = layer.getLatLng();
+                        return "Lat: " + position.lat + ", Lon: " + position.lng;
+                    });
+                }
+            });
+        })().addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+    """)
+
+    def __init__(
+        self,
+        lon: list[float],
+        lat: list[float],
+        sidc: list[str | None],
+        designation: list[str | None],
+        affiliation: list[str],
+        symbol_size: int = SYMBOL_SIZE,
+        name: str = "Units",
+    ):
+        """
+        Parameters:
+            lon, lat: Positions, one entry per unit
+            sidc: SIDCs, None for units drawn with their affiliation's image
+            designation: Tooltips
+            affiliation: As named by `get_unit_affiliation`
+        """
+        super().__init__(name=name)
+        self._name = "UnitLayer"
+        sidc_codes, sidcs = _dictionary_encode(sidc)
+        affiliation_codes, affiliations = _dictionary_encode(affiliation)
+        data = json.dumps({
+            "lon": np.round(np.asarray(lon, dtype=np.float64), 6).tolist(),
+            "lat": np.round(np.asarray(lat, dtype=np.float64), 6).tolist(),
+            "sidc": sidc_codes,
+            "sidcs": sidcs,
+            "designation": designation,
+            "affiliation": affiliation_codes,
+            "affiliations": affiliations,
+        }, separators=(",", ":"))
+        # Safe inside a <script> element
+        self.data = data.replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+
+        fallbacks = {value for value, code in zip(affiliation, sidc) if code is None}
+        if fallbacks:
+            fallbacks.add("Unknown")
+        self.options = {
+            "symbolUrl": f"{BACKEND_PUBLIC_URL}/symbols/{{sidc}}.svg?size={symbol_size}",
+            # Matches the backend's canvas, see `symbol_icon`
+            "iconSize": [symbol_size, round(symbol_size * 1.3)],
+            "iconAnchor": [symbol_size // 2, round(symbol_size * 0.65)],
+            "fallbackIcons": {
+                value: image_to_url(AFFILIATION_IMAGES[value]) for value in fallbacks if value in AFFILIATION_IMAGES
+            },
+            "fallbackIconSize": [30, 30],
+        }
+
+
+def add_cluster_marker(map_obj, cluster: dict) -> folium.CircleMarker:
+    """
+    Adds a circle sized by unit count and colored by the dominant affiliation.
+    """
+    lon, lat = cluster["geometry"]["coordinates"]
+    count = cluster["properties"]["count"]
+    affiliations = cluster["properties"]["affiliations"]
+    dominant = max(affiliations, key=affiliations.get) if affiliations else "unknown"
+    breakdown = ", ".join(f"{name}: {n}" for name, n in sorted(affiliations.items()))
+
+    marker = folium.CircleMarker(
+        location=(lat, lon),
+        radius=8 + 4 * math.log10(max(count, 1)),
+        color="black",
+        weight=1,
+        fill=True,
+        fill_color=AFFILIATION_COLORS.get(dominant, AFFILIATION_COLORS["unknown"]),
+        fill_opacity=0.8,
+        tooltip=f"{count} units ({breakdown})",
+    )
+    marker.add_to(map_obj)
+    return marker
+
+
+# Columns of the unit details table, as named in `UNIT_ARROW_SCHEMA`
+UNIT_TABLE_COLUMNS = ["designation", "sidc", "affiliation", "lat", "lon", "id"]
+
+
+def units_frame(units: Iterable) -> pandas.DataFrame:
+    """
+    A unit details table for records with the `UNIT_TABLE_COLUMNS` attributes (see `UnitRecord`).
+    """
+    units = list(units)
+    return pandas.DataFrame({column: [getattr(unit, column) for unit in units] for column in UNIT_TABLE_COLUMNS})
+
+
+def unit_table(frame: pandas.DataFrame, key: str, page_size: int = SIDEBAR_PAGE_SIZE) -> pandas.Series | None:
+    """
+    Shows a page of units as a selectable table and returns the selected row.
+
+    Only one page is sent to the browser per run, however many rows the frame
+    holds, and `st.dataframe` renders it as a single virtualized grid instead
+    of a widget per unit, so the sidebar costs the same for any unit count.
+
+    Parameters:
+        frame: One row per unit
+        key: Prefix of the widget keys, unique per page
+        page_size: Rows per page
+
+    Returns:
+        The selected row of the frame, or None without a selection.
+    """
+    pages = max(1, math.ceil(len(frame) / page_size))
+    page_key = f"{key}_page"
+    # A refetch or new search can leave fewer pages than the one shown before
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key=page_key) if pages > 1 else 1
+
+    rows = frame.iloc[(page - 1) * page_size:page * page_size]
+    event = st.dataframe(
+        rows,
+        key=f"{key}_table",
+        on_select="rerun",
+        selection_mode="single-row",
+        hide_index=True,
+        use_container_width=True,
+    )
+    selected = event.selection.rows
+    if not selected or selected[0] >= len(rows):
+        return None
+    return rows.iloc[selected[0]]
+
+
 def fetch_basic_units(url: str, sample_units: Iterable[Unit] | None = None) -> List[Unit]:
     """
     Fetches units from the specified API URL.
 
-    This function attempts to retrieve a list of units from a given URL.
-    If the request fails, it will retry up to 3 times with exponential backoff.
-    If the response is not a valid list or if the request fails, it will return
-    the provided sample units if they are given.
+    This function attempts to retrieve a list of units from a given URL
+    through the shared backend client. While the backend keeps failing, the
+    client's circuit breaker fails requests at once instead of waiting on
+    retries. If the response is not a valid list or if the request fails, it
+    will return the provided sample units if they are given.
 
     Args:
         url (str): The API endpoint to fetch units from.
@@ -71,38 +451,31 @@ def fetch_basic_units(url: str, sample_units: Iterable[Unit] | None = None) -> L
         the sample units if an error occurs and they were provided. An empty
         list is returned if no sample units are given.
     """
-    units: List[Unit] = []
-
-    for attempt in range(3):  # Retry up to 3 times
-        try:
-            response = requests.get(url, timeout=2)
-            response.raise_for_status()  # Raise an error for bad status codes
-            data = response.json()
+    try:
+        data = get_backend_client().get(url).json()
 
-            # Validate the response structure
-            if isinstance(data, list):
-                units = [Unit.model_validate(unit) for unit in data]
-                return units
-            else:
-                logging.error("Unexpected response format: %s", data)
-                break  # Exit the loop; we cannot process this
+        # Validate the response structure
+        if isinstance(data, list):
+            return [Unit.model_validate(unit) for unit in data]
+        logging.error("Unexpected response format: %s", data)
 
-        except requests.exceptions.RequestException as e:
-            logging.warning("Request failed: %s", e)
-            time.sleep(2 ** attempt)  # Exponential backoff
+    except (requests.exceptions.RequestException, ValueError) as e:
+        # ValueError: a body that is not JSON, or units that fail validation
+        logging.warning("Request failed: %s", e)
 
     # Return sample units only if provided
     return sample_units if sample_units is not None else []
 
 
-@st.cache_data(ttl=60)  # Cache the data for 1 minute
+@st.cache_resource(ttl=60)  # Cache the data for 1 minute
 def get_cached_basic_units(url: str = "http://localhost:8000/units", _sample_units: Iterable[Unit] | None = None) -> List[Unit]:
     """
     Retrieves units using caching for the specified API URL.
 
     This function is a cached wrapper around the `fetch_units` function,
-    which allows for efficient retrieval of units. The cache lasts for one hour,
-    and it logs the fetching process.
+    which allows for efficient retrieval of units. The cache lasts for one minute,
+    and it logs the fetching process. The list is shared between sessions
+    instead of being pickled per rerun, so treat it as read-only.
 
     Args:
         url (str, optional): The API endpoint to fetch units from. Defaults to
@@ -0,0 +1,282 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import httpx
+from units import SimulatedUnit, spawn_units
+
+
+# Features per POST /units/bulk call when registering the units
+REGISTER_BATCH = 1000
+# The emitter wakes up this often and sends the updates due since its last tick
+TICK_SECONDS = 0.1
+
+
+@dataclass
+class Stats:
+    started: float = field(default_factory=time.monotonic)
+    updates: int = 0
+    failed_updates: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    request_latencies: List[float] = field(default_factory=list)
+    visible_latencies: List[float] = field(default_factory=list)
+    probe_timeouts: int = 0
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    """ Nearest-rank percentile of sorted values """
+    if not ordered:
+        return 0.0
+    rank = max(1, round(p / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_summary(values: List[float]) -> dict:
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p90_ms": round(percentile(ordered, 90) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
+
+
+async def register_units(client: httpx.AsyncClient, units: List[SimulatedUnit]) -> int:
+    """
+    Create the units with their SIDCs; ones left over from an earlier run are reused.
+    """
+    inserted = 0
+    for start in range(0, len(units), REGISTER_BATCH):
+        features = [unit.feature() for unit in units[start:start + REGISTER_BATCH]]
+        response = await client.post("/units/bulk", json={"type": "FeatureCollection", "features": features})
+        response.raise_for_status()
+        inserted += response.json()["inserted"]
+    return inserted
+
+
+class Emitter:
+    """
+    Moves the units and sends their positions with PATCH /units/positions at a fixed rate.
+
+    Units are updated round-robin, `rate` per second in total, in batches of
+    `batch_size` reports. At most `concurrency` batches are in flight; when
+    the backend cannot keep up the emitter waits, and the achieved rate drops
+    below the target.
+    """
+
+    def __init__(self, client, units, rate, batch_size, concurrency, stats: Stats, rng: random.Random):
+        self.client = client
+        self.units = units
+        self.rate = rate
+        self.batch_size = batch_size
+        self.slots = asyncio.Semaphore(concurrency)
+        self.stats = stats
+        self.rng = rng
+        self.next_unit = 0
+        # Probed designations waiting for their next report to be sent
+        self.probes: Dict[str, asyncio.Future] = {}
+        self._tasks = set()
+
+    async def run(self, duration: float):
+        due = 0.0
+        deadline = time.monotonic() + duration
+        next_tick = time.monotonic()
+        while time.monotonic() < deadline:
+            due += self.rate * TICK_SECONDS
+            count, due = int(due), due - int(due)
+            batch = []
+            for _ in range(count):
+                batch.append(self.units[self.next_unit])
+                self.next_unit = (self.next_unit + 1) % len(self.units)
+                if len(batch) == self.batch_size:
+                    await self.send(batch)
+                    batch = []
+            if batch:
+                await self.send(batch)
+
+            next_tick += TICK_SECONDS
+            await asyncio.sleep(max(next_tick - time.monotonic(), 0))
+        await asyncio.gather(*self._tasks)
+
+    async def send(self, units: List[SimulatedUnit]):
+        await self.slots.acquire()
+        now = time.monotonic()
+        timestamp = datetime.now(timezone.utc)
+        # Mongo keeps milliseconds; truncate so the probe can compare what it reads back
+        timestamp = timestamp.replace(microsecond=timestamp.microsecond // 1000 * 1000)
+        reports = []
+        for unit in units:
+            unit.move(now, self.rng)
+            reports.append({
+                "designation": unit.designation,
+                "lon": unit.lon,
+                "lat": unit.lat,
+                "timestamp": timestamp.isoformat(),
+            })
+            if (probe := self.probes.pop(unit.designation, None)) is not None and not probe.done():
+                probe.set_result((now, timestamp))
+        task = asyncio.create_task(self._post(reports))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _post(self, reports: List[dict]):
+        started = time.monotonic()
+        try:
+            response = await self.client.patch("/units/positions", json=reports)
+            self.stats.request_latencies.append(time.monotonic() - started)
+            self.stats.batches += 1
+            if response.status_code >= 400:
+                self.stats.failed_batches += 1
+                self.stats.failed_updates += len(reports)
+            else:
+                result = response.json()
+                # Stale and unknown-designation reports are rejected, not failed
+                rejected = result.get("stale", 0) + result.get("not_found", 0)
+                self.stats.updates += result["applied"] - rejected - len(result["errors"])
+                self.stats.failed_updates += len(result["errors"])
+        except httpx.HTTPError:
+            self.stats.batches += 1
+            self.stats.failed_batches += 1
+            self.stats.failed_updates += len(reports)
+        finally:
+            self.slots.release()
+
+
+async def probe_visibility(client, emitter: Emitter, stats: Stats, interval: float, poll: float, timeout: float):
+    """
+    Measure how long a sent position takes to be returned by GET /units.
+
+    A random unit is picked and its next report is timed from the moment its
+    batch is sent until a read of the unit shows that report's timestamp.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        unit = emitter.rng.choice(emitter.units)
+        sent = asyncio.get_running_loop().create_future()
+        emitter.probes[unit.designation] = sent
+        try:
+            sent_at, timestamp = await asyncio.wait_for(sent, timeout)
+        except asyncio.TimeoutError:
+            emitter.probes.pop(unit.designation, None)
+            continue
+
+        expected = timestamp.replace(tzinfo=None)
+        while True:
+            if time.monotonic() - sent_at > timeout:
+                stats.probe_timeouts += 1
+                break
+            try:
+                response = await client.get("/units/", params={"designation": unit.designation, "limit": 1})
+                features = response.json()["features"] if response.status_code == 200 else []
+            except httpx.HTTPError:
+                features = []
+            stored = visible_timestamp(features)
+            if stored is not None and stored >= expected:
+                stats.visible_latencies.append(time.monotonic() - sent_at)
+                break
+            await asyncio.sleep(poll)
+
+
+def visible_timestamp(features: List[dict]) -> Optional[datetime]:
+    if not features:
+        return None
+    value = (features[0].get("properties") or {}).get("timestamp")
+    if not isinstance(value, str):
+        return None
+    stored = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return stored.astimezone(timezone.utc).replace(tzinfo=None) if stored.tzinfo else stored
+
+
+async def report_progress(stats: Stats, interval: float):
+    last_updates, last_time = 0, time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        now = time.monotonic()
+        rate = (stats.updates - last_updates) / (now - last_time)
+        last_updates, last_time = stats.updates, now
+        visible = latency_summary(stats.visible_latencies[-100:])
+        print(
+            f"{now - stats.started:7.1f}s  {rate:9.1f} updates/s  {stats.updates:>9} sent"
+            f"  {stats.failed_updates:>6} failed  visible p50 {visible['p50_ms']:.0f} ms"
+            f" p99 {visible['p99_ms']:.0f} ms"
+        )
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    units = spawn_units(
+        args.units, rng, time.monotonic(),
+        center=(args.center_lon, args.center_lat),
+        spread_km=args.spread_km,
+        waypoint_share=args.waypoint_share,
+        prefix=args.prefix,
+    )
+
+    limits = httpx.Limits(max_connections=args.concurrency + 1, max_keepalive_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.backend.rstrip("/"), limits=limits, timeout=args.timeout) as client:
+        inserted = await register_units(client, units)
+        print(f"Registered {inserted} new units ({len(units) - inserted} already present)")
+
+        stats = Stats()
+        emitter = Emitter(client, units, args.rate, args.batch_size, args.concurrency, stats, rng)
+        background = [
+            asyncio.create_task(report_progress(stats, args.report_interval)),
+            asyncio.create_task(probe_visibility(
+                client, emitter, stats, args.probe_interval, poll=0.01, timeout=args.timeout,
+            )),
+        ]
+        try:
+            await emitter.run(args.duration)
+        finally:
+            for task in background:
+                task.cancel()
+
+    elapsed = time.monotonic() - stats.started
+    results = {
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "backend": args.backend,
+        "units": args.units,
+        "target_rate": args.rate,
+        "batch_size": args.batch_size,
+        "concurrency": args.concurrency,
+        "seconds": round(elapsed, 2),
+        "updates": stats.updates,
+        "failed_updates": stats.failed_updates,
+        "achieved_rate": round(stats.updates / elapsed, 1),
+        "batches": stats.batches,
+        "failed_batches": stats.failed_batches,
+        "request_latency": latency_summary(stats.request_latencies),
+        "visible_latency": latency_summary(stats.visible_latencies),
+        "probe_timeouts": stats.probe_timeouts,
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive simulated moving units against the backend")
+    parser.add_argument("--backend", default="http://localhost:8000", help="backend base URL")
+    parser.add_argument("--units", type=int, default=20_000, help="number of simulated units")
+    parser.add_argument("--rate", type=float, default=5000, help="position updates per second, in total")
+    parser.add_argument("--batch-size", type=int, default=500, help="reports per PATCH /units/positions")
+    parser.add_argument("--concurrency", type=int, default=8, help="batches in flight at once")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run")
+    parser.add_argument("--waypoint-share", type=float, default=0.5, help="share of units following waypoints")
+    parser.add_argument("--center-lon", type=float, default=13.4)
+    parser.add_argument("--center-lat", type=float, default=52.5)
+    parser.add_argument("--spread-km", type=float, default=200, help="radius the units start in")
+    parser.add_argument("--prefix", default="SIM", help="designation prefix, to keep runs apart")
+    parser.add_argument("--probe-interval", type=float, default=0.5, help="seconds between visibility probes")
+    parser.add_argument("--report-interval", type=float, default=5, help="seconds between progress lines")
+    parser.add_argument("--timeout", type=float, default=30, help="HTTP and probe timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="also write the summary to this JSON file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,127 @@
+import math
+import random
+from typing import List, Tuple
+
+
+# Meters per degree of latitude
+METERS_PER_DEGREE = 111_320.0
+
+# Symbol set digits with the speed range (m/s) of units of that kind
+UNIT_KINDS = (
+    ("10", (1.0, 15.0)),     # land unit
+    ("30", (5.0, 15.0)),     # sea surface
+    ("01", (100.0, 250.0)),  # air
+)
+STANDARD_IDENTITIES = ("3", "6", "4", "1")
+ECHELONS = ("11", "12", "14", "15", "16", "18")
+
+
+def offset(lon: float, lat: float, meters: float, heading: float) -> Tuple[float, float]:
+    """
+    The point `meters` away from (lon, lat) towards `heading` (radians, 0 = north).
+    """
+    lat += meters * math.cos(heading) / METERS_PER_DEGREE
+    lat = min(max(lat, -85.0), 85.0)
+    lon += meters * math.sin(heading) / (METERS_PER_DEGREE * math.cos(math.radians(lat)))
+    lon = (lon + 180.0) % 360.0 - 180.0
+    return lon, lat
+
+
+def distance_and_heading(lon: float, lat: float, to_lon: float, to_lat: float) -> Tuple[float, float]:
+    """
+    Equirectangular distance (meters) and heading from one point to another; fine over short legs.
+    """
+    dx = (to_lon - lon) * METERS_PER_DEGREE * math.cos(math.radians((lat + to_lat) / 2))
+    dy = (to_lat - lat) * METERS_PER_DEGREE
+    return math.hypot(dx, dy), math.atan2(dx, dy)
+
+
+class RandomWalk:
+    """ Keeps moving at a steady speed while the heading drifts randomly """
+    __slots__ = ("heading", "speed")
+
+    def __init__(self, speed: float, rng: random.Random):
+        self.speed = speed
+        self.heading = rng.uniform(0, 2 * math.pi)
+
+    def advance(self, lon: float, lat: float, seconds: float, rng: random.Random) -> Tuple[float, float]:
+        self.heading += rng.gauss(0.0, 0.3)
+        return offset(lon, lat, self.speed * seconds, self.heading)
+
+
+class WaypointRoute:
+    """ Follows a closed loop of (at least two distinct) waypoints at a steady speed """
+    __slots__ = ("waypoints", "target", "speed")
+
+    def __init__(self, waypoints: List[Tuple[float, float]], speed: float):
+        self.waypoints = waypoints
+        self.target = 0
+        self.speed = speed
+
+    def advance(self, lon: float, lat: float, seconds: float, rng: random.Random) -> Tuple[float, float]:
+        remaining = self.speed * seconds
+        while remaining > 0:
+            to_lon, to_lat = self.waypoints[self.target]
+            distance, heading = distance_and_heading(lon, lat, to_lon, to_lat)
+            if distance > remaining:
+                return offset(lon, lat, remaining, heading)
+            lon, lat = to_lon, to_lat
+            remaining -= distance
+            self.target = (self.target + 1) % len(self.waypoints)
+        return lon, lat
+
+
+class SimulatedUnit:
+    __slots__ = ("designation", "sidc", "lon", "lat", "route", "moved_at")
+
+    def __init__(self, designation: str, sidc: str, lon: float, lat: float, route, moved_at: float):
+        self.designation = designation
+        self.sidc = sidc
+        self.lon = lon
+        self.lat = lat
+        self.route = route
+        self.moved_at = moved_at
+
+    def move(self, now: float, rng: random.Random):
+        self.lon, self.lat = self.route.advance(self.lon, self.lat, now - self.moved_at, rng)
+        self.moved_at = now
+
+    def feature(self) -> dict:
+        return {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [round(self.lon, 6), round(self.lat, 6)]},
+            "properties": {"sidc": self.sidc, "uniqueDesignation": self.designation},
+        }
+
+
+def spawn_units(
+    count: int,
+    rng: random.Random,
+    now: float,
+    center: Tuple[float, float],
+    spread_km: float,
+    waypoint_share: float,
+    prefix: str = "SIM",
+) -> List[SimulatedUnit]:
+    """
+    Spread `count` units around `center`, each with a 2525D SIDC, a speed that fits
+    its symbol set and either a random walk or a loop of waypoints.
+    """
+    spread = spread_km * 1000
+    units = []
+    for index in range(count):
+        symbol_set, (low, high) = rng.choices(UNIT_KINDS, weights=(8, 1, 1))[0]
+        sidc = f"100{rng.choice(STANDARD_IDENTITIES)}{symbol_set}00{rng.choice(ECHELONS)}0000000000"
+        lon, lat = offset(*center, rng.uniform(0, spread), rng.uniform(0, 2 * math.pi))
+        speed = rng.uniform(low, high)
+
+        if rng.random() < waypoint_share:
+            waypoints = [
+                offset(lon, lat, rng.uniform(0.2, 1.0) * speed * 600, rng.uniform(0, 2 * math.pi))
+                for _ in range(rng.randint(2, 6))
+            ]
+            route = WaypointRoute(waypoints, speed)
+        else:
+            route = RandomWalk(speed, rng)
+        units.append(SimulatedUnit(f"{prefix}-{index:06d}", sidc, lon, lat, route, now))
+    return units